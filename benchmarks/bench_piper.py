@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of the psh pipe engine.
+
+Pushes lines through a three stage pipeline (producer | passthrough | count) using the OS pipes that `Piper` used to
+connect all commands with, and the in-process pipes that it now uses between psh commands (passing either just text
+or items along with the text).
+
+Usage: python benchmarks/bench_piper.py [num_lines] [repeats]
+"""
+import io
+import sys
+import time
+
+from pyos.psh import utils
+
+PAGE_SIZE = 1000
+
+
+def run_pipeline(num_lines: int, in_process: bool, items: bool) -> float:
+    """Run the pipeline once and return the time it took in seconds"""
+    counted = []
+
+    def passthrough():
+        if items:
+            for batch in sys.stdin.read_batches():
+                sys.stdout.send_many([item for item, _line in batch],
+                                     [line[:-1] for _item, line in batch])
+        else:
+            for line in sys.stdin:
+                sys.stdout.write(line)
+
+    def count():
+        if items:
+            counted.append(sum(len(batch) for batch in sys.stdin.read_batches()))
+        else:
+            counted.append(sum(1 for _ in sys.stdin))
+
+    piper = utils.Piper([passthrough, count], out_stream=io.StringIO(), in_process=in_process)
+    start = time.perf_counter()
+    piper.start()
+    try:
+        if items:
+            # Like the nodes in a listing, these are sent a page at a time
+            for start_idx in range(0, num_lines, PAGE_SIZE):
+                page = range(start_idx, min(start_idx + PAGE_SIZE, num_lines))
+                sys.stdout.send_many(page, [f'/some/directory/entry_{idx}' for idx in page])
+        else:
+            for idx in range(num_lines):
+                sys.stdout.write(f'/some/directory/entry_{idx}\n')
+    finally:
+        piper.wait()
+    elapsed = time.perf_counter() - start
+
+    assert counted == [num_lines], f'Expected {num_lines} lines, got {counted}'
+    return elapsed
+
+
+def main(num_lines=100_000, repeats=5):
+    modes = (
+        ('OS pipes, text', False, False),
+        ('in-process, text', True, False),
+        ('in-process, items', True, True),
+    )
+    print(f'Piping {num_lines} lines through 3 stages (best of {repeats})')
+    for name, in_process, items in modes:
+        best = min(run_pipeline(num_lines, in_process, items) for _ in range(repeats))
+        print(f'{name:>20}: {best * 1000:8.1f} ms ({num_lines / best:,.0f} lines/s)')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""An asyncio interface to pyos.  The database calls are offloaded to worker threads (see `pyos.aio.utils`) so that
+many concurrent lookups can be multiplexed on a single event loop."""
+from . import utils
+from . import db
+from . import os
+
+__all__ = 'utils', 'db', 'os'
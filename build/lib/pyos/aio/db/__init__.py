@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""Async versions of the database related functions"""
+
+# This relies on each of the submodules having an __all__ variable.
+from .lib import *
+from . import fs
+
+ADDITIONAL = ('fs',)
+
+__all__ = lib.__all__ + ADDITIONAL  # pylint: disable=undefined-variable
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Async versions of the pyos.os functions that hit the database"""
+from typing import List
+
+from pyos import db
+from pyos import exceptions
+from pyos import os
+from . import utils
+from .db import fs
+
+__all__ = ('exists', 'isdir', 'isfile', 'listdir', 'makedirs', 'rename')
+
+
+async def exists(path: os.PathSpec) -> bool:
+    """Return `True` if the path exists"""
+    return await fs.find_entry(os.withdb.to_fs_path(path), fields=()) is not None
+
+
+async def isdir(path: os.PathSpec) -> bool:
+    """Return True if path is an existing directory."""
+    entry = await fs.find_entry(os.withdb.to_fs_path(path), fields=(db.fs.Schema.TYPE,))
+    if not entry:
+        return False
+    return db.fs.Entry.is_dir(entry)
+
+
+async def isfile(path: os.PathSpec) -> bool:
+    """Return True if path is an existing object."""
+    entry = await fs.find_entry(os.withdb.to_fs_path(path), fields=(db.fs.Schema.TYPE,))
+    if not entry:
+        return False
+    return db.fs.Entry.is_obj(entry)
+
+
+async def listdir(lsdir: os.PathSpec = '.') -> List[str]:
+    """Return a list containing the names of the entries in the directory given by path."""
+    entry = await fs.find_entry(os.withdb.to_fs_path(lsdir), fields=(db.fs.Schema.TYPE,))
+    if not entry:
+        raise exceptions.FileNotFoundError(lsdir)
+
+    if db.fs.Entry.is_obj(entry):
+        raise exceptions.NotADirectoryError(f"Not a directory: '{lsdir}'")
+
+    return [
+        db.fs.Entry.name(child)
+        async for child in fs.iter_children(db.fs.Entry.id(entry), fields=(db.fs.Schema.NAME,))
+    ]
+
+
+async def makedirs(name: os.PathSpec, exists_ok=False):
+    """Make the directory along with any parent directories that don't exist yet.  See `pyos.os.makedirs()`."""
+    await utils.run_serial(os.makedirs, name, exists_ok=exists_ok)
+
+
+async def rename(src: os.PathSpec, dest: os.PathSpec):
+    """Rename the file or directory src to dest.  See `pyos.os.rename()`."""
+    await utils.run_serial(os.rename, src, dest)
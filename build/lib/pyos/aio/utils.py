@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""Running the synchronous pyos functions from asyncio code.
+
+pymongo (and therefore mincepy) is a blocking driver so the calls are offloaded to worker threads.  Reads, which only
+touch the (thread safe) MongoClient and the session's entries cache, are spread over a pool of threads while anything
+that goes through the historian is run on a single writer thread as the historian is not thread safe.
+"""
+import asyncio
+import concurrent.futures
+import functools
+import itertools
+import threading
+from typing import AsyncIterator, Callable, Iterable, List, Optional
+
+__all__ = ('run', 'run_serial', 'iterate', 'shutdown')
+
+MAX_WORKERS = 16  # The number of threads used for reads
+ITERATE_BATCH_SIZE = 1024  # The number of items taken from an iterator each time it is advanced
+
+_LOCK = threading.Lock()
+_READERS: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_WRITER: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+
+def get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """Get the executor used for reads, creating it if necessary"""
+    global _READERS  # pylint: disable=global-statement
+    with _LOCK:
+        if _READERS is None:
+            _READERS = concurrent.futures.ThreadPoolExecutor(MAX_WORKERS,
+                                                             thread_name_prefix='pyos-aio')
+        return _READERS
+
+
+def get_writer() -> concurrent.futures.ThreadPoolExecutor:
+    """Get the single threaded executor used for anything that uses the historian, creating it if necessary"""
+    global _WRITER  # pylint: disable=global-statement
+    with _LOCK:
+        if _WRITER is None:
+            _WRITER = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix='pyos-aio-writer')
+        return _WRITER
+
+
+def shutdown(wait=True):
+    """Shut down the worker threads.  They will be started again if needed."""
+    global _READERS, _WRITER  # pylint: disable=global-statement
+    with _LOCK:
+        executors = _READERS, _WRITER
+        _READERS = _WRITER = None
+
+    for executor in executors:
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+async def run(func: Callable, *args, **kwargs):
+    """Call a function that only reads from the database on one of the reader threads"""
+    return await asyncio.get_running_loop().run_in_executor(
+        get_executor(), functools.partial(func, *args, **kwargs))
+
+
+async def run_serial(func: Callable, *args, **kwargs):
+    """Call a function on the writer thread, calls made this way are run one at a time in the order they were made"""
+    return await asyncio.get_running_loop().run_in_executor(
+        get_writer(), functools.partial(func, *args, **kwargs))
+
+
+async def iterate(iterable: Iterable, batch_size: int = ITERATE_BATCH_SIZE) -> AsyncIterator:
+    """Iterate over a (blocking) iterable, advancing it a batch at a time on the reader threads.  If the iterator has
+    a close() method (e.g. it's a generator holding a cursor) this is called when the async iterator is closed."""
+    iterator = iter(iterable)
+    try:
+        while True:
+            batch = await run(_take, iterator, batch_size)
+            for item in batch:
+                yield item
+            if len(batch) < batch_size:
+                return
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            await run(close)
+
+
+def _take(iterator, num: int) -> List:
+    return list(itertools.islice(iterator, num))
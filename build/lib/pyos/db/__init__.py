@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""Database related classes, functions and constants"""
+
+# This relies on each of the submodules having an __all__ variable.
+from .database import *
+from .lib import *
+from .utils import *
+from . import cache
+from . import fs
+from . import queries
+from . import watch
+
+ADDITIONAL = ('cache', 'queries', 'fs', 'watch')
+
+__all__ = database.__all__ + lib.__all__ + utils.__all__ + ADDITIONAL  # pylint: disable=undefined-variable
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""Caches that live for the duration of a database session"""
+import collections
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import mincepy
+
+from pyos import fmt
+from . import fs
+
+__all__ = 'EntriesLru', 'TypeNames'
+
+
+class EntriesLru:
+    """A size-bounded, least-recently-used cache of raw filesystem entries (i.e. without any of the fields copied over
+    from object records) indexed by entry id and absolute path.
+
+    A single instance is held by the database session and is consulted by the read functions in `pyos.db.fs`.  The
+    write functions there (and the session's archive listener) discard any entries they change but writes
+    made by other processes will not be seen.
+    """
+    CacheInfo = collections.namedtuple('CacheInfo', 'hits misses maxsize currsize')
+
+    DEFAULT_MAXSIZE = 4096
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE):
+        self._maxsize = maxsize
+        self._entries = collections.OrderedDict()  # entry id -> entry
+        self._abspaths = {}  # abspath -> entry id
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def cache_info(self) -> 'EntriesLru.CacheInfo':
+        """Get the cache statistics, in the same format as functools.lru_cache"""
+        return EntriesLru.CacheInfo(self._hits, self._misses, self._maxsize, len(self._entries))
+
+    def get(self, entry_id) -> Optional[Dict]:
+        """Get a copy of the cached entry with the given id, returns None on a cache miss"""
+        with self._lock:
+            try:
+                entry = self._entries[entry_id]
+            except KeyError:
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(entry_id)
+            self._hits += 1
+            return dict(entry)
+
+    def peek(self, entry_id) -> Optional[Dict]:
+        """Get a copy of the cached entry with the given id without affecting the recency or statistics"""
+        with self._lock:
+            entry = self._entries.get(entry_id, None)
+            return dict(entry) if entry is not None else None
+
+    def ids(self) -> List:
+        """Get the ids of all the cached entries"""
+        with self._lock:
+            return list(self._entries.keys())
+
+    def find(self, abspath: str) -> Optional[Dict]:
+        """Get a copy of the cached entry at the given absolute path, returns None on a cache miss"""
+        with self._lock:
+            entry = self._entries.get(self._abspaths.get(abspath, None), None)
+            if entry is None or fs.Entry.abspath(entry) != abspath:
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(fs.Entry.id(entry))
+            self._hits += 1
+            return dict(entry)
+
+    def put(self, entry: Dict):
+        """Cache a copy of a raw filesystem entry"""
+        if self._maxsize <= 0:
+            return
+
+        entry_id = fs.Entry.id(entry)
+        with self._lock:
+            self._entries[entry_id] = dict(entry)
+            self._entries.move_to_end(entry_id)
+            abspath = fs.Entry.abspath(entry)
+            if abspath is not None:
+                self._abspaths[abspath] = entry_id
+
+            while len(self._entries) > self._maxsize:
+                _, evicted = self._entries.popitem(last=False)
+                self._abspaths.pop(fs.Entry.abspath(evicted), None)
+
+    def discard(self, *entry_id):
+        """Discard the entries with the given ids"""
+        with self._lock:
+            for eid in entry_id:
+                entry = self._entries.pop(eid, None)
+                if entry is not None:
+                    self._abspaths.pop(fs.Entry.abspath(entry), None)
+
+    def discard_abspath(self, *abspath: str):
+        """Discard the entries at the given absolute paths"""
+        with self._lock:
+            for path in abspath:
+                self._entries.pop(self._abspaths.pop(path, None), None)
+
+    def discard_subtree(self, dir_abspath: str):
+        """Discard the directory at the given absolute path as well as everything below it"""
+        prefix = dir_abspath.rstrip('/') + '/'
+        with self._lock:
+            for abspath in [path for path in self._abspaths if path.startswith(prefix)]:
+                self._entries.pop(self._abspaths.pop(abspath), None)
+        self.discard_abspath(dir_abspath)
+
+    def clear(self):
+        """Clear the cache and reset the statistics"""
+        with self._lock:
+            self._entries.clear()
+            self._abspaths.clear()
+            self._hits = 0
+            self._misses = 0
+
+
+class TypeNames:
+    """A memo table of type id -> pretty type name used when displaying the type of objects.
+
+    Type ids that the historian does not know about are shown as the type id itself.  Types can be registered with the
+    historian at any time so the table is cleared whenever the number of registered types changes.
+    """
+
+    def __init__(self, historian: mincepy.Historian):
+        self._historian = historian
+        self._names = {}
+        self._num_types = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def get(self, type_id) -> str:
+        """Get the pretty name of the type with the given id"""
+        return self.get_many((type_id,))[type_id]
+
+    def get_many(self, type_ids: Iterable) -> Dict:
+        """Get a dictionary of type id -> pretty name for the distinct ids in the passed iterable"""
+        registry = self._historian.type_registry
+        with self._lock:
+            num_types = len(registry.type_helpers)
+            if num_types != self._num_types:
+                self._names.clear()
+                self._num_types = num_types
+
+            names = {}
+            for type_id in set(type_ids):
+                try:
+                    names[type_id] = self._names[type_id]
+                except KeyError:
+                    try:
+                        name = fmt.pretty_type_string(
+                            registry.get_helper_from_type_id(type_id).TYPE)
+                    except TypeError:
+                        # Not known to the historian
+                        name = str(type_id)
+                    self._names[type_id] = names[type_id] = name
+
+            return names
+
+    def clear(self):
+        with self._lock:
+            self._names.clear()
+            self._num_types = None
@@ -0,0 +1,1778 @@
+# -*- coding: utf-8 -*-
+"""
+Low-level filesystem database commands.
+
+The filesystem collection consists of entries corresponding to edges in a tree where the source
+points to the parent directory and the destination points to the file or directory contained within it.
+The edge also stores the name of the entry.
+"""
+# pylint: disable=too-many-lines
+import abc
+import collections
+import collections.abc
+import datetime
+import itertools
+import re
+from typing import Any, Callable, Collection, Dict, List, Iterator, Optional, Tuple, Iterable, Sequence
+
+import mincepy
+import mincepy.mongo.db
+import bson
+import pymongo.errors
+
+from pyos import exceptions
+from . import constants
+from . import database
+
+COLLECTION = 'pyos_fs'
+
+ROOT_ID = 'root'
+ANCESTORS = 'ancestors'
+DESCENDENTS = 'descendents'
+RECORDS = 'records'
+
+# Used temporarily during some aggregation stages
+ENTRY = 'entry'
+
+# The path type used by this low level module
+Path = Tuple[str, ...]
+
+
+class Schema:
+    """
+    Schema for the edges in the filesystem collection
+    """
+    ID = '_id'  # pylint: disable=invalid-name
+    NAME = 'name'
+    PARENT = 'parent'
+    TYPE = 'type'
+    CTIME = 'ctime'  # Creation time of the entry
+    UTIME = 'utime'  # Last update time of the entry (e.g. name change or move)
+    ABSPATH = 'abspath'  # The materialized absolute path of the entry e.g. '/home/martin/car'
+
+    # Optional fields
+    STIME = mincepy.SNAPSHOT_TIME  # Last snapshot time of the object (i.e. last time it was changed)
+    DESCENDENTS = DESCENDENTS
+    DEPTH = 'depth'
+    VER = mincepy.VERSION
+    TYPE_ID = mincepy.TYPE_ID
+    PATH_ENTRIES = 'path_entries'
+    PATH = 'path'
+
+    # Values
+    TYPE_DIR = 'dir'
+    TYPE_OBJ = 'obj'
+
+    @staticmethod
+    def dir_dict(name: str, parent, dir_id=None, abspath: str = None) -> Dict:
+        dtime = datetime.datetime.now()
+        out = {
+            Schema.ID: dir_id or bson.ObjectId(),
+            Schema.NAME: name,
+            Schema.PARENT: parent,
+            Schema.TYPE: 'dir',
+            Schema.CTIME: dtime,
+            Schema.STIME: dtime,
+        }
+        if abspath is not None:
+            out[Schema.ABSPATH] = abspath
+
+        return out
+
+    @staticmethod
+    def obj_dict(obj_id, parent, name=None, abspath: str = None) -> Dict:
+        out = {
+            Schema.ID: obj_id,
+            Schema.NAME: name or str(obj_id),
+            Schema.PARENT: parent,
+            Schema.TYPE: 'obj',
+            Schema.CTIME: datetime.datetime.now(),
+        }
+        if abspath is not None:
+            out[Schema.ABSPATH] = abspath
+
+        return out
+
+
+class Entry:
+
+    def __init__(self):
+        raise RuntimeError('Cannot instantiate')
+
+    @staticmethod
+    def is_dir(entry: Dict):
+        return entry[Schema.TYPE] == Schema.TYPE_DIR
+
+    @staticmethod
+    def is_obj(entry: Dict):
+        return entry[Schema.TYPE] == Schema.TYPE_OBJ
+
+    @staticmethod
+    def name(entry: Dict) -> str:
+        return entry[Schema.NAME]
+
+    @staticmethod
+    def id(entry: Dict):  # pylint: disable=invalid-name
+        return entry[Schema.ID]
+
+    @staticmethod
+    def type(entry: Dict) -> str:
+        return entry[Schema.TYPE]
+
+    @staticmethod
+    def parent(entry: Dict):
+        return entry[Schema.PARENT]
+
+    @staticmethod
+    def set_parent(entry_id, parent_id, historian: mincepy.Historian):
+        coll = get_fs_collection(historian)
+        coll.update_one({Schema.ID: entry_id}, {Schema.PARENT: parent_id})
+        lru = _get_lru(historian)
+        if lru is not None:
+            lru.discard(entry_id)
+
+    @staticmethod
+    def path_entries(entry: Dict) -> Optional[List[Dict]]:
+        return entry.get(Schema.PATH_ENTRIES)
+
+    @staticmethod
+    def abspath(entry: Dict) -> Optional[str]:
+        """Get the materialized absolute path of the entry"""
+        return entry.get(Schema.ABSPATH)
+
+    @staticmethod
+    def path(entry: Dict) -> Optional[Path]:
+        if Schema.PATH in entry:
+            return entry[Schema.PATH]
+
+        if Schema.ABSPATH in entry:
+            return from_abspath(entry[Schema.ABSPATH])
+
+        path_entries = Entry.path_entries(entry)
+        if path_entries is None:
+            return None
+
+        path_parts = _get_path_from_entries(path_entries)
+        return path_parts + (Entry.name(entry),)
+
+    @staticmethod
+    def ctime(entry: Dict) -> datetime.datetime:
+        return entry[Schema.CTIME]
+
+    @staticmethod
+    def stime(entry: Dict) -> datetime.datetime:
+        """Get the snapshot time of the object"""
+        return entry[Schema.STIME]
+
+    @staticmethod
+    def ver(entry: Dict) -> Optional[int]:
+        """Get the version number of the object"""
+        return entry[Schema.VER]
+
+    @staticmethod
+    def type_id(entry: Dict) -> Optional:
+        return entry[Schema.TYPE_ID]
+
+    @staticmethod
+    def depth(entry: Dict) -> Optional[int]:
+        return entry.get(Schema.DEPTH, None)
+
+
+class FsEntry(collections.abc.MutableMapping):
+    """A compact filesystem entry.
+
+    The standard fields are stored in slots rather than a dictionary which greatly reduces the memory needed when
+    walking large trees.  Any other fields (e.g. the path entries) are kept in a dictionary that is only created when
+    needed.  This is a mutable mapping so it can be used anywhere that an entry dictionary is expected, and fields that
+    were not fetched (e.g. because of a projection) are simply missing.
+    """
+    FIELDS = (Schema.ID, Schema.NAME, Schema.PARENT, Schema.TYPE, Schema.CTIME, Schema.UTIME,
+              Schema.ABSPATH, Schema.STIME, Schema.VER, Schema.TYPE_ID, Schema.DEPTH, Schema.PATH)
+    __slots__ = FIELDS + ('_extra',)
+    _FIELDS = frozenset(FIELDS)
+
+    def __init__(self, *args, **kwargs):
+        self._extra = None
+        self.update(*args, **kwargs)
+
+    @classmethod
+    def from_dict(cls, entry: Dict) -> 'FsEntry':
+        """Create an entry from a dictionary (e.g. as returned by the database)"""
+        new = cls.__new__(cls)
+        new._extra = None
+        for key, value in entry.items():
+            if key in cls._FIELDS:
+                setattr(new, key, value)
+            else:
+                if new._extra is None:
+                    new._extra = {}
+                new._extra[key] = value
+        return new
+
+    def __getitem__(self, key):
+        if key in self._FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __setitem__(self, key, value):
+        if key in self._FIELDS:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self._FIELDS:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        else:
+            if self._extra is None:
+                raise KeyError(key)
+            del self._extra[key]
+
+    def __contains__(self, key) -> bool:
+        if key in self._FIELDS:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self):
+        for field in self.FIELDS:
+            if hasattr(self, field):
+                yield field
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({dict(self)!r})'
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def copy(self) -> 'FsEntry':
+        return FsEntry.from_dict(self)
+
+
+ROOT = Schema.dir_dict(name='/', parent=None, dir_id=ROOT_ID, abspath='/')
+ROOT_PATH = ('/',)
+
+# The keys that children can be sorted by and the corresponding entry fields
+SORT_KEYS = {
+    'name': Schema.NAME,
+    'ctime': Schema.CTIME,
+    'mtime': Schema.STIME,
+}
+
+FIELD_MAP = {
+    mincepy.TYPE_ID: Schema.TYPE_ID,
+    mincepy.VERSION: Schema.VER,
+    mincepy.CREATION_TIME: Schema.CTIME,
+    mincepy.SNAPSHOT_TIME: Schema.STIME,
+}
+
+# A set of entry fields to fetch, None meaning all of them
+Fields = Optional[Collection[str]]
+
+
+def _projection(fields: Fields, *required: str) -> Optional[Dict]:
+    """Get the projection to use on the filesystem collection to fetch the given entry fields.  The id, type and any
+    other fields that the caller needs internally are always included."""
+    if fields is None:
+        return None
+    return dict.fromkeys(itertools.chain((Schema.ID, Schema.TYPE), fields, required), 1)
+
+
+def _record_fields(fields: Fields) -> Tuple[str, ...]:
+    """Get the data record fields needed to fill in the given entry fields"""
+    return tuple(mince_field for mince_field, fs_field in FIELD_MAP.items()
+                 if fields is None or fs_field in fields)
+
+
+class FilesystemBuilder:
+
+    def __init__(self, is_root=False, abspath: str = None):
+        self._id = 'root' if is_root else bson.ObjectId()
+        self._abspath = '/' if is_root else abspath
+        self._entries = {}
+
+    def __getitem__(self, name: str) -> 'FilesystemBuilder':
+        try:
+            return self._entries[name]
+        except KeyError:
+            return self.add_dir(name)
+
+    def add_dir(self, name: str):
+        if name in self._entries:
+            raise ValueError(f'Entry with name {name} already exists: {self._entries[name]}')
+
+        subdir = FilesystemBuilder(abspath=self._child_abspath(name))
+        self._entries[name] = subdir
+        return subdir
+
+    def add_obj(self, name: str, obj_id: bson.ObjectId):
+        if name in self._entries:
+            raise ValueError(f'Entry with name {name} already exists: {self._entries[name]}')
+
+        self._entries[name] = obj_id
+        return obj_id
+
+    def create_edge_records(self) -> List[Dict]:
+        return list(self.yield_edges())
+
+    def yield_edges(self) -> Iterator[Dict]:
+        # pylint: disable=protected-access
+        for name, value in self._entries.items():
+            if isinstance(value, FilesystemBuilder):
+                yield Schema.dir_dict(name=name,
+                                      parent=self._id,
+                                      dir_id=value._id,
+                                      abspath=value._abspath)
+                yield from value.yield_edges()
+            else:
+                yield Schema.obj_dict(obj_id=value,
+                                      parent=self._id,
+                                      name=name,
+                                      abspath=self._child_abspath(name))
+
+    def _child_abspath(self, name: str) -> Optional[str]:
+        if self._abspath is None:
+            return None
+
+        return join_abspath(self._abspath, name)
+
+
+class EntriesCache:
+
+    def __init__(self, historian: mincepy.Historian):
+        self._hist = historian or database.get_historian()
+        self._entry_ids = {}
+        self._paths = {}
+        self._path_entries = {}
+
+    @property
+    def historian(self) -> mincepy.Historian:
+        return self._hist
+
+    def get_entry(self, id_or_path) -> Dict:
+        if isinstance(id_or_path, tuple):
+            return self.get_entry_from_path(id_or_path)
+
+        # Assume it's an entry id
+        return self.get_entry_from_id(id_or_path)
+
+    def get_entry_from_path(self, path: Path) -> Dict:
+        if not isinstance(path, tuple):
+            raise TypeError(f'Expected tuple, got {path.__class__.__name__}')
+
+        try:
+            return self._paths[path]
+        except KeyError:
+            entry = find_entry(path, historian=self._hist)
+            if entry is not None:
+                # Cache the entry
+                self._paths[path] = entry
+                self._entry_ids[Entry.id(entry)] = entry
+
+            return entry
+
+    def prefetch(self, paths: Iterable[Path]):
+        """Fetch the entries for many paths using a single query and cache the results.  Paths that do not exist are
+        also cached so that subsequent lookups for them do not hit the database."""
+        to_find = list(set(path for path in paths if path not in self._paths))
+        if not to_find:
+            return
+
+        for path, entry in zip(to_find, find_entries(to_find, historian=self._hist)):  # DB HIT
+            self._paths[path] = entry
+            if entry is not None:
+                self._entry_ids[Entry.id(entry)] = entry
+
+    def prefetch_ids(self, entry_ids: Iterable):
+        """Fetch the entries for many entry ids using a single query and cache the results.  Ids that do not exist are
+        also cached."""
+        to_find = list(set(entry_id for entry_id in entry_ids if entry_id not in self._entry_ids))
+        if not to_find:
+            return
+
+        for entry_id, entry in zip(to_find, get_entries(to_find, historian=self._hist)):  # DB HIT
+            self._entry_ids[entry_id] = entry
+
+    def discard(self, *id_or_path):
+        """Discard any cached information about the given paths or entry ids e.g. because they have just been written
+        to.  This also discards them from the session cache."""
+        lru = _get_lru(self._hist)
+        for entry in id_or_path:
+            if isinstance(entry, tuple):
+                self._paths.pop(entry, None)
+                self._path_entries.pop(entry, None)
+                if lru is not None:
+                    lru.discard_abspath(to_abspath(entry))
+            else:
+                self._entry_ids.pop(entry, None)
+                if lru is not None:
+                    lru.discard(entry)
+
+    def discard_subtree(self, dir_abspath: str):
+        """Discard any cached information about the given directory and everything below it"""
+        prefix = dir_abspath.rstrip('/') + '/'
+
+        def in_subtree(abspath: Optional[str]) -> bool:
+            return abspath is not None and (abspath == dir_abspath or abspath.startswith(prefix))
+
+        for path in [path for path in self._paths if in_subtree(to_abspath(path))]:
+            del self._paths[path]
+        for path in [path for path in self._path_entries if in_subtree(to_abspath(path))]:
+            del self._path_entries[path]
+        for entry_id in [
+                entry_id for entry_id, entry in self._entry_ids.items()
+                if entry is not None and in_subtree(Entry.abspath(entry))
+        ]:
+            del self._entry_ids[entry_id]
+
+        lru = _get_lru(self._hist)
+        if lru is not None:
+            lru.discard_subtree(dir_abspath)
+
+    def get_entry_from_id(self, entry_id) -> Dict:
+        try:
+            return self._entry_ids[entry_id]
+        except KeyError:
+            entry = get_entry(entry_id, historian=self._hist)
+            if entry is not None:
+                # Cache the entry
+                self._entry_ids[Entry.id(entry)] = entry
+
+            return entry
+
+    def get_path_entries(self, path: Path) -> List[Dict]:
+        try:
+            return self._path_entries[path]
+        except KeyError:
+            entries = find_path_entries(path, self._hist)
+            for entry in entries:
+                self._entry_ids[Entry.id(entry)] = entry
+            self._path_entries[path] = entries
+            return entries
+
+
+def get_fs_collection(historian: mincepy.Historian = None):
+    historian = historian or database.get_historian()
+    archive: mincepy.mongo.MongoArchive = historian.archive
+    return archive.database[constants.FILESYSTEM_COLLECTION]
+
+
+def _get_lru(historian: mincepy.Historian = None):
+    """Get the entries cache of the global session if it is using the passed historian"""
+    session = database.get_session()
+    if session is None or (historian is not None and historian is not session.historian):
+        return None
+
+    return session.entries_cache
+
+
+def _find_raw_entries(field: str, values: Sequence, historian: mincepy.Historian = None) -> Dict:
+    """Find the raw filesystem entries (i.e. without any object record fields) where the given field, which must be
+    either the id or the absolute path, takes one of the passed values.  The session cache is consulted first and only
+    the remaining values are looked up in the database using a single query.
+
+    :return: a dictionary mapping the field values to entries for those that were found
+    """
+    lru = _get_lru(historian)
+
+    found = {}
+    to_find = []
+    for value in set(values):
+        entry = None
+        if lru is not None:
+            entry = lru.get(value) if field == Schema.ID else lru.find(value)
+        if entry is None:
+            to_find.append(value)
+        else:
+            found[value] = entry
+
+    if to_find:
+        query = {field: to_find[0]} if len(to_find) == 1 else {field: {'$in': to_find}}
+        for entry in map(FsEntry.from_dict, get_fs_collection(historian).find(query)):  # DB HIT
+            if lru is not None:
+                lru.put(entry)
+            found[entry[field]] = entry
+
+    return found
+
+
+# region query operations
+
+
+def to_abspath(path: Path) -> str:
+    """Get the materialized path string for a filesystem path e.g. ('/', 'a', 'b') -> '/a/b'"""
+    return '/' + '/'.join(path[1:])
+
+
+def from_abspath(abspath: str) -> Path:
+    """Get the filesystem path from a materialized path string e.g. '/a/b' -> ('/', 'a', 'b')"""
+    if abspath == '/':
+        return ROOT_PATH
+
+    return ('/',) + tuple(abspath[1:].split('/'))
+
+
+def join_abspath(dir_abspath: str, name: str) -> str:
+    """Join a materialized directory path and an entry name"""
+    return dir_abspath.rstrip('/') + '/' + name
+
+
+def _subtree_match(dir_abspath: str) -> Dict:
+    """Returns a MongoDB filter matching all the entries below the passed directory.  This is an anchored prefix
+    match and so is able to use the index on the materialized path."""
+    prefix = dir_abspath.rstrip('/') + '/'
+    return {Schema.ABSPATH: {'$regex': f'^{re.escape(prefix)}.'}}
+
+
+def _move_subtree_update(old_abspath: str, new_abspath: str) -> List[Dict]:
+    """Returns an update pipeline that replaces the old prefix of the materialized path of each entry with the new
+    one"""
+    return [{
+        '$set': {
+            Schema.UTIME: datetime.datetime.now(),
+            Schema.ABSPATH: {
+                '$concat': [
+                    new_abspath.rstrip('/'), {
+                        '$substrCP': [
+                            f'${Schema.ABSPATH}',
+                            len(old_abspath.rstrip('/')), {
+                                '$strLenCP': f'${Schema.ABSPATH}'
+                            }
+                        ]
+                    }
+                ]
+            }
+        }
+    }]
+
+
+def _records_lookup(fields: Fields = None) -> List[Dict]:
+    """Look up object data records, keeping only the record fields needed to fill in the given entry fields"""
+    record_fields = {
+        Schema.CTIME: {
+            '$ifNull': [{
+                '$arrayElemAt': [f'$records.{mincepy.mongo.db.CREATION_TIME}', 0]
+            }, f'${Schema.CTIME}']
+        },
+        Schema.STIME: {
+            '$ifNull': [{
+                '$arrayElemAt': [f'$records.{mincepy.mongo.db.SNAPSHOT_TIME}', 0]
+            }, f'${Schema.STIME}']
+        },
+        Schema.VER: {
+            '$arrayElemAt': [f'$records.{mincepy.mongo.db.VERSION}', 0]
+        },
+        Schema.TYPE_ID: {
+            '$arrayElemAt': [f'$records.{mincepy.mongo.db.TYPE_ID}', 0]
+        },
+    }
+    if fields is not None:
+        record_fields = {
+            fs_field: value for fs_field, value in record_fields.items() if fs_field in fields
+        }
+
+    lookup = [
+        # Join any objects with their record in the mincePy data collection
+        {
+            '$lookup': {
+                'from': mincepy.mongo.MongoArchive.DATA_COLLECTION,
+                'localField': f'{Schema.ID}',
+                'foreignField': mincepy.mongo.db.OBJ_ID,
+                'as': RECORDS,
+            }
+        },
+        # Don't keep object entries that have no records, these are spurious and should be cleaned up
+        {
+            '$match': {
+                '$or': [{
+                    Schema.TYPE: Schema.TYPE_DIR
+                }, {
+                    RECORDS: {
+                        '$ne': []
+                    }
+                }]
+            }
+        },
+        # Now keep certain fields that we're interested in (directories keep their own times)
+        {
+            '$addFields': {
+                **record_fields,
+                RECORDS: '$$REMOVE',
+            }
+        },
+    ]
+    if fields is not None:
+        lookup.append({'$project': _projection(fields)})
+
+    return lookup
+
+
+def _entries_lookup(*entry_id) -> List[Dict]:
+    if not entry_id:
+        return []
+    if len(entry_id) == 1:
+        return [{'$match': {Schema.ID: entry_id[0]}}]
+    return [{'$match': {Schema.ID: {'$in': list(entry_id)}}}]
+
+
+def _ancestors_lookup() -> List[Dict]:
+    aggregate = [{
+        '$graphLookup': {
+            'from': COLLECTION,
+            'startWith': f'${Schema.PARENT}',
+            'connectFromField': Schema.PARENT,
+            'connectToField': Schema.ID,
+            'as': ANCESTORS,
+            'depthField': Schema.DEPTH,
+        }
+    }]
+
+    return aggregate
+
+
+# endregion
+
+
+def find_entry(
+    path: Path,
+    *,
+    fields: Fields = None,
+    historian: mincepy.Historian = None,
+) -> Optional[FsEntry]:
+    """Find an entry in the filesystem collection based on the path
+
+    :param fields: the entry fields needed by the caller (the entry may contain more), None means all
+    """
+    validate_path(path)
+    historian = historian or database.get_historian()
+
+    abspath = to_abspath(path)
+    entry = _find_raw_entries(Schema.ABSPATH, (abspath,), historian).get(abspath, None)
+    if entry is None:
+        return None
+
+    return _add_record_fields(entry, historian, fields)
+
+
+def _add_record_fields(entry: FsEntry, historian: mincepy.Historian,
+                       fields: Fields) -> Optional[FsEntry]:
+    """If the entry is an object, copy over the requested fields from its data record.  Returns None if the object
+    has no record."""
+    if not Entry.is_obj(entry):
+        return entry
+
+    try:
+        # pylint: disable=protected-access
+        data_entry = tuple(
+            historian.records.find(obj_id=Entry.id(entry))._project(mincepy.OBJ_ID,
+                                                                    *_record_fields(fields)))[0]
+    except IndexError:
+        return None
+    else:
+        _copy_fields(entry, data_entry)
+
+    return entry
+
+
+def find_entries(
+    paths: Sequence[Path],
+    *,
+    fields: Fields = None,
+    historian: mincepy.Historian = None,
+) -> List[Optional[Dict]]:
+    """Find the entries for many paths using a single query.  The entries are returned in the same order as the paths
+    with None in place of any path that does not exist."""
+    historian = historian or database.get_historian()
+
+    abspaths = []
+    for path in paths:
+        validate_path(path)
+        abspaths.append(to_abspath(path))
+    if not abspaths:
+        return []
+
+    res = _find_raw_entries(Schema.ABSPATH, abspaths, historian).values()
+    found = {Entry.abspath(entry): entry for entry in _join_records(res, historian, fields=fields)}
+
+    return [found.get(abspath, None) for abspath in abspaths]
+
+
+def get_entries(entry_ids: Sequence,
+                *,
+                fields: Fields = None,
+                historian: mincepy.Historian = None) -> List[Optional[Dict]]:
+    """Get the entries for many entry ids using a single query.  The entries are returned in the same order as the
+    ids with None in place of any that do not exist."""
+    if not entry_ids:
+        return []
+
+    historian = historian or database.get_historian()
+    res = _find_raw_entries(Schema.ID, entry_ids, historian).values()
+    found = {Entry.id(entry): entry for entry in _join_records(res, historian, fields=fields)}
+
+    return [found.get(entry_id, None) for entry_id in entry_ids]
+
+
+def get_entry(
+    entry_id,
+    include_path=False,
+    *,
+    fields: Fields = None,
+    historian: mincepy.Historian = None,
+) -> Dict:
+    """Get the entry with the given id
+
+    :param include_path: if True the entries of all the directories along the path will also be fetched
+    :param fields: the entry fields needed by the caller (the entry may contain more), None means all
+    """
+    historian = historian or database.get_historian()
+
+    if include_path:
+        aggregate = [*_entries_lookup(entry_id), *_ancestors_lookup()]
+        res = list(get_fs_collection(historian).aggregate(aggregate, allowDiskUse=True))
+        if not res:
+            return None
+
+        assert len(res) == 1, \
+            f'It should never happen that there is more than one match for a particular path but got: {res}'
+        entry = FsEntry.from_dict(res[0])
+        entry[ANCESTORS].sort(key=lambda ancestor: ancestor[Schema.DEPTH], reverse=True)
+        entry[Schema.PATH_ENTRIES] = entry.pop(ANCESTORS)
+    else:
+        entry = _find_raw_entries(Schema.ID, (entry_id,), historian).get(entry_id, None)
+        if entry is None:
+            return None
+
+    return _add_record_fields(entry, historian, fields)
+
+
+def find_path_entries(path: Path, historian: mincepy.Historian = None) -> List[Dict]:
+    """Find all filesystem the entries along a path"""
+    validate_path(path)
+    entries = _find_existing_path_entries(path, historian=historian)
+    if len(entries) != len(path):
+        raise exceptions.FileNotFoundError(path)
+
+    return entries
+
+
+def _find_existing_path_entries(path: Path, historian: mincepy.Historian = None) -> List[Dict]:
+    """Find the entries along a path stopping at the first part that does not exist.  This is done using a single
+    query on the materialized paths of the path and all of its parents."""
+    abspaths = [to_abspath(path[:idx]) for idx in range(1, len(path) + 1)]
+    found = _find_raw_entries(Schema.ABSPATH, abspaths, historian)
+
+    entries = []
+    for abspath in abspaths:
+        try:
+            entries.append(found[abspath])
+        except KeyError:
+            break
+
+    return entries
+
+
+def get_paths(*obj_id, historian: mincepy.Historian = None) -> Tuple[Path]:
+    """Get the paths of the given entries in the order they were passed in, with None for any that don't exist"""
+    return tuple(iter_paths(obj_id, historian=historian))
+
+
+def iter_paths(entry_ids: Iterable,
+               *,
+               historian: mincepy.Historian = None,
+               batch_size=1024) -> Iterator[Optional[Path]]:
+    """Iterate over the paths of the given entries in the order they were passed in, yielding None for any that don't
+    exist.  The entries are fetched a batch at a time using the materialized path where possible, otherwise the paths
+    of their parent directories are resolved using a table that is shared between batches so that each directory is
+    only ever looked up once.  This way the cost scales with the number of distinct directories rather than the
+    number of entries."""
+    historian = historian or database.get_historian()
+    coll = get_fs_collection(historian)
+    dir_paths = {ROOT_ID: ROOT_PATH}  # Directory id -> path
+
+    entry_ids = iter(entry_ids)
+    while True:
+        batch = _consume_batch(entry_ids, batch_size)
+        if not batch:
+            return
+
+        entries = {
+            Entry.id(entry): entry for entry in coll.find(
+                {Schema.ID: {
+                    '$in': list(set(batch))
+                }},
+                projection={
+                    Schema.NAME: 1,
+                    Schema.PARENT: 1,
+                    Schema.ABSPATH: 1
+                },
+            )
+        }
+        _resolve_dir_paths(
+            (Entry.parent(entry) for entry in entries.values() if Entry.abspath(entry) is None),
+            dir_paths, historian)
+
+        for entry_id in batch:
+            entry = entries.get(entry_id, None)
+            if entry is None:
+                yield None
+            elif Entry.abspath(entry) is not None:
+                yield from_abspath(Entry.abspath(entry))
+            elif entry_id == ROOT_ID:
+                yield ROOT_PATH
+            else:
+                parent_path = dir_paths.get(Entry.parent(entry), None)
+                yield parent_path + (Entry.name(entry),) if parent_path is not None else None
+
+
+def _resolve_dir_paths(dir_ids: Iterable, dir_paths: Dict, historian: mincepy.Historian):
+    """Add the paths of the given directories to the directory id -> path table.  Only directories (and ancestors)
+    that are not already in the table are looked up, one query per level of ancestors, and the path will be None for
+    any that can't be reached from the root."""
+    unresolved = {}  # Directory id -> (parent id, name) for those that need their parent's path
+    to_find = set(dir_id for dir_id in dir_ids if dir_id not in dir_paths)
+    while to_find:
+        querying = list(to_find)
+        found = _find_raw_entries(Schema.ID, querying, historian)
+        to_find = set()
+        for dir_id in querying:
+            entry = found.get(dir_id, None)
+            if entry is None:
+                dir_paths[dir_id] = None
+            elif Entry.abspath(entry) is not None:
+                dir_paths[dir_id] = from_abspath(Entry.abspath(entry))
+            else:
+                parent = Entry.parent(entry)
+                unresolved[dir_id] = (parent, Entry.name(entry))
+                if parent not in dir_paths and parent not in unresolved:
+                    to_find.add(parent)
+
+    def resolve(dir_id) -> Optional[Path]:
+        if dir_id not in dir_paths:
+            dir_paths[dir_id] = None  # Guard against cycles
+            parent, name = unresolved[dir_id]
+            parent_path = resolve(parent)
+            dir_paths[dir_id] = parent_path + (name,) if parent_path is not None else None
+        return dir_paths[dir_id]
+
+    for dir_id in unresolved:
+        resolve(dir_id)
+
+
+def set_obj_path(obj_id,
+                 new_path: Path,
+                 historian: mincepy.Historian = None,
+                 cache: EntriesCache = None):
+    """
+    Set the path for a filesystem entry
+
+    :param parent: the path to save the object at.  path[:-1] will be the absolute path to the directory while
+        path[-1] will be the filename.  Note that the directory must already exist.
+    """
+    cache = cache or EntriesCache(historian)
+    instruction = SetObjPath(obj_id, new_path)
+    ops = instruction.get_ops(cache)
+
+    coll = get_fs_collection(historian=historian)
+    try:
+        coll.bulk_write(ops)
+    except pymongo.errors.BulkWriteError as exc:
+        # Ask the instruction to handle the error
+        instruction.handle_exception(exc.details['writeErrors'][0])
+    else:
+        cache.discard(new_path, obj_id)
+
+
+class Instruction(metaclass=abc.ABCMeta):
+
+    @abc.abstractmethod
+    def get_ops(self, cache: EntriesCache):
+        """Get the bulk operations needed to carry out this instruction"""
+
+    def handle_exception(self, error: Dict):
+        """Raise the appropriate exception for an error that one of our operations caused during a bulk write"""
+        raise exceptions.PyOSError(error)
+
+    def discard_cached(self, cache: EntriesCache):
+        """Called once the operations of this instruction have been carried out so that any cached entries that
+        they changed can be discarded"""
+
+
+class SetObjPath(Instruction):
+    """Change the name or location of an existing filesystem entry"""
+
+    def __init__(self, obj_id, new_path: Path, only_new=False):
+        if obj_id is None:
+            raise ValueError('Must supply entry id')
+
+        self.entry_id = obj_id
+        self.new_path = new_path
+        self.only_new = only_new
+
+    def get_ops(self, cache: EntriesCache) -> List:
+        return SetObjPath._set_path_operations(cache, self.entry_id, self.new_path, self.only_new)
+
+    def discard_cached(self, cache: EntriesCache):
+        cache.discard(self.new_path, self.entry_id)
+
+    @staticmethod
+    def _set_path_operations(
+        cache: EntriesCache,
+        obj_id,
+        new_path: Path,
+        only_new=False,
+    ) -> List:
+        # Find out where they want to put it
+        parent, basename = new_path[:-1], new_path[-1]
+        parent_entry = cache.get_entry_from_path(parent)  # Possible DB HIT
+
+        if parent_entry is None:
+            raise exceptions.FileNotFoundError(parent)
+        if not Entry.is_dir(parent_entry):
+            raise exceptions.NotADirectoryError(parent)
+
+        parent_id = Entry.id(parent_entry)
+        abspath = to_abspath(new_path)
+
+        time_now = datetime.datetime.now()
+        if only_new:
+            # Only set the path if the object isn't already in the filesystem
+            update = {
+                '$setOnInsert': Schema.obj_dict(obj_id, parent_id, name=basename, abspath=abspath)
+            }
+        else:
+            # Set the new path whether or not it exists
+            update = {
+                '$set': {
+                    Schema.PARENT: parent_id,
+                    Schema.NAME: basename,
+                    Schema.ABSPATH: abspath,
+                    Schema.UTIME: time_now,
+                },
+                '$setOnInsert': {
+                    Schema.TYPE: Schema.TYPE_OBJ,
+                    Schema.CTIME: time_now
+                }
+            }
+
+        return [
+            pymongo.UpdateOne({
+                Schema.ID: obj_id,
+                Schema.TYPE: Schema.TYPE_OBJ
+            },
+                              update,
+                              upsert=True)
+        ]
+
+    def handle_exception(self, error: Dict):
+        if error['code'] == 11000:
+            raise exceptions.FileExistsError(self.new_path, path=self.new_path)
+
+        super().handle_exception(error)
+
+
+class Rename(Instruction):
+
+    def __init__(self, src_id, dest_path):
+        self.src_id = src_id
+        self.dest_path = dest_path
+
+    def get_ops(self, cache: EntriesCache):
+        return Rename.rename_operations(cache, self.src_id, self.dest_path)
+
+    def discard_cached(self, cache: EntriesCache):
+        src_entry = cache.get_entry_from_id(self.src_id)
+        if src_entry is not None and Entry.is_dir(src_entry):
+            cache.discard_subtree(Entry.abspath(src_entry))
+        cache.discard(self.dest_path, self.src_id)
+
+    @staticmethod
+    def rename_operations(cache: EntriesCache, src_id, dest_path):
+        dest_dir, dest_name = dest_path[:-1], dest_path[-1]
+
+        parent_entry = cache.get_entry_from_path(dest_dir)  # Possible DB HIT
+        if not Entry.is_dir(parent_entry):
+            raise exceptions.NotADirectoryError(dest_dir)
+
+        src_entry = cache.get_entry_from_id(src_id)  # Possible DB HIT
+        new_abspath = to_abspath(dest_path)
+        ops = [
+            pymongo.UpdateOne({Schema.ID: src_id}, {
+                '$set': {
+                    Schema.PARENT: Entry.id(parent_entry),
+                    Schema.NAME: dest_name,
+                    Schema.ABSPATH: new_abspath,
+                    Schema.UTIME: datetime.datetime.now(),
+                }
+            })
+        ]
+        if src_entry is not None and Entry.is_dir(src_entry):
+            # Move everything below the directory as well
+            old_abspath = Entry.abspath(src_entry)
+            _check_not_moving_into_self(old_abspath, new_abspath)
+            ops.append(
+                pymongo.UpdateMany(_subtree_match(old_abspath),
+                                   _move_subtree_update(old_abspath, new_abspath)))
+
+        return ops
+
+    def handle_exception(self, error: Dict):
+        if error['code'] == 11000:
+            raise exceptions.FileExistsError(self.dest_path, path=self.dest_path)
+
+        super().handle_exception(error)
+
+
+def execute_instructions(instructions: Iterable[Instruction],
+                         historian: mincepy.Historian = None,
+                         *,
+                         ordered=True,
+                         cache: EntriesCache = None):
+    """Carry out the instructions using a single bulk write.  If any of the operations fail, the instructions that
+    issued them are asked to raise the appropriate exception.
+
+    :param ordered: if False the operations may be carried out in any order, and all of them will be attempted even
+        if some fail
+    :param cache: an entries cache to use to look up the entries the instructions need (e.g. one that has been
+        prefetched)
+    """
+    cache = cache or EntriesCache(historian)
+    instructions = list(instructions)
+    ops = []
+    op_instructions = []  # The instruction that issued each op
+    for instruction in instructions:
+        instruction_ops = instruction.get_ops(cache)
+        ops.extend(instruction_ops)
+        op_instructions.extend([instruction] * len(instruction_ops))
+
+    if ops:
+        try:
+            get_fs_collection(historian).bulk_write(ops, ordered=ordered)
+        except pymongo.errors.BulkWriteError as exc:
+            _raise_write_errors(exc, op_instructions)
+        finally:
+            for instruction in instructions:
+                instruction.discard_cached(cache)
+
+
+def _raise_write_errors(bulk_error: pymongo.errors.BulkWriteError,
+                        op_instructions: Sequence[Instruction]):
+    """Raise an exception for the operations that failed in a bulk write by mapping each one back to the instruction
+    that issued it.  If several paths already exist these are all reported in the one FileExistsError."""
+    raised = []
+    for error in bulk_error.details['writeErrors']:
+        try:
+            op_instructions[error['index']].handle_exception(error)
+        except exceptions.PyOSError as exc:
+            raised.append(exc)
+
+    if not raised:
+        raise exceptions.PyOSError(bulk_error.details) from bulk_error
+    if len(raised) > 1 and all(isinstance(exc, exceptions.FileExistsError) for exc in raised):
+        paths = [exc.path for exc in raised]
+        raise exceptions.FileExistsError(*paths, path=paths[0]) from bulk_error
+
+    raise raised[0] from bulk_error
+
+
+def make_dirs(path: Path, exists_ok=False, historian: mincepy.Historian = None):
+    """Make the directory at the given path along with any parent directories that don't exist yet"""
+    make_dirs_many((path,), exists_ok=exists_ok, historian=historian)
+
+
+def make_dirs_many(paths: Iterable[Path],
+                   exists_ok=True,
+                   historian: mincepy.Historian = None) -> int:
+    """Make many directories (along with their parents) in one go.  All the directories along the paths are looked up
+    using a single query and those that are missing are created using a single insert.  If another client creates
+    some of the same directories at the same time, these are re-read and used instead.
+
+    :param paths: the directory paths to create
+    :param exists_ok: if False, a FileExistsError is raised (before anything is created) if any of the paths exist
+    :return: the number of directories created
+    """
+    requested = set()
+    prefixes = set()  # The union of all the paths and their parents
+    for path in paths:
+        validate_path(path)
+        requested.add(path)
+        prefixes.update(path[:idx] for idx in range(1, len(path) + 1))
+
+    coll = get_fs_collection(historian)
+    created = 0
+    while True:
+        existing = _find_raw_entries(Schema.ABSPATH, list(map(to_abspath, prefixes)), historian)
+        if not exists_ok:
+            for path in requested:
+                if to_abspath(path) in existing:
+                    raise exceptions.FileExistsError(path)
+            # Only check the first time around, after that anything we find may have been created by us
+            exists_ok = True
+
+        # Go from the shortest to longest path so parents come before their children
+        dir_ids = {}
+        entries = []
+        for path in sorted(prefixes, key=len):
+            entry = existing.get(to_abspath(path))
+            if entry is None:
+                entry = Schema.dir_dict(name=path[-1],
+                                        parent=dir_ids[path[:-1]],
+                                        abspath=to_abspath(path))
+                entries.append(entry)
+            elif not Entry.is_dir(entry):
+                raise exceptions.NotADirectoryError(path)
+            dir_ids[path] = Entry.id(entry)
+
+        if not entries:
+            return created
+
+        try:
+            # Ordered, so if this fails part way through, everything inserted has its parent
+            res = coll.insert_many(entries, ordered=True)
+        except pymongo.errors.BulkWriteError as exc:
+            errors = exc.details['writeErrors']
+            if any(error['code'] != 11000 for error in errors):
+                raise exceptions.PyOSError(exc.details) from exc
+            # Someone else got there first, so go round again to read what is there now
+            created += exc.details['nInserted']
+        else:
+            return created + len(res.inserted_ids)
+
+
+def rename(
+    src: Path = None,
+    dest: Path = None,
+    src_id=None,
+    historian: mincepy.Historian = None,
+    cache: EntriesCache = None,
+):
+    """Rename a filesystem entry"""
+    cache = cache or EntriesCache(historian)
+
+    if src_id is None:
+        if src is None:
+            raise ValueError('Have to supply source or source id')
+        src_entry = cache.get_entry_from_path(src)
+        if src_entry is None:
+            raise exceptions.FileExistsError(src)
+        src_id = Entry.id(src_entry)
+    else:
+        src_entry = cache.get_entry_from_id(src_id)
+
+    # Find the entry corresponding to the new folder
+    dirpath, basename = dest[:-1], dest[-1]
+
+    new_dir = cache.get_entry_from_path(dirpath)
+    if new_dir is None:
+        raise exceptions.FileNotFoundError(f'File not found: {dirpath}')
+
+    new_abspath = to_abspath(dest)
+    is_dir = src_entry is not None and Entry.is_dir(src_entry)
+    if is_dir:
+        _check_not_moving_into_self(Entry.abspath(src_entry), new_abspath)
+
+    # Update the object to be in the new location
+    coll = get_fs_collection(historian=historian)
+    try:
+        res = coll.update_one({Schema.ID: src_id}, {
+            '$set': {
+                Schema.PARENT: Entry.id(new_dir),
+                Schema.NAME: basename,
+                Schema.ABSPATH: new_abspath,
+                Schema.UTIME: datetime.datetime.now(),
+            }
+        },
+                              upsert=False)
+    except pymongo.errors.DuplicateKeyError:
+        raise exceptions.FileExistsError(dest) from None
+    else:
+        if is_dir:
+            cache.discard_subtree(Entry.abspath(src_entry))
+        cache.discard(dest, src_id)
+        if res.modified_count == 1:
+            if is_dir:
+                # Now move everything below the directory
+                old_abspath = Entry.abspath(src_entry)
+                coll.update_many(_subtree_match(old_abspath),
+                                 _move_subtree_update(old_abspath, new_abspath))
+            return True
+
+        return False
+
+
+def _check_not_moving_into_self(old_abspath: str, new_abspath: str):
+    if new_abspath.startswith(old_abspath.rstrip('/') + '/'):
+        raise exceptions.PyOSError(
+            f"Cannot move '{old_abspath}' to a subdirectory of itself, '{new_abspath}'")
+
+
+RemoveResult = collections.namedtuple('RemoveResult', 'dirs_removed objs_removed')
+
+
+def remove_obj(obj_id, historian: mincepy.Historian = None) -> bool:
+    """Remove a single object entry"""
+    coll = get_fs_collection(historian)
+    res = coll.delete_one({Schema.ID: obj_id, Schema.TYPE: Schema.TYPE_OBJ})
+    _discard_cached(historian, obj_id)
+    if res.deleted_count == 1:
+        return True
+
+    return False
+
+
+def remove_objs(obj_ids: Tuple, historian: mincepy.Historian = None) -> int:
+    """Remove many object entries"""
+    coll = get_fs_collection(historian)
+    res = coll.delete_many({Schema.ID: {'$in': list(obj_ids)}, Schema.TYPE: Schema.TYPE_OBJ})
+    _discard_cached(historian, *obj_ids)
+    return res.deleted_count
+
+
+def remove_dir(entry_id, recursive=False, historian: mincepy.Historian = None) -> RemoveResult:
+    entry = get_entry(entry_id, historian=historian)  # DB HIT
+    if entry is None:
+        raise exceptions.FileNotFoundError(entry_id)
+
+    if Entry.is_obj(entry):
+        raise exceptions.NotADirectoryError(entry_id)
+
+    to_delete = []
+    result = RemoveResult([], [])
+
+    # Check for descendents
+    descendents = tuple(iter_descendents(entry_id, historian=historian))
+    if recursive:
+        for descendent in descendents:
+            descendent_id = Entry.id(descendent)
+            if Entry.is_obj(descendent):
+                result.objs_removed.append(descendent_id)
+            else:
+                result.dirs_removed.append(descendent_id)
+
+            to_delete.append(descendent_id)
+    elif descendents:
+        raise exceptions.PyOSError(f'Directory not empty: {entry_id}')
+
+    # Delete the given directory id last
+    to_delete.append(entry_id)
+    result.dirs_removed.append(entry_id)
+
+    # Delete
+    _delete_entries(*to_delete, historian=historian)  # DB HIT
+
+    return result
+
+
+def delete_tree(entry_id,
+                *,
+                batch_size=1024,
+                progress: Callable[[int], Any] = None,
+                historian: mincepy.Historian = None) -> int:
+    """Delete a directory along with everything below it, including the objects themselves.
+
+    This is done in batches, deepest entries first, so only one batch is ever held in memory.  Everything below the
+    directory is found using the materialized paths and the directory itself is deleted last so if this is interrupted
+    it can simply be called again to carry on where it left off.  The root directory itself is never deleted.
+
+    :param batch_size: the number of entries to delete at a time
+    :param progress: called with the number of entries deleted after each batch
+    :return: the total number of entries deleted
+    """
+    historian = historian or database.get_historian()
+    entry = get_entry(entry_id, fields=(Schema.ABSPATH,), historian=historian)  # DB HIT
+    if entry is None:
+        raise exceptions.FileNotFoundError(entry_id)
+    if Entry.is_obj(entry):
+        raise exceptions.NotADirectoryError(entry_id)
+
+    coll = get_fs_collection(historian)
+    subtree = _subtree_match(Entry.abspath(entry))
+    projection = _projection(())
+    deleted = 0
+    while True:
+        # Children sort after their parents so going in reverse deletes the contents of directories before them
+        batch = list(
+            coll.find(subtree, projection=projection).sort(Schema.ABSPATH,
+                                                           pymongo.DESCENDING).limit(batch_size))
+        if not batch:
+            break
+
+        obj_ids = [Entry.id(child) for child in batch if Entry.is_obj(child)]
+        if obj_ids:
+            with historian.transaction():
+                # Objects may have been deleted already if we are resuming
+                historian.delete(*obj_ids, imperative=False)  # DB HIT
+        _delete_entries(*map(Entry.id, batch), historian=historian)  # DB HIT
+
+        deleted += len(batch)
+        if progress is not None:
+            progress(len(batch))
+
+    if entry_id != ROOT_ID:
+        _delete_entries(entry_id, historian=historian)
+        deleted += 1
+        if progress is not None:
+            progress(1)
+
+    return deleted
+
+
+def _delete_entries(*entry_id, historian: mincepy.Historian = None):
+    """Delete entries from the filesystem collection.  No checks are done, just does a raw delete."""
+    try:
+        return get_fs_collection(historian).delete_many({Schema.ID: {
+            '$in': list(entry_id)
+        }})  # DB HIT
+    finally:
+        _discard_cached(historian, *entry_id)
+
+
+def _discard_cached(historian: Optional[mincepy.Historian], *entry_id):
+    """Discard the given entries from the session cache (if there is one)"""
+    lru = _get_lru(historian)
+    if lru is not None:
+        lru.discard(*entry_id)
+
+
+def insert_obj(obj_id, dest: Path, historian: mincepy.Historian = None, cache: EntriesCache = None):
+    cache = cache or EntriesCache(historian)
+    dirpath, name = dest[:-1], dest[-1]
+    dest_entry = cache.get_entry_from_path(dirpath)
+
+    if dest_entry is None:
+        raise exceptions.FileNotFoundError(f'File not found: {dirpath}')
+
+    coll = get_fs_collection(cache.historian)
+    try:
+        coll.insert_one(
+            Schema.obj_dict(obj_id, Entry.id(dest_entry), name, abspath=to_abspath(dest)))
+    except pymongo.errors.DuplicateKeyError:
+        raise exceptions.FileExistsError(dest) from None
+    else:
+        cache.discard(dest, obj_id)
+
+
+def validate_path(path: Path, absolute=True):
+    forbidden_chars = ('/',)
+    if not path:
+        raise ValueError('Path not supplied')
+
+    if absolute and path[0] != '/':
+        raise ValueError(f"Expected absolute path, must start with '', for {path}")
+
+    for idx, part in enumerate(path[1:]):
+        if not (absolute and idx == 0) and part == '':
+            raise ValueError(f'Path part cannot be empty, got: {path}')
+        if any(char in part for char in forbidden_chars):
+            raise ValueError(f"Path part cannot contain any of '{forbidden_chars}', got: {path}")
+
+
+def iter_children(
+    entry_id,
+    *,
+    type: str = None,  # pylint: disable=redefined-builtin
+    obj_filter: mincepy.Expr = None,
+    obj_type=None,
+    meta_filter=None,
+    historian: mincepy.Historian = None,
+    batch_size=1024,
+    sort: str = None,
+    reverse=False,
+    skip: int = 0,
+    limit: int = None,
+    after: str = None,
+    fields: Fields = None,
+) -> Iterator[FsEntry]:
+    """Given a filesystem directory id iterate over all of its children.  The children are fetched lazily, a batch at
+    a time, so the first ones are available without having to wait for the whole directory to be read.
+
+    :param sort: sort the children by one of SORT_KEYS ('name', 'ctime' or 'mtime').  This is done by the database.
+    :param reverse: sort in descending order
+    :param skip: skip this many children
+    :param limit: yield at most this many children
+    :param after: a cursor for paging through the children when sorting by name.  Only children whose name comes
+        after this one (in the sort order) will be yielded, so passing the name of the last child of one page gives
+        the next.
+    :param fields: the entry fields needed by the caller (the entries may contain more), None means all.  Only these
+        will be fetched from the database.
+    """
+    # pylint: disable=too-many-locals
+    if type is not None and type not in (Schema.TYPE_DIR, Schema.TYPE_OBJ):
+        raise ValueError(f'Invalid type filter: {type}')
+    if sort is not None and sort not in SORT_KEYS:
+        raise ValueError(f'Invalid sort key: {sort}')
+    if after is not None and sort != 'name':
+        raise ValueError('A cursor can only be used when sorting by name')
+
+    historian = historian or database.get_historian()
+    coll = get_fs_collection(historian)
+
+    find_filter = {Schema.PARENT: entry_id}
+    if type is not None:
+        find_filter[Schema.TYPE] = type
+    if after is not None:
+        find_filter[Schema.NAME] = {'$lt' if reverse else '$gt': after}
+
+    # If we are filtering on the records then paging can only be done once the records have been joined
+    filtered = obj_filter is not None or obj_type is not None or bool(meta_filter)
+    if fields is not None and sort is not None:
+        fields = (*fields, SORT_KEYS[sort])
+    if filtered:
+        res = _children_cursor(coll, find_filter, sort, reverse, 0, None, batch_size, fields)
+    else:
+        res = _children_cursor(coll, find_filter, sort, reverse, skip, limit, batch_size, fields)
+    # Sorting on record fields means that these have already been joined by the database
+    join = filtered or sort in (None, 'name')
+
+    def iter_entries():
+        for batch in _iter_batches(res, batch_size):
+            if join:
+                yield from _join_records(batch,
+                                         historian,
+                                         obj_filter=obj_filter,
+                                         obj_type=obj_type,
+                                         meta_filter=meta_filter,
+                                         fields=fields)
+            else:
+                yield from batch
+
+    if filtered:
+        yield from itertools.islice(iter_entries(), skip,
+                                    skip + limit if limit is not None else None)
+    else:
+        yield from iter_entries()
+
+
+def _children_cursor(coll, find_filter: dict, sort: Optional[str], reverse: bool, skip: int,
+                     limit: Optional[int], batch_size: int, fields: Fields):
+    """Get a cursor over the child entries matching the filter, sorted and paged by the database"""
+    direction = pymongo.DESCENDING if reverse else pymongo.ASCENDING
+    if sort in (None, 'name'):
+        res = coll.find(find_filter, projection=_projection(fields), batch_size=batch_size)
+        if sort is not None:
+            res = res.sort(Schema.NAME, direction)
+        res = res.skip(skip)
+        if limit is not None:
+            res = res.limit(limit)
+        return res
+
+    pipeline = [{'$match': find_filter}, *_records_lookup(fields)]
+    pipeline.append({'$sort': {SORT_KEYS[sort]: direction, Schema.NAME: direction}})
+    if skip:
+        pipeline.append({'$skip': skip})
+    if limit is not None:
+        pipeline.append({'$limit': limit})
+    return coll.aggregate(pipeline, allowDiskUse=True, batchSize=batch_size)
+
+
+def find_children(
+        parent_ids: Iterable,
+        *,
+        name: str = None,
+        name_regex: str = None,
+        type: str = None,  # pylint: disable=redefined-builtin
+        fields: Fields = None,
+        historian: mincepy.Historian = None,
+        batch_size=1024) -> Iterator[FsEntry]:
+    """Find the children of many directories at once using a single query (or one per batch of directories if there
+    are many).  No particular order is guaranteed.
+
+    :param parent_ids: the ids of the directories
+    :param name: only find children with this name, this uses the (parent, name) index
+    :param name_regex: only find children whose name matches this regular expression, which is evaluated by the
+        database
+    :param type: only find children of this type
+    :param fields: the entry fields needed by the caller, the name and parent are always included
+    """
+    if type is not None and type not in (Schema.TYPE_DIR, Schema.TYPE_OBJ):
+        raise ValueError(f'Invalid type filter: {type}')
+    if name is not None and name_regex is not None:
+        raise ValueError('Only one of name and name_regex can be used')
+
+    historian = historian or database.get_historian()
+    coll = get_fs_collection(historian)
+
+    find_filter = {}
+    if type is not None:
+        find_filter[Schema.TYPE] = type
+    if name is not None:
+        find_filter[Schema.NAME] = name
+    elif name_regex is not None:
+        find_filter[Schema.NAME] = {'$regex': name_regex}
+    if fields is not None:
+        fields = (*fields, Schema.NAME, Schema.PARENT)
+
+    parent_ids = list(dict.fromkeys(parent_ids))
+    for idx in range(0, len(parent_ids), batch_size):
+        find_filter[Schema.PARENT] = {'$in': parent_ids[idx:idx + batch_size]}
+        res = coll.find(find_filter, projection=_projection(fields), batch_size=batch_size)
+        for batch in _iter_batches(res, batch_size):
+            yield from _join_records(batch, historian, fields=fields)
+
+
+def iter_descendents(
+        entry_id,
+        *,
+        type: str = None,  # pylint: disable=redefined-builtin
+        obj_filter: mincepy.Expr = None,
+        obj_type=None,
+        meta_filter=None,
+        max_depth=None,
+        depth=0,
+        path: Path = (),
+        historian: mincepy.Historian = None,
+        batch_size=1024,
+        obj_ids: Sequence = None,
+        fields: Fields = None) -> Iterator[FsEntry]:
+    """Iterate over all the descendents of the given directory.  Each yielded entry has its depth (relative to the
+    directory, offset by `depth`) and path (`path` followed by the names below the directory) set.
+
+    If there is no maximum depth the whole subtree is found using a single query on the materialized paths, otherwise
+    the tree is walked breadth first using one query per level for all the directories at that level.
+
+    If obj_ids is supplied only objects with these ids will be considered.  In this case the entries for the objects
+    are looked up directly (and checked to be within the directory) which is much faster than walking the tree if
+    there are relatively few of them.
+
+    If fields is supplied only these entry fields (along with those needed to walk the tree) are fetched.
+    """
+    if type is not None and type not in (Schema.TYPE_DIR, Schema.TYPE_OBJ):
+        raise ValueError(f'Invalid type filter: {type}')
+
+    if max_depth is not None and depth >= max_depth:
+        return
+
+    historian = historian or database.get_historian()
+    filters = {
+        'type': type,
+        'obj_filter': obj_filter,
+        'obj_type': obj_type,
+        'meta_filter': meta_filter,
+        'fields': fields,
+    }
+
+    if obj_ids is not None:
+        if type != Schema.TYPE_DIR:
+            start = get_entry(entry_id, fields=(Schema.ABSPATH,), historian=historian)
+            if start is not None:
+                yield from _iter_objects_in(Entry.abspath(start), list(obj_ids), depth, path,
+                                            max_depth, historian, batch_size, **filters)
+    elif max_depth is None:
+        start = get_entry(entry_id, fields=(Schema.ABSPATH,), historian=historian)
+        if start is not None:
+            yield from _iter_subtree(Entry.abspath(start), depth, path, historian, batch_size,
+                                     **filters)
+    else:
+        yield from _iter_levels(entry_id, depth, path, max_depth, historian, batch_size, **filters)
+
+
+def count_descendents(entry_id, *, limit: int = None, historian: mincepy.Historian = None) -> int:
+    """Count the number of entries below the given directory, stopping at the limit if one is given.  This is cheap
+    as it is answered from the materialized path index (or from the collection metadata in the case of the root)."""
+    historian = historian or database.get_historian()
+    coll = get_fs_collection(historian)
+    if entry_id == ROOT_ID:
+        return max(coll.estimated_document_count() - 1, 0)
+
+    entry = get_entry(entry_id, fields=(Schema.ABSPATH,), historian=historian)
+    if entry is None:
+        return 0
+
+    kwargs = {'limit': limit} if limit is not None else {}
+    return coll.count_documents(_subtree_match(Entry.abspath(entry)), **kwargs)
+
+
+def _iter_subtree(dir_abspath: str, depth: int, path: Path, historian: mincepy.Historian,
+                  batch_size: int, **filters) -> Iterator[Dict]:
+    """Iterate over everything below the given directory using a single query on the materialized paths"""
+    find_filter = _subtree_match(dir_abspath)
+    if filters['type'] == Schema.TYPE_DIR:
+        find_filter[Schema.TYPE] = Schema.TYPE_DIR
+
+    prefix_len = len(dir_abspath.rstrip('/')) + 1
+
+    def locate(entry: Dict) -> Tuple[int, Path]:
+        relpath = tuple(Entry.abspath(entry)[prefix_len:].split('/'))
+        return depth + len(relpath), path + relpath
+
+    # Sorting by the materialized path guarantees that directories come before their contents
+    projection = _projection(filters['fields'], Schema.ABSPATH)
+    res = get_fs_collection(historian).find(find_filter,
+                                            projection=projection,
+                                            batch_size=batch_size).sort(
+                                                Schema.ABSPATH, pymongo.ASCENDING)
+    for batch in _iter_batches(res, batch_size):
+        yield from _iter_located(batch, locate, historian, **filters)
+
+
+def _iter_objects_in(dir_abspath: str, obj_ids: List, depth: int, path: Path,
+                     max_depth: Optional[int], historian: mincepy.Historian, batch_size: int,
+                     **filters) -> Iterator[Dict]:
+    """Iterate over those objects with the given ids that are below the given directory, down to the maximum depth"""
+    coll = get_fs_collection(historian)
+    prefix_len = len(dir_abspath.rstrip('/')) + 1
+
+    def locate(entry: Dict) -> Tuple[int, Path]:
+        relpath = tuple(Entry.abspath(entry)[prefix_len:].split('/'))
+        return depth + len(relpath), path + relpath
+
+    for idx in range(0, len(obj_ids), batch_size):
+        find_filter = _subtree_match(dir_abspath)
+        find_filter[Schema.ID] = {'$in': obj_ids[idx:idx + batch_size]}
+        find_filter[Schema.TYPE] = Schema.TYPE_OBJ
+        res = coll.find(find_filter, projection=_projection(filters['fields'], Schema.ABSPATH))
+        batch = list(map(FsEntry.from_dict, res.sort(Schema.ABSPATH, pymongo.ASCENDING)))
+        if max_depth is not None:
+            batch = [entry for entry in batch if locate(entry)[0] <= max_depth]
+        yield from _iter_located(batch, locate, historian, **filters)
+
+
+def _iter_levels(dir_id, depth: int, path: Path, max_depth: int, historian: mincepy.Historian,
+                 batch_size: int, **filters) -> Iterator[Dict]:
+    """Iterate breadth first over everything below the given directory using one query per level (or per batch of
+    directories for levels with many)"""
+    coll = get_fs_collection(historian)
+    projection = _projection(filters['fields'], Schema.PARENT, Schema.NAME)
+    dir_paths = {dir_id: path}  # The directories at the current level and their paths
+
+    def locate(entry: Dict) -> Tuple[int, Path]:
+        return depth, dir_paths[Entry.parent(entry)] + (Entry.name(entry),)
+
+    while dir_paths and depth < max_depth:
+        depth += 1
+        find_filter = {}
+        if filters['type'] == Schema.TYPE_DIR or (filters['type'] is not None and
+                                                  depth == max_depth):
+            # We don't need any other type of entry to continue the walk
+            find_filter[Schema.TYPE] = filters['type']
+
+        next_dir_paths = {}
+        dir_ids = list(dir_paths.keys())
+        for idx in range(0, len(dir_ids), batch_size):
+            find_filter[Schema.PARENT] = {'$in': dir_ids[idx:idx + batch_size]}
+            res = coll.find(find_filter, projection=projection, batch_size=batch_size)
+            for batch in _iter_batches(res, batch_size):
+                for entry in batch:
+                    if Entry.is_dir(entry):
+                        next_dir_paths[Entry.id(entry)] = locate(entry)[1]
+                yield from _iter_located(batch, locate, historian, **filters)
+
+        dir_paths = next_dir_paths
+
+
+def _iter_located(
+        entries: List[Dict],
+        locate: Callable[[Dict], Tuple[int, Path]],
+        historian: mincepy.Historian,
+        *,
+        type: str = None,  # pylint: disable=redefined-builtin
+        obj_filter: mincepy.Expr = None,
+        obj_type=None,
+        meta_filter=None,
+        fields: Fields = None) -> Iterator[Dict]:
+    """Join the passed entries with their records and yield those that match the filters after setting their depth
+    and path using the passed locate function"""
+    for entry in _join_records(entries,
+                               historian,
+                               obj_filter=obj_filter,
+                               obj_type=obj_type,
+                               meta_filter=meta_filter,
+                               fields=fields):
+        if type is None or Entry.type(entry) == type:
+            entry[Schema.DEPTH], entry[Schema.PATH] = locate(entry)
+            yield entry
+
+
+def _join_records(entries: Iterable[Dict],
+                  historian: mincepy.Historian,
+                  obj_filter: mincepy.Expr = None,
+                  obj_type=None,
+                  meta_filter=None,
+                  fields: Fields = None) -> List[Dict]:
+    """Join the passed filesystem entries with the corresponding data records using a single query.  Directories are
+    always kept while object entries are only kept if they have a record that matches the passed filters, in which
+    case additional fields (those of the passed fields that come from the record) are copied over."""
+    found = []
+    objects = {}
+    for entry in entries:
+        # Only need to check objects, directories are always returned directly
+        if Entry.is_obj(entry):
+            objects[Entry.id(entry)] = entry
+        else:
+            found.append(entry)
+
+    if objects:
+        # Now check that the objects still exist and extract some additional info
+        # pylint: disable=protected-access
+
+        # Create the filter to be used for finding records
+        data_filter = mincepy.DataRecord.obj_id.in_(*objects.keys())
+        if obj_filter:
+            data_filter &= obj_filter
+
+        record_find = historian.records.find(data_filter, obj_type=obj_type, meta=meta_filter)
+        records = {
+            entry[mincepy.OBJ_ID]: entry
+            for entry in record_find._project(mincepy.OBJ_ID, *_record_fields(fields))
+        }
+
+        for obj_id, entry in objects.items():
+            try:
+                data_entry = records[obj_id]
+            except KeyError:
+                # Pass this one, doesn't match the filter
+                pass
+            else:
+                # Copy over the additional fields we want
+                _copy_fields(entry, data_entry)
+                found.append(entry)
+
+    return found
+
+
+def _copy_fields(fs_entry: Dict, mincepy_entry: Dict):
+    """Copy over fields from mincepy data records to our filesystem entry dictionary format"""
+    for mince_field, fs_field in FIELD_MAP.items():
+        if mince_field in mincepy_entry:
+            fs_entry[fs_field] = mincepy_entry[mince_field]
+
+
+def _consume_batch(cursor, batch_size: int) -> List:
+    return [entry for _, entry in zip(range(batch_size), cursor)]
+
+
+def _iter_batches(cursor, batch_size: int) -> Iterator[List[FsEntry]]:
+    """Consume the cursor of filesystem entries in batches of the given size.  The cursor is closed when we finish,
+    including if we are closed before the end (e.g. because the caller stopped early) so that it doesn't linger on
+    the server."""
+    try:
+        entries = map(FsEntry.from_dict, cursor)
+        while True:
+            batch = _consume_batch(entries, batch_size)
+            if batch:
+                yield batch
+            if len(batch) < batch_size:
+                return
+    finally:
+        cursor.close()
+
+
+def _get_path_from_entries(path_entries: List[Dict]) -> Path:
+    return tuple(Entry.name(entry) for entry in path_entries)
@@ -0,0 +1,476 @@
+# -*- coding: utf-8 -*-
+import collections
+import itertools
+import queue
+import threading
+from typing import Sequence, Iterable, Optional, Tuple, Any, Union, Iterator
+
+import deprecation
+import mincepy
+from tqdm import tqdm
+
+from pyos import exceptions
+from pyos import os
+from pyos import version
+from . import database
+from . import fs
+
+__all__ = ('get_meta', 'update_meta', 'set_meta', 'find_meta', 'save_one', 'save_many',
+           'get_abspath', 'load', 'load_many', 'to_obj_id', 'get_obj_id', 'get_path', 'get_paths',
+           'rename', 'homedir', 'get_oid', 'get_obj_id_from_path', 'set_path', 'set_paths')
+
+# region metadata
+
+
+def get_meta(obj_id: Union[Any, Iterable[Any]]):
+    """Get the metadata for a bunch of objects"""
+    hist = database.get_historian()
+    return hist.archive.meta_get(obj_id)
+
+
+def update_meta(*obj_or_identifier, meta: dict):
+    """Update the metadata for a bunch of objects"""
+    hist = database.get_historian()
+    for obj_id in obj_or_identifier:
+        hist.meta.update(obj_id, meta)
+
+
+def set_meta(*obj_or_identifier, meta: dict):
+    """Set the metadata for a bunch of objects"""
+    hist = database.get_historian()
+    obj_ids = tuple(map(to_obj_id, obj_or_identifier))
+
+    # Preserve the internal keys
+    for obj_id in obj_ids:
+        hist.meta.set(obj_id, meta)
+
+
+def find_meta(filter: dict = None, obj_ids=None):  # pylint: disable=redefined-builtin
+    filter = filter or {}
+    hist = database.get_historian()
+    return hist.meta.find(filter, obj_ids)
+
+
+# endregion
+
+# region paths
+
+PathInfo = collections.namedtuple('PathInfo', 'obj_id path')
+
+
+def get_path(obj_or_id) -> Optional[str]:
+    """Given an object or object id get the current path"""
+    return get_paths(obj_or_id)[0].path
+
+
+def get_paths(*obj_or_id, historian: mincepy.Historian = None) -> Sequence[PathInfo]:
+    """Given objects or identifier this will return their current paths as PathInfo tuples in the order that they were
+    passed in.  A PathInfo consists of the object id and the corresponding path.
+
+    This choice of return value makes it easy to construct dictionaries, e.g.:
+    >>> obj_paths = dict(get_path('obj123', 'obj456'))
+    where object ids have been passed in as strings.  It is important to note, that when constructing such a dictionary
+    duplicate values will be joined.  Whether this is desired will depend on the use case.
+    """
+    hist = historian or database.get_historian()
+    obj_ids = tuple(map(hist.to_obj_id, obj_or_id))
+
+    paths = []
+    for obj_id, path in zip(obj_ids, fs.get_paths(*obj_ids, historian=historian)):
+        paths.append(PathInfo(obj_id, os.withdb.from_fs_path(path)))
+
+    return paths
+
+
+def set_path(obj_id, path: os.PathSpec) -> str:
+    """Given an object or object id set the current path and return the new abspath"""
+    return set_paths((obj_id, path))[0].path
+
+
+def set_paths(*obj_id_path: Tuple[Any, os.PathSpec],
+              historian: mincepy.Historian = None) -> Sequence[PathInfo]:
+    """Set the path for one or more objects.  This function expects (object or identifier, path) tuples and returns
+    the corresponding PathInfo objects with absolute paths in the same order as the arguments"""
+    hist = historian or database.get_historian()
+    paths = []
+
+    for obj_or_id, path in obj_id_path:
+        obj_id = hist.to_obj_id(obj_or_id)
+
+        fs.set_obj_path(obj_id, os.withdb.to_fs_path(path), historian=historian)
+
+        paths.append(PathInfo(obj_id, os.path.abspath(path)))
+
+    return paths
+
+
+def rename(obj_or_id, dest: os.PathSpec):
+    """Rename an object to the dest.  If dest is a directory IsADirectoryError is raised."""
+    dest = os.fspath(dest)
+    if dest.endswith(os.sep):
+        raise exceptions.IsADirectoryError(dest)
+
+    hist = database.get_historian()
+    obj_id = hist.to_obj_id(obj_or_id)
+
+    fs.rename(src_id=obj_id, dest=os.withdb.to_fs_path(dest), historian=hist)  # DB HIT
+
+
+def get_abspath(obj_id, _meta: dict) -> str:
+    """Given an object id this method will return a string representing
+    the absolute path of the object"""
+    assert obj_id, 'Must provide a valid obj id'
+    return os.sep.join(fs.get_paths(obj_id)[0])
+
+
+def homedir(user: str = '') -> str:
+    """Return the user's home directory"""
+    if not user:
+        user_info = database.get_historian().get_user_info()
+        user_name = user_info[mincepy.ExtraKeys.USER]
+    else:
+        user_name = user
+    return f'/{user_name}'
+
+
+# endregion
+
+
+def save_one(obj,
+             path: os.PathSpec = None,
+             overwrite=False,
+             meta=None,
+             historian: mincepy.Historian = None):
+    """Save one object at the given path.  The path can be a filename or a directory or a filename
+    in a directory
+
+    :param obj: the object to save
+    :param path: the optional path to save it to
+    :param overwrite: overwrite if there is already an object at that path
+    :param meta: an optional dictionary of metadata to store with the object
+    :param historian: the historian to use for saving
+    """
+    hist = historian or database.get_historian()
+    obj_id = save_many(((obj, path),), overwrite=overwrite, show_progress=False, historian=hist)[0]
+    if meta:
+        hist.meta.set(obj_id, meta)
+
+    return obj_id
+
+
+def save_many(to_save: Iterable[Union[Any, Tuple[Any, os.PathSpec]]],
+              overwrite=False,
+              show_progress=True,
+              historian: mincepy.Historian = None,
+              chunk_size: int = None,
+              background=False):
+    """
+    Save many objects, expects an iterable where each entry is an object to save or a tuple of
+    length 2 containing the object and a path of where to save it.
+
+    :param to_save: the iterable able objects to save
+    :param overwrite: overwrite objects with the same name
+    :param historian: the historian to use
+    :param chunk_size: if given, the objects are saved in chunks of this size, each in its own
+        transaction, so that only one chunk of objects is pending at any time.  This allows
+        `to_save` to be a generator of more objects than would fit in memory.  Note that if
+        saving fails, the chunks that were already committed stay saved.
+    :param background: when saving in chunks, take the next chunk from `to_save` on a background
+        thread while the current one is being saved.  This helps when producing the objects (e.g.
+        generating or reading them from files) is itself expensive.  As the historian is not
+        thread safe, `to_save` must not use it.
+    """
+    historian = historian or database.get_historian()
+
+    progress_opts = dict(desc='Saving', disable=not show_progress)
+    try:
+        progress_opts['total'] = len(to_save)
+    except TypeError:
+        pass
+    progress_bar = tqdm(**progress_opts)
+
+    if chunk_size is None:
+        return _save_chunk(to_save, overwrite, historian, progress_bar)
+
+    if chunk_size < 1:
+        raise ValueError(f'Invalid chunk size: {chunk_size}')
+
+    chunks = _iter_chunks(to_save, chunk_size)
+    if background:
+        chunks = _iter_prefetched(chunks, 'pyos-save-many')
+
+    obj_ids = []
+    for chunk in chunks:
+        obj_ids.extend(_save_chunk(chunk, overwrite, historian))
+        progress_bar.update(len(chunk))
+
+    return obj_ids
+
+
+def _save_chunk(to_save: Iterable[Union[Any, Tuple[Any, os.PathSpec]]],
+                overwrite: bool,
+                historian: mincepy.Historian,
+                progress_bar: tqdm = None) -> list:
+    """Save the objects in a single transaction and return their ids"""
+    obj_ids = []
+    with historian.transaction():
+        to_place = []  # (obj id, path) tuples of objects that need to be put in the filesystem
+        for entry in to_save:
+            obj, path = _parse_save_entry(entry)
+
+            # Set the object to be saved at the end of the transaction
+            obj_id = historian.save_one(obj)
+            if path is not None:
+                to_place.append((obj_id, path))
+
+            obj_ids.append(obj_id)
+            if progress_bar is not None:
+                progress_bar.update(1)
+
+        if to_place:
+            _place_objects(to_place, overwrite, historian)
+
+    return obj_ids
+
+
+def _parse_save_entry(entry) -> Tuple[Any, Optional[os.PathSpec]]:
+    if isinstance(entry, tuple):
+        if len(entry) > 2:
+            raise ValueError('Can only pass sequences of at most length 2')
+        return entry[0], entry[1]
+
+    # Assume it's just the object
+    return entry, None
+
+
+def _iter_chunks(iterable: Iterable, chunk_size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _iter_prefetched(chunks: Iterator[list], name: str) -> Iterator[list]:
+    """Consume the chunks on a background thread staying (at most) one chunk ahead of the caller"""
+    chunk_queue = queue.Queue(maxsize=1)
+    stop = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                chunk_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for chunk in chunks:
+                if not put(chunk):
+                    return
+        except Exception as exc:  # pylint: disable=broad-except
+            put(exc)
+        else:
+            put(done)
+
+    producer = threading.Thread(target=produce, name=name, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = chunk_queue.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Let the producer know to stop if we're finishing early
+        stop.set()
+        producer.join()
+
+
+def _place_objects(to_place: Sequence[Tuple[Any, os.PathSpec]], overwrite: bool,
+                   historian: mincepy.Historian):
+    """Put objects at the given paths in the filesystem.  All the information needed is fetched up front, any
+    objects being overwritten are deleted together and the filesystem is then updated using a single bulk write."""
+    cache = fs.EntriesCache(historian)
+    to_place = [(obj_id, path, os.withdb.to_fs_path(path)) for obj_id, path in to_place]
+
+    # Get information about all the sources and destinations in bulk
+    cache.prefetch_ids(obj_id for obj_id, _path, _save_path in to_place)  # DB HIT
+    cache.prefetch(save_path for _obj_id, _path, save_path in to_place)  # DB HIT
+
+    instructions = []
+    destinations = {}  # The final filesystem path -> (object id, path as passed in)
+    for obj_id, path, save_path in to_place:
+        save_path, instruction = _get_place_instruction(obj_id, path, save_path, cache)
+        if save_path in destinations:
+            raise exceptions.FileExistsError(path, path=path)
+        destinations[save_path] = obj_id, path
+        instructions.append(instruction)
+
+    # Now find anything that is already at the final destinations and the directories they go in
+    cache.prefetch(itertools.chain(destinations.keys(),
+                                   (dest[:-1] for dest in destinations)))  # DB HIT
+    placing = set(obj_id for obj_id, _path in destinations.values())
+    conflicting = {}  # Entry id -> path
+    ordered = False
+    for save_path, (obj_id, path) in destinations.items():
+        existing = cache.get_entry_from_path(save_path)
+        if existing is None or fs.Entry.id(existing) == obj_id:
+            continue
+
+        existing_id = fs.Entry.id(existing)
+        if existing_id in placing:
+            # This one is itself being moved so the operations have to be carried out in order
+            ordered = True
+        elif not overwrite or fs.Entry.is_dir(existing):
+            raise exceptions.FileExistsError(path, existing_entry_id=existing_id, path=path)
+        else:
+            conflicting[existing_id] = save_path
+
+    if conflicting:
+        historian.delete(*conflicting.keys())
+        fs.remove_objs(tuple(conflicting.keys()), historian=historian)  # DB HIT
+        cache.discard(*conflicting.keys(), *conflicting.values())
+
+    fs.execute_instructions(instructions, historian, ordered=ordered, cache=cache)  # DB HIT
+
+
+def _get_place_instruction(obj_id, path: os.PathSpec, save_path: fs.Path,
+                           cache: fs.EntriesCache) -> Tuple[fs.Path, fs.Instruction]:
+    """Get the final path of the object and the instruction that will put it there given the path to save it at,
+    which may be a directory"""
+    # Get information about the source
+    source_entry = cache.get_entry_from_id(obj_id)
+    if source_entry is not None and fs.Entry.is_dir(source_entry):
+        raise exceptions.IsADirectoryError(path)
+
+    # Get information about the destination
+    dest_entry = cache.get_entry_from_path(save_path)
+    if dest_entry is not None and fs.Entry.is_dir(dest_entry):
+        if source_entry is None:
+            save_path = save_path + (str(obj_id),)
+        else:
+            save_path = save_path + (fs.Entry.name(source_entry),)
+
+    if source_entry is None:
+        return save_path, fs.SetObjPath(obj_id, save_path)
+
+    return save_path, fs.Rename(obj_id, save_path)
+
+
+def load(*identifier):
+    """Load one or more objects"""
+    return database.get_historian().load(*identifier)
+
+
+def load_many(obj_ids: Iterable,
+              batch_size=1024,
+              background=False,
+              historian: mincepy.Historian = None) -> Iterator[Union[Any, Exception]]:
+    """Load many objects, yielding them in the same order as the passed ids.  The records are
+    fetched using one query per batch of ids.  If an object can't be loaded the exception is yielded
+    in its place so that the rest can still be loaded.
+
+    :param obj_ids: the ids of the objects to load
+    :param batch_size: the number of records to get with each query
+    :param background: fetch the next batch of records on a background thread while the current
+        one is being loaded.  The objects themselves are always loaded on the calling thread as the
+        historian is not thread safe.
+    :param historian: the historian to use
+    """
+    historian = historian or database.get_historian()
+
+    def fetch(obj_ids: list) -> Tuple[list, dict]:
+        records = historian.records.find(obj_id=obj_ids)  # DB HIT
+        return obj_ids, {record.obj_id: record for record in records}
+
+    batches = map(fetch, _iter_chunks(obj_ids, batch_size))
+    if background:
+        batches = _iter_prefetched(batches, 'pyos-load-many')
+
+    for batch_ids, records in batches:
+        for obj_id in batch_ids:
+            try:
+                try:
+                    record = records[obj_id]
+                except KeyError:
+                    raise mincepy.NotFound(obj_id) from None
+                yield record.load()
+            except Exception as exc:  # pylint: disable=broad-except
+                yield exc
+
+
+def to_obj_id(identifier):
+    """Get the database object id from the passed identifier.  If the identifier is already a
+    mincePy object id it will be returned unaltered.  Otherwise, mincePy will try and turn the type
+    into an object id.  If it fails, None is returned"""
+    return database.get_historian().to_obj_id(identifier)
+
+
+@deprecation.deprecated(deprecated_in='0.7.10',
+                        removed_in='0.8.0',
+                        current_version=version.__version__,
+                        details='Use next(get_obj_id_from_path()) instead')
+def get_obj_id(path: os.PathSpec):
+    """Given a path get the id of the corresponding object.  Returns None if not found."""
+    return next(get_obj_id_from_path(path))
+
+
+def get_obj_id_from_path(*path: os.PathSpec) -> Iterator:
+    """Given a path yield the id of the corresponding object.  Yields None if not found."""
+    for entry in path:
+        entry = os.fspath(entry)
+
+        # Check if the basename is an object id
+        basename = os.path.basename(entry)
+        if basename:
+            hist = database.get_historian()
+            try:
+                yield hist.archive.construct_archive_id(basename)
+                continue
+            except ValueError:
+                pass
+
+        entry = fs.find_entry(os.withdb.to_fs_path(entry), fields=())
+        if entry is None:
+            yield None
+        else:
+            yield fs.Entry.id(entry)
+
+
+def get_oid(*identifier) -> Iterator:
+    """Get one or more object ids.
+
+    :param identifier: can be any of the following:
+        * an object id
+        * an object instance
+        * a string representing a valid object id
+        * the path to an object
+        these will be tested in order in an attempt to get the object id.  If all fail then None
+        will be yielded.
+    """
+    hist = database.get_historian()
+
+    for ident in identifier:
+        obj_id = None
+
+        if ident is not None:
+            # Let the historian try to interpret it, no db access
+            obj_id = hist.to_obj_id(ident)
+
+            if obj_id is None:
+                # Maybe it is a path
+                try:
+                    path = os.fspath(ident)
+                except TypeError:
+                    pass
+                else:
+                    obj_id = next(get_obj_id_from_path(path))  # pylint: disable=stop-iteration-return
+
+        yield obj_id
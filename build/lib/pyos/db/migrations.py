@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+import mincepy
+import mincepy.mongo
+import pymongo
+
+from pyos import config
+from . import constants
+
+
+def initial(historian: mincepy.Historian):
+    """
+    Version 0.
+
+    Initial migration.  Make sure meta indices are there."""
+
+    # Make sure the indexes are there
+    historian.meta.create_index([
+        (config.NAME_KEY, mincepy.ASCENDING),
+        (config.DIR_KEY, mincepy.ASCENDING),
+    ],
+                                unique=True,
+                                where_exist=True)
+    historian.meta.create_index(config.NAME_KEY, unique=False, where_exist=True)
+    historian.meta.create_index(config.DIR_KEY, unique=False, where_exist=True)
+
+
+def add_pyos_collections(historian: mincepy.Historian):
+    """
+    Version 1.
+
+    Migrates from using metadata to store filesystem information to a dedicated MongoDB collection
+    """
+    from . import fs
+
+    archive: mincepy.mongo.MongoArchive = historian.archive
+    db = archive.database  # pylint: disable=invalid-name
+
+    schema_version = getattr(archive, 'schema_version', 0)
+
+    if schema_version >= 2:
+        meta_entries = archive.data_collection.aggregate([{
+            '$match': {
+                'meta': {
+                    '$exists': True
+                }
+            }
+        }, {
+            '$replaceRoot': {
+                'newRoot': '$meta'
+            }
+        }])
+    else:
+        metas = db[archive.META_COLLECTION]
+        meta_entries = metas.find({config.DIR_KEY: {'$exists': True}})
+
+    # Find all the objects that have a directory key
+    root = fs.FilesystemBuilder(is_root=True)
+    for meta in meta_entries:
+        obj_id = meta['_id']
+        directory = root
+        for entry in meta[config.DIR_KEY].split('/')[1:-1]:
+            directory = directory[entry]
+        directory.add_obj(meta.get(config.NAME_KEY, str(obj_id)), obj_id)
+
+    records = root.create_edge_records()
+
+    fs_collection = db[constants.FILESYSTEM_COLLECTION]
+    fs_collection.create_index(fs.Schema.PARENT, unique=False)
+    # Create a joint, unique, index on the source and name meaning that there cannot be two entries
+    # with the same name in any directory
+    fs_collection.create_index([(fs.Schema.PARENT, mincepy.ASCENDING),
+                                (fs.Schema.NAME, mincepy.ASCENDING)],
+                               unique=True)
+
+    fs_collection.replace_one({'_id': fs.ROOT_ID}, fs.ROOT, upsert=True)
+
+    if records:
+        fs_collection.insert_many(records)
+
+
+def add_abspaths(historian: mincepy.Historian, batch_size=1024):
+    """
+    Version 2.
+
+    Store the materialized absolute path on each filesystem entry so that a path can be resolved using a single
+    indexed query.  The tree is walked one level at a time starting from the root.
+    """
+    from . import fs
+
+    archive: mincepy.mongo.MongoArchive = historian.archive
+    fs_collection = archive.database[constants.FILESYSTEM_COLLECTION]
+    fs_collection.create_index(fs.Schema.ABSPATH, unique=False)
+    fs_collection.update_one({'_id': fs.ROOT_ID}, {'$set': {fs.Schema.ABSPATH: '/'}})
+
+    level = {fs.ROOT_ID: '/'}  # The directory ids at the current level and their paths
+    while level:
+        next_level = {}
+        parent_ids = list(level.keys())
+        for idx in range(0, len(parent_ids), batch_size):
+            ops = []
+            children = fs_collection.find(
+                {fs.Schema.PARENT: {
+                    '$in': parent_ids[idx:idx + batch_size]
+                }},
+                projection=[fs.Schema.PARENT, fs.Schema.NAME, fs.Schema.TYPE])
+            for child in children:
+                abspath = fs.join_abspath(level[fs.Entry.parent(child)], fs.Entry.name(child))
+                ops.append(
+                    pymongo.UpdateOne({'_id': fs.Entry.id(child)},
+                                      {'$set': {
+                                          fs.Schema.ABSPATH: abspath
+                                      }}))
+                if fs.Entry.is_dir(child):
+                    next_level[fs.Entry.id(child)] = abspath
+
+                if len(ops) >= batch_size:
+                    fs_collection.bulk_write(ops, ordered=False)
+                    ops = []
+
+            if ops:
+                fs_collection.bulk_write(ops, ordered=False)
+
+        level = next_level
+
+
+# Ordered list of migrations
+MIGRATIONS = (
+    initial,
+    add_pyos_collections,
+    add_abspaths,
+)
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+Watching the filesystem collection for changes made by other clients.
+
+When several clients share the same database any client side caching of filesystem entries can become stale when
+another client moves or deletes something.  The watcher follows the filesystem collection (using a change stream if
+the server supports it or by polling otherwise) and invalidates the session cache and any directory nodes that have
+registered with it.
+"""
+import collections
+import datetime
+import logging
+import threading
+from typing import Dict, Iterable, Optional
+import weakref
+
+import mincepy
+import pymongo.errors
+
+from . import cache
+from . import fs
+
+__all__ = ('FsWatcher',)
+
+logger = logging.getLogger(__name__)
+
+CHANGE_STREAM = 'change-stream'
+POLLING = 'polling'
+
+
+class FsWatcher:
+    """Watches the filesystem collection and invalidates cached state when entries change.
+
+    Directory nodes (or anything else with an `entry_id` and an `invalidate_children()` method) can be registered
+    using `watch_directory()` and will be told when the contents of their directory may have changed.  Only weak
+    references are kept to registered directories.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self,
+                 historian: mincepy.Historian,
+                 entries_cache: cache.EntriesLru = None,
+                 poll_interval: float = 1.,
+                 use_change_streams=True,
+                 clock_skew: datetime.timedelta = datetime.timedelta(seconds=5)):
+        """
+        :param historian: the historian whose filesystem collection to watch
+        :param entries_cache: the entries cache to keep up to date
+        :param poll_interval: how often (in seconds) to check for changes when polling (this is also the maximum time
+            that the change stream is waited on before checking whether the watcher should stop)
+        :param use_change_streams: if False, polling will be used even if the server supports change streams
+        :param clock_skew: the maximum expected difference between the clocks of clients writing to the database,
+            this is used to widen the window of times when polling
+        """
+        self._coll = fs.get_fs_collection(historian)
+        self._cache = entries_cache
+        self._poll_interval = poll_interval
+        self._use_change_streams = use_change_streams
+        self._clock_skew = clock_skew
+
+        self._dirs: Dict[object, weakref.WeakSet] = collections.defaultdict(weakref.WeakSet)
+        self._child_counts = {}  # Directory id -> number of children when last polled
+        self._lock = threading.Lock()
+
+        self._mode = None
+        self._stream = None
+        self._last_poll: Optional[datetime.datetime] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def mode(self) -> Optional[str]:
+        """The mode the watcher is running in, either CHANGE_STREAM, POLLING or None if not running"""
+        return self._mode
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        """Start watching in a background thread"""
+        if self.is_running:
+            return
+
+        self._stop.clear()
+        self._mode = POLLING
+        if self._use_change_streams:
+            try:
+                self._stream = self._coll.watch(full_document='updateLookup',
+                                                max_await_time_ms=int(self._poll_interval * 1000))
+            except (pymongo.errors.OperationFailure, NotImplementedError) as exc:
+                logger.info('Change streams not available (%s), falling back to polling', exc)
+            else:
+                self._mode = CHANGE_STREAM
+
+        if self._mode == POLLING:
+            # Establish the starting point
+            self.poll()
+
+        self._thread = threading.Thread(target=self._run, name='pyos-fs-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching"""
+        if not self.is_running:
+            return
+
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        self._mode = None
+
+    def watch_directory(self, directory):
+        """Register a directory to be told when its contents may have changed"""
+        with self._lock:
+            self._dirs[directory.entry_id].add(directory)
+
+    def poll(self):
+        """Check for any changes since the last poll.  This is called periodically when running in polling mode but
+        can also be called directly."""
+        now = datetime.datetime.now()
+        if self._last_poll is not None:
+            since = self._last_poll - self._clock_skew
+            for entry in self._coll.find(
+                {'$or': [{
+                    fs.Schema.UTIME: {
+                        '$gte': since
+                    }
+                }, {
+                    fs.Schema.CTIME: {
+                        '$gte': since
+                    }
+                }]}):
+                # Entries that have moved out of a watched directory are picked up by the child counts
+                self._handle_change(fs.Entry.id(entry), entry, check_old=False)
+
+        self._last_poll = now
+        self._poll_deleted()
+        self._poll_child_counts()
+
+    def _run(self):
+        try:
+            if self._mode == CHANGE_STREAM:
+                while not self._stop.is_set():
+                    change = self._stream.try_next()
+                    if change is not None:
+                        self._handle_event(change)
+            else:
+                while not self._stop.wait(self._poll_interval):
+                    self.poll()
+        except pymongo.errors.PyMongoError:
+            logger.exception('Filesystem watcher stopped because of an error, clearing caches')
+            self._invalidate_all()
+
+    def _handle_event(self, change: Dict):
+        """Handle a change stream event"""
+        operation = change['operationType']
+        if operation == 'insert':
+            self._handle_change(change['documentKey'][fs.Schema.ID],
+                                change['fullDocument'],
+                                check_old=False)
+        elif operation in ('update', 'replace', 'delete'):
+            self._handle_change(change['documentKey'][fs.Schema.ID],
+                                change.get('fullDocument', None))
+        else:
+            # The collection has been dropped, renamed, etc
+            self._invalidate_all()
+
+    def _handle_change(self, entry_id, new_entry: Optional[Dict], check_old=True):
+        """Invalidate anything that could be affected by a change to the given entry.
+
+        :param entry_id: the id of the entry that changed
+        :param new_entry: the entry as it is now, None if it has been deleted
+        :param check_old: if True, the directory that the entry used to be in will also be invalidated.  If this is
+            not known then all watched directories are invalidated
+        """
+        old_entry = self._cache.peek(entry_id) if self._cache is not None else None
+        new_abspath = fs.Entry.abspath(new_entry) if new_entry is not None else None
+
+        if self._cache is not None:
+            if old_entry is not None and fs.Entry.is_dir(old_entry) and \
+                    fs.Entry.abspath(old_entry) != new_abspath:
+                self._cache.discard_subtree(fs.Entry.abspath(old_entry))
+            self._cache.discard(entry_id)
+            if new_abspath is not None:
+                self._cache.discard_abspath(new_abspath)
+
+        parents = set()
+        if new_entry is not None:
+            parents.add(fs.Entry.parent(new_entry))
+        if old_entry is not None:
+            parents.add(fs.Entry.parent(old_entry))
+        elif check_old:
+            self._invalidate_dirs(None)
+            return
+
+        self._invalidate_dirs(parents)
+
+    def _invalidate_dirs(self, dir_ids: Optional[Iterable]):
+        """Invalidate the directories with the given ids, or all watched directories if None"""
+        with self._lock:
+            if dir_ids is None:
+                dir_ids = list(self._dirs.keys())
+            directories = []
+            for dir_id in dir_ids:
+                directories.extend(self._dirs.get(dir_id, ()))
+
+        for directory in directories:
+            directory.invalidate_children()
+
+    def _invalidate_all(self):
+        if self._cache is not None:
+            self._cache.clear()
+        self._invalidate_dirs(None)
+
+    def _poll_deleted(self):
+        """Discard any cached entries that no longer exist"""
+        if self._cache is None:
+            return
+
+        cached = self._cache.ids()
+        if not cached:
+            return
+
+        existing = set(
+            fs.Entry.id(entry) for entry in self._coll.find({fs.Schema.ID: {
+                '$in': cached
+            }},
+                                                            projection={fs.Schema.ID: 1}))
+        for entry_id in cached:
+            if entry_id not in existing:
+                self._handle_change(entry_id, None)
+
+    def _poll_child_counts(self):
+        """Invalidate any watched directories whose number of children has changed.  This catches entries that have
+        been deleted from (or moved out of) a watched directory."""
+        with self._lock:
+            for dir_id in [dir_id for dir_id, dirs in self._dirs.items() if not dirs]:
+                # Nobody is watching this one anymore
+                del self._dirs[dir_id]
+                self._child_counts.pop(dir_id, None)
+            dir_ids = list(self._dirs.keys())
+
+        if not dir_ids:
+            return
+
+        counts = {dir_id: 0 for dir_id in dir_ids}
+        for group in self._coll.aggregate([{
+                '$match': {
+                    fs.Schema.PARENT: {
+                        '$in': dir_ids
+                    }
+                }
+        }, {
+                '$group': {
+                    '_id': f'${fs.Schema.PARENT}',
+                    'count': {
+                        '$sum': 1
+                    }
+                }
+        }]):
+            counts[group['_id']] = group['count']
+
+        changed = [
+            dir_id for dir_id, count in counts.items()
+            if self._child_counts.get(dir_id, count) != count
+        ]
+        self._child_counts = counts
+        if changed:
+            self._invalidate_dirs(changed)
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""Filename globbing utility.
+
+This follows CPython's glob but rather than listing directories one at a time each level of the pattern is resolved
+for all the candidate directories at once: literal names are looked up using the (parent, name) index, wildcards are
+translated into regular expressions on the name that are evaluated by the database and '**' becomes a single scan of
+the descendents of each candidate directory.
+"""
+
+import re
+import itertools
+
+from pyos import db
+from pyos import os
+
+__all__ = ['glob', 'iglob', 'escape']
+
+
+def glob(pathname, *, root_dir=None, recursive=False, include_hidden=False):
+    """Return a list of paths matching a pathname pattern.
+
+    The pattern may contain simple shell-style wildcards a la
+    fnmatch. Unlike fnmatch, filenames starting with a
+    dot are special cases that are not matched by '*' and '?'
+    patterns by default.
+
+    If `include_hidden` is true, the patterns '*', '?', '**'  will match hidden
+    directories.
+
+    If `recursive` is true, the pattern '**' will match any files and
+    zero or more directories and subdirectories.
+    """
+    return list(
+        iglob(pathname, root_dir=root_dir, recursive=recursive, include_hidden=include_hidden))
+
+
+def iglob(pathname, *, root_dir=None, recursive=False, include_hidden=False):
+    """Return an iterator which yields the paths matching a pathname pattern.
+
+    The pattern may contain simple shell-style wildcards a la
+    fnmatch. However, unlike fnmatch, filenames starting with a
+    dot are special cases that are not matched by '*' and '?'
+    patterns.
+
+    If recursive is true, the pattern '**' will match any files and
+    zero or more directories and subdirectories.
+    """
+    if root_dir is not None:
+        root_dir = os.fspath(root_dir)
+    else:
+        root_dir = pathname[:0]
+    itr = _iglob(pathname, root_dir, recursive, False, include_hidden=include_hidden)
+    if not pathname or recursive and _isrecursive(pathname[:2]):
+        try:
+            string = next(itr)  # skip empty string
+            if string:
+                itr = itertools.chain((string,), itr)
+        except StopIteration:
+            pass
+    return itr
+
+
+def _iglob(pathname, root_dir, recursive, dironly, include_hidden=False):
+    # pylint: disable=too-many-branches
+
+    dirname, basename = os.path.split(pathname)
+    if not has_magic(pathname):
+        assert not dironly
+        if basename:
+            if _lexists(_join(root_dir, pathname)):
+                yield pathname
+        else:
+            # Patterns ending with a slash should match only directories
+            if _isdir(_join(root_dir, dirname)):
+                yield pathname
+        return
+    if not dirname:
+        if recursive and _isrecursive(basename):
+            glob_in_dirs = _glob2_many
+        else:
+            glob_in_dirs = _glob1_many
+        for _dirname, name in glob_in_dirs(root_dir, [dirname], basename, dironly, include_hidden):
+            yield name
+        return
+    # `os.path.split()` returns the argument itself as a dirname if it is a
+    # drive or UNC path.  Prevent an infinite recursion if a drive or UNC path
+    # contains magic characters (i.e. r'\\?\C:').
+    if dirname != pathname and has_magic(dirname):
+        # Resolve the whole of the previous level so that this one can be done in one go
+        dirs = list(_iglob(dirname, root_dir, recursive, True, include_hidden=include_hidden))
+    else:
+        dirs = [dirname]
+    if has_magic(basename):
+        if recursive and _isrecursive(basename):
+            glob_in_dirs = _glob2_many
+        else:
+            glob_in_dirs = _glob1_many
+        found = glob_in_dirs(root_dir, dirs, basename, dironly, include_hidden)
+    else:
+        found = _glob0_many(root_dir, dirs, basename)
+
+    for dirname, name in found:
+        yield os.path.join(dirname, name)
+
+
+# These helper functions glob inside literal directories.  The _many variants take a sequence of
+# directories and yield (dirname, basename) tuples for all the matches using a single query.
+
+
+def _glob1(dirname, pattern, dironly, include_hidden=False):
+    return [name for _, name in _glob1_many('', [dirname], pattern, dironly, include_hidden)]
+
+
+def _glob0(dirname, basename, dironly, include_hidden=False):  # pylint: disable=unused-argument
+    return [name for _, name in _glob0_many('', [dirname], basename)]
+
+
+def _glob1_many(root_dir, dirnames, pattern, dironly, include_hidden=False):
+    """Find the names matching the pattern in all the passed directories using a single database query"""
+    regex = translate(pattern)
+    if not include_hidden and not _ishidden(pattern):
+        # Wildcards don't match hidden names
+        regex = '^(?!\\.)' + regex[1:]
+
+    dir_ids = _find_dir_ids(root_dir, dirnames)
+    names = {}  # Directory id -> matching names
+    for entry in db.fs.find_children(set(filter(None, dir_ids)),
+                                     name_regex=regex,
+                                     type=db.fs.Schema.TYPE_DIR if dironly else None,
+                                     fields=()):
+        names.setdefault(db.fs.Entry.parent(entry), []).append(db.fs.Entry.name(entry))
+
+    for dirname, dir_id in zip(dirnames, dir_ids):
+        for name in sorted(names.get(dir_id, ())):
+            yield dirname, name
+
+
+def _glob0_many(root_dir, dirnames, basename):
+    """Batched version of _glob0 that checks for the literal basename in all the passed directories using a single
+    database query.  Yields (dirname, basename) tuples for those directories that contain it."""
+    dirnames = list(dirnames)
+    if basename:
+        entries = _find_entries(_join(_join(root_dir, dirname), basename) for dirname in dirnames)
+        for dirname, entry in zip(dirnames, entries):
+            if entry is not None:
+                yield dirname, basename
+    else:
+        # `os.path.split()` returns an empty basename for paths ending with a
+        # directory separator.  'q*x/' should match only directories.
+        entries = _find_entries(_join(root_dir, dirname) for dirname in dirnames)
+        for dirname, entry in zip(dirnames, entries):
+            if entry is not None and db.fs.Entry.is_dir(entry):
+                yield dirname, basename
+
+
+def _glob2_many(root_dir, dirnames, pattern, dironly, include_hidden=False):
+    """Recursively yield the relative paths of everything inside the passed directories.  Each directory is scanned
+    using a single query."""
+    assert _isrecursive(pattern)
+    for dirname, dir_id in zip(dirnames, _find_dir_ids(root_dir, dirnames)):
+        yield dirname, pattern[:0]
+        if dir_id is None:
+            continue
+
+        for entry in db.fs.iter_descendents(dir_id,
+                                            type=db.fs.Schema.TYPE_DIR if dironly else None,
+                                            fields=()):
+            relpath = db.fs.Entry.path(entry)
+            if include_hidden or not any(map(_ishidden, relpath)):
+                yield dirname, os.path.join(*relpath)
+
+
+def _find_dir_ids(root_dir, dirnames) -> list:
+    """Get the ids of the passed directories (relative to root_dir), None for those that aren't directories"""
+    entries = _find_entries(_join(root_dir, dirname) or os.curdir for dirname in dirnames)
+    return [
+        db.fs.Entry.id(entry) if entry is not None and db.fs.Entry.is_dir(entry) else None
+        for entry in entries
+    ]
+
+
+def _find_entries(paths):
+    return db.fs.find_entries([os.withdb.to_fs_path(path) for path in paths],
+                              fields=(db.fs.Schema.TYPE,))
+
+
+# Following functions are not public but can be used by third-party code.
+
+
+def glob0(dirname, pattern):
+    return _glob0(dirname, pattern, None, False)
+
+
+def glob1(dirname, pattern):
+    return _glob1(dirname, pattern, None, False)
+
+
+def translate(pattern: str) -> str:
+    """Translate a shell-style pattern into an anchored regular expression that can be evaluated by the database.
+    Unlike fnmatch.translate() only the regular expression syntax common to Python and MongoDB is used."""
+    # pylint: disable=too-many-branches
+    idx, num = 0, len(pattern)
+    res = []
+    while idx < num:
+        char = pattern[idx]
+        idx += 1
+        if char == '*':
+            # Compress consecutive '*' into one
+            if not res or res[-1] != '.*':
+                res.append('.*')
+        elif char == '?':
+            res.append('.')
+        elif char == '[':
+            end = idx
+            if end < num and pattern[end] == '!':
+                end += 1
+            if end < num and pattern[end] == ']':
+                end += 1
+            while end < num and pattern[end] != ']':
+                end += 1
+            if end >= num:
+                res.append('\\[')
+            else:
+                stuff = pattern[idx:end].replace('\\', '\\\\')
+                idx = end + 1
+                if stuff[0] == '!':
+                    stuff = '^' + stuff[1:]
+                elif stuff[0] == '^':
+                    stuff = '\\' + stuff
+                res.append(f'[{stuff}]')
+        else:
+            res.append(re.escape(char))
+
+    return '^' + ''.join(res) + '$'
+
+
+_lexists = os.path.lexists
+
+_isdir = os.path.isdir
+
+
+def _join(dirname, basename):
+    # It is common if dirname or basename is empty
+    if not dirname or not basename:
+        return dirname or basename
+    return os.path.join(dirname, basename)
+
+
+magic_check = re.compile('([*?[])')
+magic_check_bytes = re.compile(b'([*?[])')
+
+
+def has_magic(string):
+    if isinstance(string, bytes):
+        match = magic_check_bytes.search(string)
+    else:
+        match = magic_check.search(string)
+    return match is not None
+
+
+def _ishidden(path):
+    return path[0] in ('.', b'.'[0])
+
+
+def _isrecursive(pattern):
+    if isinstance(pattern, bytes):
+        return pattern == b'**'
+
+    return pattern == '**'
+
+
+def escape(pathname):
+    """Escape all special characters.
+    """
+    # Escaping is done by wrapping any of "*?[" between square brackets.
+    # Metacharacters do not work in the drive part and shouldn't be escaped.
+    drive, pathname = os.path.splitdrive(pathname)
+    if isinstance(pathname, bytes):
+        pathname = magic_check_bytes.sub(br'[\1]', pathname)
+    else:
+        pathname = magic_check.sub(r'[\1]', pathname)
+    return drive + pathname
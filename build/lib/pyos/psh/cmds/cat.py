@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+import argparse
+import logging
+import re
+
+import cmd2
+
+import pyos
+from pyos import db
+from pyos import psh
+from pyos.psh import completion
+from pyos.psh import utils
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@pyos.psh_lib.command()
+def cat(*obj_or_ids, representer=None):
+    """Convert the contents of objects into strings.
+    A representer can optionally be passed in which should take the passed object and convert it to
+    a string.
+    """
+    if not obj_or_ids:
+        return None
+
+    hist = db.get_historian()
+    to_cat = []
+
+    for entry in obj_or_ids:
+        if isinstance(entry, utils.PipeItem):
+            # We already know what this is
+            entry = entry.target
+
+        if isinstance(entry, (str, pyos.pathlib.Path, pyos.fs.BaseNode)):
+            to_cat.extend(psh.ls(-psh.d, entry))
+        else:
+            to_cat.append(entry)
+
+    # Load the objects in bulk, in the order they are to be printed
+    to_load = []
+    for entry in to_cat:
+        if isinstance(entry, pyos.fs.ObjectNode):
+            to_load.append(entry.obj_id)
+        elif not isinstance(entry, pyos.fs.DirectoryNode) and hist.is_obj_id(entry):
+            to_load.append(entry)
+    loaded = db.load_many(to_load, background=True, historian=hist)
+
+    representer = representer or pyos.psh_lib.get_default()
+
+    def iterator():
+        for entry in to_cat:
+            try:
+                if isinstance(entry, pyos.fs.DirectoryNode):
+                    yield f'cat: {entry.abspath.name}: Is a directory'
+                elif isinstance(entry, pyos.fs.ObjectNode) or hist.is_obj_id(entry):
+                    obj = next(loaded)
+                    if isinstance(obj, Exception):
+                        raise obj
+                    yield representer(obj)
+                else:
+                    yield representer(entry)
+            except Exception as exc:  # pylint: disable=broad-except
+                yield representer(exc)
+
+    results = pyos.psh_lib.CachingResults(iterator(), representer=str)
+
+    if len(to_cat) == 1:
+        return pyos.psh_lib.ResultsString(results[0])
+
+    return results
+
+
+class FstringRepresenter:
+    REGEXP = re.compile(r'{(\S*)}')
+
+    def __init__(self, fstring):
+        # Create the adapted f-string with 'obj' representing the passed object
+        self._fstring = self.REGEXP.subn('{obj\\1}', fstring)[0]
+
+    def __call__(self, obj) -> str:
+        return self._fstring.format(obj=obj)
+
+
+class Cat(cmd2.CommandSet):
+    ls_parser = argparse.ArgumentParser()
+    ls_parser.add_argument('-f',
+                           dest='fstring',
+                           type=str,
+                           help='optional f-string for printing attributes e.g. -f {colour} prints '
+                           'obj.colour for each object')
+    ls_parser.add_argument('path', nargs='*', type=str, completer_method=completion.file_completer)
+
+    @cmd2.with_argparser(ls_parser)
+    def do_cat(self, args):
+        if not args.path:
+            # Read from standard in
+            _LOGGER.debug('cat: getting input from stdin')
+            try:
+                args.path = list(utils.read_input())
+            except Exception:
+                _LOGGER.exception('Exception trying to readlines')
+                raise
+            _LOGGER.debug("cat: got input' %s' from stdin", args.path)
+
+        representer = None
+        if args.fstring:
+            representer = FstringRepresenter(args.fstring)
+
+        results = cat(*args.path, representer=representer)
+
+        if isinstance(results, pyos.psh_lib.ResultsString):
+            print(results)
+        else:
+            for entry in results:
+                print(entry)
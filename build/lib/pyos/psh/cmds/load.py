@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+import itertools
+from typing import Union, Iterable, Any
+
+import pyos
+from pyos import db
+from pyos import psh
+
+
+@pyos.psh_lib.command()
+def load(*obj_or_ids) -> Union[Iterable[Any], Any]:
+    """Load one or more objects"""
+    _options, args = pyos.psh_lib.separate_opts(*obj_or_ids)
+    if not args:
+        return None
+
+    # First load any by object id directly
+    obj_ids = []
+    rest = []
+    hist = db.get_historian()
+    for entry in args:
+        if hist.is_obj_id(entry):
+            obj_ids.append(entry)
+        else:
+            rest.append(entry)
+
+    # The remaining arguments are passed to ls which will try to find the corresponding objects
+    to_load = psh.ls(*rest)  # pylint: disable=no-value-for-parameter
+    num_direct = len(obj_ids)
+    obj_ids.extend(node.obj_id for node in to_load if isinstance(node, pyos.fs.ObjectNode))
+
+    # Any that can't be loaded will have the exception in their place
+    objects = db.load_many(obj_ids, background=True, historian=hist)
+    loaded = list(itertools.islice(objects, num_direct))
+    for node in to_load:
+        if isinstance(node, pyos.fs.ObjectNode):
+            loaded.append(next(objects))
+        else:
+            loaded.append(pyos.exceptions.IsADirectoryError(node.abspath))
+
+    if len(to_load) == 1:
+        return loaded[0]
+
+    return loaded
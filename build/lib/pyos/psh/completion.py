@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+import collections
+import itertools
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Callable, Tuple
+
+import pyos
+from pyos import db
+from pyos import os as pos
+from . import shell
+
+__all__ = 'PathCompletion', 'MAX_COMPLETIONS', 'clear_cache'
+
+# The maximum number of completions that will be offered for a directory
+MAX_COMPLETIONS = 1000
+
+
+class _CompletionCache:
+    """A small cache of the children found when completing within a directory.  Pressing tab a few times while typing
+    a path repeatedly asks for the children of the same directory so these are kept for a short time (the duration of
+    a 'completion session').  A listing for a prefix also answers any longer prefix unless it was capped."""
+
+    TTL = 5.  # seconds
+    MAXSIZE = 32
+
+    def __init__(self):
+        self._entries = collections.OrderedDict()  # (dir id, prefix) -> (time, capped, children)
+        self._lock = threading.Lock()
+
+    def get(self, dir_id, prefix: str) -> Optional[List[Tuple[str, Dict]]]:
+        now = time.monotonic()
+        with self._lock:
+            for end in range(len(prefix), -1, -1):
+                key = dir_id, prefix[:end]
+                try:
+                    created, capped, children = self._entries[key]
+                except KeyError:
+                    continue
+
+                if now - created > self.TTL:
+                    del self._entries[key]
+                elif end == len(prefix) or not capped:
+                    return [child for child in children if child[0].startswith(prefix)]
+
+        return None
+
+    def put(self, dir_id, prefix: str, capped: bool, children: List[Tuple[str, Dict]]):
+        with self._lock:
+            self._entries[(dir_id, prefix)] = time.monotonic(), capped, children
+            self._entries.move_to_end((dir_id, prefix))
+            while len(self._entries) > self.MAXSIZE:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_CACHE = _CompletionCache()
+
+
+def clear_cache():
+    """Forget any children found during completion so far"""
+    _CACHE.clear()
+
+
+def _find_children(dirname, prefix: str = '') -> List[Tuple[str, Dict]]:
+    """Get the names and entries of (at most MAX_COMPLETIONS) children of the given directory whose names start with
+    the prefix.  The database is asked for the names and types in one query on the (parent, name) index."""
+    entry = db.fs.find_entry(pos.withdb.to_fs_path(dirname or pos.curdir), fields=())
+    if entry is None or not db.fs.Entry.is_dir(entry):
+        return []
+
+    dir_id = db.fs.Entry.id(entry)
+    children = _CACHE.get(dir_id, prefix)
+    if children is None:
+        found = db.fs.find_children((dir_id,),
+                                    name_regex=f'^{re.escape(prefix)}',
+                                    fields=(db.fs.Schema.TYPE,),
+                                    batch_size=MAX_COMPLETIONS + 1)
+        children = [(db.fs.Entry.name(child), child)
+                    for child in itertools.islice(found, MAX_COMPLETIONS + 1)]
+        capped = len(children) > MAX_COMPLETIONS
+        if capped:
+            del children[MAX_COMPLETIONS:]
+        children.sort(key=lambda child: child[0])
+        _CACHE.put(dir_id, prefix, capped, children)
+
+    return children
+
+
+class PathCompletion(pyos.os.PathLike):
+    """This class enables tab-completion for paths.  Passed a path, this class will list all the
+    files and directories below it when __dir__ is called (i.e. tab in, e.g., ipython)."""
+
+    def __init__(self, path='.'):
+        self._path = pyos.pathlib.Path(path)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}('{self._path}')"
+
+    def __fspath__(self):
+        return str(self._path)
+
+    def __dir__(self) -> Optional[Iterable[str]]:
+        for name, _entry in _find_children(self._path):
+            # Skip strings that aren't python identifiers
+            if name.isidentifier():
+                yield name
+
+    def _ipython_key_completions_(self):
+        """This allows getitem style (["<tab>) style completion"""
+        for name, _entry in _find_children(self._path):
+            yield name
+
+    def __getattr__(self, item: str) -> 'PathCompletion':
+        """Attribute access for paths"""
+        path = self._path / item
+        if path.exists():
+            return PathCompletion(path)
+
+        raise FileNotFoundError(f"Path does not exist: '{item}'")
+
+    def __getitem__(self, item):
+        """Square bracket notation.  Allows arbitrary strings which is needed if the path name isn't
+        a valid python variable"""
+        path = self._path / item
+        if path.exists():
+            return PathCompletion(path)
+
+        raise FileNotFoundError(f"Path does not exist: '{item}'")
+
+
+def path_complete(app: shell.PyosShell,
+                  text: str,
+                  _line: str,
+                  _begidx: int,
+                  _endidx: int,
+                  *,
+                  path_filter: Optional[Callable[[str], bool]] = None,
+                  entry_filter: Optional[Callable[[Dict], bool]] = None) -> List[str]:
+    """Performs completion of local file system paths
+
+    :param app: The pyos base shell
+    :param text: the string prefix we are attempting to match (all matches must begin with it)
+    :param _line: the current input line with leading whitespace removed
+    :param _begidx: the beginning index of the prefix text
+    :param _endidx: the ending index of the prefix text
+    :param path_filter: optional filter function that determines if a path belongs in the
+        results this function takes a path as its argument and returns True if the path should
+        be kept in the results
+    :param entry_filter: optional filter function that takes the filesystem entry of each match and
+        returns True if it should be kept in the results.  Unlike path_filter this does not need to
+        go to the database for each match.
+    :return: a list of possible tab completions
+    """
+    # Purposely don't match any path containing wildcards
+    if '*' in text or '?' in text:
+        return []
+
+    # Set this to True for proper quoting of paths with spaces
+    app.matches_delimited = True
+
+    # Find the children of the directory that start with the prefix, along with their entries
+    dirname, prefix = pos.path.split(text)
+    found = [(pos.path.join(dirname, name), entry)
+             for name, entry in _find_children(dirname, prefix)
+             if prefix.startswith('.') or not name.startswith('.')]
+
+    # Filter out results that don't belong
+    if path_filter is not None:
+        found = [(match, entry) for match, entry in found if path_filter(match)]
+    if entry_filter is not None:
+        found = [(match, entry) for match, entry in found if entry_filter(entry)]
+
+    matches = [match for match, _entry in found]
+
+    # Don't append a space or closing quote to directory
+    if len(found) == 1 and db.fs.Entry.is_dir(found[0][1]):
+        app.allow_appended_space = False
+        app.allow_closing_quote = False
+
+    # Sort the matches before any trailing slashes are added
+    matches.sort(key=app.default_sort_key)
+    app.matches_sorted = True
+
+    return matches
+
+
+def file_completer(app: shell.PyosShell, text: str, line: str, begidx: int,
+                   endidx: int) -> List[str]:
+    return path_complete(app, text, line, begidx, endidx, entry_filter=db.fs.Entry.is_obj)
+
+
+def dir_completer(app: shell.PyosShell, text: str, line: str, begidx: int,
+                  endidx: int) -> List[str]:
+    return path_complete(app, text, line, begidx, endidx, entry_filter=db.fs.Entry.is_dir)
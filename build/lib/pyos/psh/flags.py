@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""Module containig flags"""
+
+from pyos import psh_lib
+
+__all__ = 'f', 'l', 'L', 'n', 'p', 'd', 'u', 'r', 's', 't', 'U', 'v'
+
+# pylint: disable=invalid-name
+
+# Define standard flags
+d = psh_lib.Option('d')
+f = psh_lib.Option('f')
+l = psh_lib.Option('l')
+L = psh_lib.Option('L')
+n = psh_lib.Option('n')
+p = psh_lib.Option('p')
+r = psh_lib.Option('r')
+s = psh_lib.Option('s')
+t = psh_lib.Option('t')
+u = psh_lib.Option('u')
+U = psh_lib.Option('U')
+v = psh_lib.Option('v')
@@ -37,12 +37,13 @@ from . import lib
 from .pathlib import PurePath, Path, working_path
 from . import psh
 from . import psh_lib
+from . import aio
 
 from .version import *
 from .lib import *
 from .exceptions import *  # pylint: disable=redefined-builtin
 
-_MODULES = 'os', 'config', 'db', 'fmt', 'fs', 'pathlib', 'psh_lib', 'psh'
+_MODULES = 'os', 'config', 'db', 'fmt', 'fs', 'pathlib', 'psh_lib', 'psh', 'aio'
 _DEPRECATED = ('working_path',)
 _ADDITIONAL = ('PurePath', 'Path', '__version__', 'connect')
 
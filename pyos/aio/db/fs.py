@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""Async versions of the filesystem database commands.
+
+Calls to `find_entry()` made at the same time (i.e. during the same iteration of the event loop) are gathered up and
+looked up together using one `find_entries()` query so that many concurrent lookups cost only a few round trips to the
+database.
+"""
+import asyncio
+import collections
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import weakref
+
+import mincepy
+
+from pyos import db
+from pyos.db.fs import Fields, FsEntry, Path
+from .. import utils
+
+__all__ = ('find_entry', 'iter_children', 'get_paths', 'make_dirs', 'rename')
+
+MAX_LOOKUPS = 1024  # The maximum number of paths looked up in one query
+
+_Lookup = Tuple[Path, asyncio.Future]
+
+
+async def find_entry(
+    path: Path,
+    *,
+    fields: Fields = None,
+    historian: mincepy.Historian = None,
+) -> Optional[FsEntry]:
+    """Find an entry in the filesystem collection based on the path
+
+    :param fields: the entry fields needed by the caller (the entry may contain more), None means all
+    """
+    db.fs.validate_path(path)
+    historian = historian or db.get_historian()
+    loop = asyncio.get_running_loop()
+    try:
+        lookups = _lookups[loop]
+    except KeyError:
+        lookups = _lookups[loop] = _EntryLookups()
+
+    return await lookups.find(path, None if fields is None else tuple(fields), historian)
+
+
+async def iter_children(entry_id, **kwargs) -> AsyncIterator[FsEntry]:
+    """Given a filesystem directory id iterate over all of its children.  This takes the same keyword arguments as
+    the synchronous version, the children are fetched a batch at a time."""
+    batch_size = kwargs.get('batch_size', utils.ITERATE_BATCH_SIZE)
+    async for entry in utils.iterate(db.fs.iter_children(entry_id, **kwargs), batch_size):
+        yield entry
+
+
+async def get_paths(*obj_id, historian: mincepy.Historian = None) -> Tuple[Path]:
+    """Get the paths of the given entries in the order they were passed in, with None for any that don't exist"""
+    return await utils.run(db.fs.get_paths, *obj_id, historian=historian)
+
+
+async def make_dirs(path: Path, exists_ok=False, historian: mincepy.Historian = None):
+    """Make the directory at the given path along with any parent directories that don't exist yet"""
+    return await utils.run_serial(db.fs.make_dirs, path, exists_ok=exists_ok, historian=historian)
+
+
+async def rename(src: Path = None,
+                 dest: Path = None,
+                 src_id=None,
+                 historian: mincepy.Historian = None):
+    """Rename a filesystem entry"""
+    return await utils.run_serial(db.fs.rename, src, dest, src_id=src_id, historian=historian)
+
+
+class _EntryLookups:
+    """Gathers up the find_entry() calls made during one iteration of an event loop and looks them up together"""
+
+    def __init__(self):
+        self._pending: Dict[Tuple, List[_Lookup]] = collections.defaultdict(list)
+        # Keep references to the running lookups so they don't get garbage collected
+        self._tasks = set()
+
+    def find(self, path: Path, fields: Optional[Tuple[str, ...]],
+             historian: mincepy.Historian) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not self._pending:
+            loop.call_soon(self._dispatch)
+        self._pending[(fields, historian)].append((path, future))
+        return future
+
+    def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        pending, self._pending = self._pending, collections.defaultdict(list)
+        for (fields, historian), lookups in pending.items():
+            for idx in range(0, len(lookups), MAX_LOOKUPS):
+                task = loop.create_task(
+                    self._lookup(lookups[idx:idx + MAX_LOOKUPS], fields, historian))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    async def _lookup(lookups: List[_Lookup], fields, historian):
+        try:
+            entries = await utils.run(db.fs.find_entries, [path for path, _ in lookups],
+                                      fields=fields,
+                                      historian=historian)
+        except Exception as exc:  # pylint: disable=broad-except
+            for _, future in lookups:
+                if not future.done():
+                    future.set_exception(exc)
+        else:
+            for (_, future), entry in zip(lookups, entries):
+                if not future.done():
+                    future.set_result(entry)
+
+
+_lookups: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _EntryLookups]' = \
+    weakref.WeakKeyDictionary()
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from typing import Any, Iterable, Tuple, Union
+
+import mincepy
+
+from pyos import db
+from pyos import os
+from .. import utils
+
+__all__ = ('save_many',)
+
+
+async def save_many(to_save: Iterable[Union[Any, Tuple[Any, os.PathSpec]]],
+                    overwrite=False,
+                    show_progress=False,
+                    historian: mincepy.Historian = None,
+                    chunk_size: int = None):
+    """
+    Save many objects, expects an iterable where each entry is an object to save or a tuple of
+    length 2 containing the object and a path of where to save it.  See `pyos.db.save_many()`.
+
+    As the saving is done by the writer thread, the objects (and `to_save` itself if it is a
+    generator) must not be used until this has finished.
+    """
+    return await utils.run_serial(db.save_many,
+                                  to_save,
+                                  overwrite=overwrite,
+                                  show_progress=show_progress,
+                                  historian=historian,
+                                  chunk_size=chunk_size)
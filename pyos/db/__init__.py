@@ -5,9 +5,11 @@
 from .database import *
 from .lib import *
 from .utils import *
+from . import cache
 from . import fs
 from . import queries
+from . import watch
 
-ADDITIONAL = ('queries', 'fs')
+ADDITIONAL = ('cache', 'queries', 'fs', 'watch')
 
 __all__ = database.__all__ + lib.__all__ + utils.__all__ + ADDITIONAL  # pylint: disable=undefined-variable
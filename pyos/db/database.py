@@ -5,7 +5,9 @@ from typing import Optional, Sequence
 import mincepy
 import mincepy.archives
 
+from . import cache
 from . import schema
+from . import watch
 from . import fs
 
 __all__ = 'connect', 'init', 'get_historian', 'reset', 'get_session'
@@ -15,9 +17,18 @@ _GLOBAL_SESSION: Optional['Session'] = None
 
 class Session(mincepy.archives.ArchiveListener):
 
-    def __init__(self, historian: mincepy.Historian, cwd: fs.Path = None):
-        """Start a new session"""
+    def __init__(self, historian: mincepy.Historian, cwd: fs.Path = None, cache_size: int = 0):
+        """Start a new session
+
+        :param cache_size: the size of the filesystem entries cache, zero (the default) disables it.  The cache only
+            sees the writes made through this session so it should only be enabled if no other client writes to the
+            database, otherwise start_watching() will enable it along with the watcher that keeps it up to date.
+        """
         self._historian = historian
+        self._entries_cache = cache.EntriesLru(cache_size)
+        self._cache_size = cache_size
+        self._watcher: Optional[watch.FsWatcher] = None
+        self._type_names = cache.TypeNames(historian)
 
         self._cwd = None
         if cwd:
@@ -35,13 +46,53 @@ class Session(mincepy.archives.ArchiveListener):
     def historian(self) -> mincepy.Historian:
         return self._historian
 
+    @property
+    def entries_cache(self) -> cache.EntriesLru:
+        """The cache of filesystem entries used by this session"""
+        return self._entries_cache
+
+    @property
+    def type_names(self) -> cache.TypeNames:
+        """The table of pretty type names used when displaying the types of objects"""
+        return self._type_names
+
+    @property
+    def watcher(self) -> Optional[watch.FsWatcher]:
+        """The filesystem watcher if one has been started"""
+        return self._watcher
+
+    def start_watching(self,
+                       cache_size: int = cache.EntriesLru.DEFAULT_MAXSIZE,
+                       **kwargs) -> watch.FsWatcher:
+        """Start watching the filesystem for changes made by other clients so that cached entries and directory
+        listings are kept up to date.  Keyword arguments are passed to the FsWatcher constructor.
+
+        :param cache_size: the size of the filesystem entries cache to use while watching, if the session's cache
+            is smaller it is enlarged to this size until watching stops
+        """
+        if self._watcher is None:
+            self._watcher = watch.FsWatcher(self._historian, self._entries_cache, **kwargs)
+            self._watcher.start()
+            if cache_size > self._entries_cache.maxsize:
+                self._entries_cache.resize(cache_size)
+
+        return self._watcher
+
+    def stop_watching(self):
+        """Stop watching the filesystem for changes"""
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+            # Without the watcher, cached entries could go stale
+            self._entries_cache.resize(self._cache_size)
+
     @property
     def cwd(self) -> fs.Path:
         return self._cwd
 
     def set_cwd(self, path: fs.Path):
         """Set the current working directory"""
-        if fs.find_entry(path, historian=self._historian) is None:
+        if fs.find_entry(path, fields=(), historian=self._historian) is None:
             raise ValueError(f'Path does not exist: {path}')
 
         self._cwd = path
@@ -49,6 +100,9 @@ class Session(mincepy.archives.ArchiveListener):
     def close(self):
         """Close this session.  This object cannot be used after this call"""
         self._historian.archive.remove_archive_listener(self)
+        self.stop_watching()
+        self._entries_cache.clear()
+        self._type_names.clear()
 
         del self._cwd
         del self._historian
@@ -62,6 +116,8 @@ class Session(mincepy.archives.ArchiveListener):
         new_objects = []  # Keep track of the new objects being saved
         deleted_objects = []
         for oper in ops:
+            # Any cached entry for this object may be about to change
+            self._entries_cache.discard(oper.obj_id)
             if isinstance(oper, mincepy.operations.Insert):
                 if oper.snapshot_id.version == 0:
                     new_objects.append(oper.obj_id)
@@ -117,9 +173,10 @@ def get_session() -> Session:
 
 
 def reset():
-    global _GLOBAL_SESSION  # pylint: disable=global-statement, global-variable-not-assigned
+    global _GLOBAL_SESSION  # pylint: disable=global-statement
     if _GLOBAL_SESSION is not None:
         _GLOBAL_SESSION.close()
+        _GLOBAL_SESSION = None
 
 
 def _get_homedir() -> fs.Path:
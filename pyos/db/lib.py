@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
 import collections
+import itertools
+import queue
+import threading
 from typing import Sequence, Iterable, Optional, Tuple, Any, Union, Iterator
 
 import deprecation
@@ -13,8 +16,8 @@ from . import database
 from . import fs
 
 __all__ = ('get_meta', 'update_meta', 'set_meta', 'find_meta', 'save_one', 'save_many',
-           'get_abspath', 'load', 'to_obj_id', 'get_obj_id', 'get_path', 'get_paths', 'rename',
-           'homedir', 'get_oid', 'get_obj_id_from_path', 'set_path', 'set_paths')
+           'get_abspath', 'load', 'load_many', 'to_obj_id', 'get_obj_id', 'get_path', 'get_paths',
+           'rename', 'homedir', 'get_oid', 'get_obj_id_from_path', 'set_path', 'set_paths')
 
 # region metadata
 
@@ -158,7 +161,9 @@ def save_one(obj,
 def save_many(to_save: Iterable[Union[Any, Tuple[Any, os.PathSpec]]],
               overwrite=False,
               show_progress=True,
-              historian: mincepy.Historian = None):
+              historian: mincepy.Historian = None,
+              chunk_size: int = None,
+              background=False):
     """
     Save many objects, expects an iterable where each entry is an object to save or a tuple of
     length 2 containing the object and a path of where to save it.
@@ -166,20 +171,15 @@ def save_many(to_save: Iterable[Union[Any, Tuple[Any, os.PathSpec]]],
     :param to_save: the iterable able objects to save
     :param overwrite: overwrite objects with the same name
     :param historian: the historian to use
+    :param chunk_size: if given, the objects are saved in chunks of this size, each in its own
+        transaction, so that only one chunk of objects is pending at any time.  This allows
+        `to_save` to be a generator of more objects than would fit in memory.  Note that if
+        saving fails, the chunks that were already committed stay saved.
+    :param background: when saving in chunks, take the next chunk from `to_save` on a background
+        thread while the current one is being saved.  This helps when producing the objects (e.g.
+        generating or reading them from files) is itself expensive.  As the historian is not
+        thread safe, `to_save` must not use it.
     """
-
-    def _parse_entry(entry):
-        if isinstance(entry, tuple):
-            return entry[0], entry[1]
-
-        # Assume it's just the object
-        return entry, None
-
-    for entry in to_save:
-        if isinstance(entry, tuple) and len(entry) > 2:
-            raise ValueError('Can only pass sequences of at most length 2')
-
-    obj_ids = []
     historian = historian or database.get_historian()
 
     progress_opts = dict(desc='Saving', disable=not show_progress)
@@ -189,47 +189,237 @@ def save_many(to_save: Iterable[Union[Any, Tuple[Any, os.PathSpec]]],
         pass
     progress_bar = tqdm(**progress_opts)
 
-    cache = fs.EntriesCache(historian)
-    exc = None
+    if chunk_size is None:
+        return _save_chunk(to_save, overwrite, historian, progress_bar)
+
+    if chunk_size < 1:
+        raise ValueError(f'Invalid chunk size: {chunk_size}')
+
+    chunks = _iter_chunks(to_save, chunk_size)
+    if background:
+        chunks = _iter_prefetched(chunks, 'pyos-save-many')
+
+    obj_ids = []
+    for chunk in chunks:
+        obj_ids.extend(_save_chunk(chunk, overwrite, historian))
+        progress_bar.update(len(chunk))
+
+    return obj_ids
+
+
+def _save_chunk(to_save: Iterable[Union[Any, Tuple[Any, os.PathSpec]]],
+                overwrite: bool,
+                historian: mincepy.Historian,
+                progress_bar: tqdm = None) -> list:
+    """Save the objects in a single transaction and return their ids"""
+    obj_ids = []
     with historian.transaction():
+        to_place = []  # (obj id, path) tuples of objects that need to be put in the filesystem
         for entry in to_save:
-            obj, path = _parse_entry(entry)
+            obj, path = _parse_save_entry(entry)
 
             # Set the object to be saved at the end of the transaction
             obj_id = historian.save_one(obj)
             if path is not None:
-                # Get information about the source
-                source_entry = cache.get_entry_from_id(obj_id)
-                if source_entry is not None and fs.Entry.is_dir(source_entry):
-                    raise exceptions.IsADirectoryError(path)
-
-                # Get information about the destination
-                save_path = os.withdb.to_fs_path(path)
-                dest_entry = cache.get_entry_from_path(save_path)
-
-                if dest_entry is not None and fs.Entry.is_dir(dest_entry):
-                    if source_entry is None:
-                        save_path = save_path + (str(obj_id),)
-                    else:
-                        save_path = save_path + (fs.Entry.name(source_entry),)
-
-                if source_entry is None:
-                    _insert(obj_id, save_path, overwrite=overwrite, cache=cache)
-                else:
-                    _rename(obj_id, save_path, overwrite=overwrite, cache=cache)
+                to_place.append((obj_id, path))
 
             obj_ids.append(obj_id)
-            progress_bar.update(1)
+            if progress_bar is not None:
+                progress_bar.update(1)
 
-    if exc is not None:
-        raise exc  # pylint: disable=raising-bad-type
+        if to_place:
+            _place_objects(to_place, overwrite, historian)
 
     return obj_ids
 
 
+def _parse_save_entry(entry) -> Tuple[Any, Optional[os.PathSpec]]:
+    if isinstance(entry, tuple):
+        if len(entry) > 2:
+            raise ValueError('Can only pass sequences of at most length 2')
+        return entry[0], entry[1]
+
+    # Assume it's just the object
+    return entry, None
+
+
+def _iter_chunks(iterable: Iterable, chunk_size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _iter_prefetched(chunks: Iterator[list], name: str) -> Iterator[list]:
+    """Consume the chunks on a background thread staying (at most) one chunk ahead of the caller"""
+    chunk_queue = queue.Queue(maxsize=1)
+    stop = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                chunk_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for chunk in chunks:
+                if not put(chunk):
+                    return
+        except Exception as exc:  # pylint: disable=broad-except
+            put(exc)
+        else:
+            put(done)
+
+    producer = threading.Thread(target=produce, name=name, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = chunk_queue.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Let the producer know to stop if we're finishing early
+        stop.set()
+        producer.join()
+
+
+def _place_objects(to_place: Sequence[Tuple[Any, os.PathSpec]], overwrite: bool,
+                   historian: mincepy.Historian):
+    """Put objects at the given paths in the filesystem.  All the information needed is fetched up front, any
+    objects being overwritten are deleted together and the filesystem is then updated using a single bulk write.
+
+    If several objects are placed at the same path, this is an error unless overwriting in which case the last one
+    wins (and the others are deleted) as if they had been placed one after the other."""
+    cache = fs.EntriesCache(historian)
+    to_place = [(obj_id, path, os.withdb.to_fs_path(path)) for obj_id, path in to_place]
+
+    # Get information about all the sources and destinations in bulk
+    cache.prefetch_ids(obj_id for obj_id, _path, _save_path in to_place)  # DB HIT
+    cache.prefetch(save_path for _obj_id, _path, save_path in to_place)  # DB HIT
+
+    destinations = {}  # The final filesystem path -> (object id, path as passed in, instruction)
+    superseded = set()  # Objects that were placed at a path that a later one was placed at too
+    for obj_id, path, save_path in to_place:
+        save_path, instruction = _get_place_instruction(obj_id, path, save_path, cache)
+        if save_path in destinations:
+            earlier_id = destinations.pop(save_path)[0]
+            if earlier_id != obj_id:
+                if not overwrite:
+                    raise exceptions.FileExistsError(path, path=path)
+                superseded.add(earlier_id)
+        destinations[save_path] = obj_id, path, instruction
+
+    # Now find anything that is already at the final destinations and the directories they go in
+    cache.prefetch(itertools.chain(destinations.keys(),
+                                   (dest[:-1] for dest in destinations)))  # DB HIT
+    placing = set(obj_id for obj_id, _path, _instruction in destinations.values())
+    superseded -= placing  # In case any were placed again somewhere else
+    conflicting = {}  # Entry id -> path
+    ordered = False
+    for save_path, (obj_id, path, _instruction) in destinations.items():
+        existing = cache.get_entry_from_path(save_path)
+        if existing is None or fs.Entry.id(existing) == obj_id:
+            continue
+
+        existing_id = fs.Entry.id(existing)
+        if existing_id in placing:
+            # This one is itself being moved so the operations have to be carried out in order
+            ordered = True
+        elif not overwrite or fs.Entry.is_dir(existing):
+            raise exceptions.FileExistsError(path, existing_entry_id=existing_id, path=path)
+        else:
+            conflicting[existing_id] = save_path
+
+    to_delete = tuple(itertools.chain(conflicting.keys(), superseded))
+    if to_delete:
+        historian.delete(*to_delete)
+        fs.remove_objs(to_delete, historian=historian)  # DB HIT
+        cache.discard(*to_delete, *conflicting.values())
+
+    instructions = [instruction for _obj_id, _path, instruction in destinations.values()]
+    fs.execute_instructions(instructions, historian, ordered=ordered, cache=cache)  # DB HIT
+
+
+def _get_place_instruction(obj_id, path: os.PathSpec, save_path: fs.Path,
+                           cache: fs.EntriesCache) -> Tuple[fs.Path, fs.Instruction]:
+    """Get the final path of the object and the instruction that will put it there given the path to save it at,
+    which may be a directory"""
+    # Get information about the source
+    source_entry = cache.get_entry_from_id(obj_id)
+    if source_entry is not None and fs.Entry.is_dir(source_entry):
+        raise exceptions.IsADirectoryError(path)
+
+    # Get information about the destination
+    dest_entry = cache.get_entry_from_path(save_path)
+    if dest_entry is not None and fs.Entry.is_dir(dest_entry):
+        if source_entry is None:
+            save_path = save_path + (str(obj_id),)
+        else:
+            save_path = save_path + (fs.Entry.name(source_entry),)
+
+    if source_entry is None:
+        return save_path, fs.SetObjPath(obj_id, save_path)
+
+    return save_path, fs.Rename(obj_id, save_path)
+
+
 def load(*identifier):
     """Load one or more objects"""
-    database.get_historian().load(*identifier)
+    return database.get_historian().load(*identifier)
+
+
+def load_many(obj_ids: Iterable,
+              batch_size=1024,
+              background=False,
+              historian: mincepy.Historian = None) -> Iterator[Union[Any, Exception]]:
+    """Load many objects, yielding them in the same order as the passed ids.  The records are
+    fetched using one query per batch of ids.  If an object can't be loaded the exception is yielded
+    in its place so that the rest can still be loaded.
+
+    :param obj_ids: the ids of the objects to load
+    :param batch_size: the number of records to get with each query
+    :param background: fetch the next batch of records on a background thread while the current
+        one is being loaded.  This is only done if there is more than one batch.  The objects
+        themselves are always loaded on the calling thread as the historian is not thread safe.
+    :param historian: the historian to use
+    """
+    historian = historian or database.get_historian()
+
+    def fetch(obj_ids: list) -> Tuple[list, dict]:
+        records = historian.records.find(obj_id=obj_ids)  # DB HIT
+        return obj_ids, {record.obj_id: record for record in records}
+
+    chunks = _iter_chunks(obj_ids, batch_size)
+    if background:
+        # A single batch has nothing to overlap with so don't bother starting a thread
+        first = list(itertools.islice(chunks, 2))
+        background = len(first) > 1
+        chunks = itertools.chain(first, chunks)
+
+    batches = map(fetch, chunks)
+    if background:
+        batches = _iter_prefetched(batches, 'pyos-load-many')
+
+    for batch_ids, records in batches:
+        for obj_id in batch_ids:
+            try:
+                try:
+                    record = records[obj_id]
+                except KeyError:
+                    raise mincepy.NotFound(obj_id) from None
+                yield record.load()
+            except Exception as exc:  # pylint: disable=broad-except
+                yield exc
 
 
 def to_obj_id(identifier):
@@ -263,7 +453,7 @@ def get_obj_id_from_path(*path: os.PathSpec) -> Iterator:
             except ValueError:
                 pass
 
-        entry = fs.find_entry(os.withdb.to_fs_path(entry))
+        entry = fs.find_entry(os.withdb.to_fs_path(entry), fields=())
         if entry is None:
             yield None
         else:
@@ -300,47 +490,3 @@ def get_oid(*identifier) -> Iterator:
                     obj_id = next(get_obj_id_from_path(path))  # pylint: disable=stop-iteration-return
 
         yield obj_id
-
-
-def _insert(obj_id,
-            dest: fs.Path,
-            overwrite=False,
-            historian: mincepy.Historian = None,
-            cache: fs.EntriesCache = None):
-    cache = cache or fs.EntriesCache(historian)
-    historian = cache.historian
-
-    try:
-        fs.insert_obj(obj_id, dest, cache=cache)  # DB HIT
-    except exceptions.FileExistsError:
-        if overwrite:
-            conflicting_id = fs.Entry.id(cache.get_entry_from_path(dest))
-            historian.delete(conflicting_id)
-            fs.remove_obj(conflicting_id, historian=historian)  # DB HIT
-
-            # Try again
-            fs.insert_obj(obj_id, dest, cache=cache)  # DB HIT
-        else:
-            raise
-
-
-def _rename(obj_id,
-            dest: fs.Path,
-            overwrite=False,
-            historian: mincepy.Historian = None,
-            cache: fs.EntriesCache = None):
-    cache = cache or fs.EntriesCache(historian)
-    historian = cache.historian
-
-    try:
-        fs.rename(src_id=obj_id, dest=dest, cache=cache)  # DB HIT
-    except exceptions.FileExistsError:
-        if overwrite:
-            conflicting_id = fs.Entry.id(cache.get_entry_from_path(dest))  # DB HIT
-            historian.delete(conflicting_id)
-            fs.remove_obj(conflicting_id, historian=historian)  # DB HIT
-
-            # Try again
-            fs.rename(src_id=obj_id, dest=dest, cache=cache)  # DB_HIT
-        else:
-            raise
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import mincepy
 import mincepy.mongo
+import pymongo
 
 from pyos import config
 from . import constants
@@ -77,8 +78,70 @@ def add_pyos_collections(historian: mincepy.Historian):
         fs_collection.insert_many(records)
 
 
+def add_abspaths(historian: mincepy.Historian, batch_size=1024):
+    """
+    Version 2.
+
+    Store the materialized absolute path on each filesystem entry so that a path can be resolved using a single
+    indexed query.  The tree is walked one level at a time starting from the root.
+    """
+    from . import fs
+
+    archive: mincepy.mongo.MongoArchive = historian.archive
+    fs_collection = archive.database[constants.FILESYSTEM_COLLECTION]
+    fs_collection.create_index(fs.Schema.ABSPATH, unique=False)
+    fs_collection.update_one({'_id': fs.ROOT_ID}, {'$set': {fs.Schema.ABSPATH: '/'}})
+
+    level = {fs.ROOT_ID: '/'}  # The directory ids at the current level and their paths
+    while level:
+        next_level = {}
+        parent_ids = list(level.keys())
+        for idx in range(0, len(parent_ids), batch_size):
+            ops = []
+            children = fs_collection.find(
+                {fs.Schema.PARENT: {
+                    '$in': parent_ids[idx:idx + batch_size]
+                }},
+                projection=[fs.Schema.PARENT, fs.Schema.NAME, fs.Schema.TYPE])
+            for child in children:
+                abspath = fs.join_abspath(level[fs.Entry.parent(child)], fs.Entry.name(child))
+                ops.append(
+                    pymongo.UpdateOne({'_id': fs.Entry.id(child)},
+                                      {'$set': {
+                                          fs.Schema.ABSPATH: abspath
+                                      }}))
+                if fs.Entry.is_dir(child):
+                    next_level[fs.Entry.id(child)] = abspath
+
+                if len(ops) >= batch_size:
+                    fs_collection.bulk_write(ops, ordered=False)
+                    ops = []
+
+            if ops:
+                fs_collection.bulk_write(ops, ordered=False)
+
+        level = next_level
+
+
+def add_time_indexes(historian: mincepy.Historian):
+    """
+    Version 3.
+
+    Index the creation and update times of filesystem entries so that the filesystem watcher can poll for recent
+    changes without scanning the whole collection.
+    """
+    from . import fs
+
+    archive: mincepy.mongo.MongoArchive = historian.archive
+    fs_collection = archive.database[constants.FILESYSTEM_COLLECTION]
+    fs_collection.create_index(fs.Schema.CTIME, unique=False)
+    fs_collection.create_index(fs.Schema.UTIME, unique=False)
+
+
 # Ordered list of migrations
 MIGRATIONS = (
     initial,
     add_pyos_collections,
+    add_abspaths,
+    add_time_indexes,
 )
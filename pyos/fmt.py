@@ -2,7 +2,7 @@
 import datetime
 import inspect
 import typing
-from typing import Mapping
+from typing import Iterable, List, Mapping
 
 
 def pretty_type_string(obj_type: typing.Type) -> str:
@@ -49,3 +49,26 @@ def pretty_datetime(value) -> str:
         return value.strftime(fmt)
 
     return str(value)
+
+
+def pretty_datetimes(values: Iterable) -> List[str]:
+    """Format a sequence of values in the same way as `pretty_datetime` but in one go.  `None`
+    values become empty strings and datetimes are only formatted once per minute."""
+    this_year = datetime.datetime.now().year
+    formatted = {}
+    result = []
+    for value in values:
+        if value is None:
+            result.append('')
+        elif isinstance(value, datetime.datetime):
+            minute = value.replace(second=0, microsecond=0)
+            try:
+                result.append(formatted[minute])
+            except KeyError:
+                string = minute.strftime('%b %d %H:%M' if minute.year == this_year else '%b %d %Y')
+                formatted[minute] = string
+                result.append(string)
+        else:
+            result.append(pretty_datetime(value))
+
+    return result
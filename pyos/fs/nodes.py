@@ -4,11 +4,11 @@ import collections.abc
 import copy
 import functools
 import io
-from typing import Dict, Sequence, Optional, Iterable, TextIO, Type
+import itertools
+from typing import Any, Callable, Dict, List, Sequence, Optional, Iterable, TextIO, Type
 
 import anytree
 import columnize
-import pandas as pd
 
 import mincepy
 
@@ -21,13 +21,20 @@ from pyos import results
 from pyos import utils
 
 __all__ = ('BaseNode', 'ContainerNode', 'DirectoryNode', 'ObjectNode', 'ResultsNode', 'to_node',
-           'TABLE_VIEW', 'LIST_VIEW', 'TREE_VIEW', 'SINGLE_COLUMN_VIEW')
+           'TABLE_VIEW', 'LIST_VIEW', 'TREE_VIEW', 'SINGLE_COLUMN_VIEW', 'PREFETCH_RECORD',
+           'PREFETCH_META', 'PREFETCH_OBJ')
 
 LIST_VIEW = 'list'
 TREE_VIEW = 'tree'
 TABLE_VIEW = 'table'
 SINGLE_COLUMN_VIEW = 'single'
 
+# The details of objects that can be fetched in bulk (see ContainerNode.prefetch())
+PREFETCH_RECORD = 'record'
+PREFETCH_META = 'meta'
+PREFETCH_OBJ = 'obj'
+PREFETCH_BATCH_SIZE = 1024
+
 CHILDREN = 'children'
 
 UNSET = tuple()
@@ -127,7 +134,7 @@ class FilesystemNode(BaseNode):
         # First we have to try and get a filesystem entry
         if entry is None:
             if entry_id is not None:
-                entry = db.fs.get_entry(entry_id, include_path=True, historian=historian)  # DB HIT
+                entry = db.fs.get_entry(entry_id, historian=historian)  # DB HIT
                 if entry is None:
                     raise exceptions.FileNotFoundError(entry_id)
             elif path is not None:
@@ -189,6 +196,10 @@ class ContainerNode(BaseNode):
         'abspath': 'left'
     }
 
+    # Listings are rendered in pages of this many children so that large ones start printing
+    # straight away
+    RENDER_PAGE_SIZE = 1000
+
     _view_mode = TABLE_VIEW
     _show = {'name'}
 
@@ -263,17 +274,21 @@ class ContainerNode(BaseNode):
             return stream.getvalue()
 
     def __stream_out__(self, stream: TextIO):
-        if self._view_mode == TREE_VIEW:
-            self._render_tree(stream)
+        try:
+            if self._view_mode == TREE_VIEW:
+                self._render_tree(stream)
 
-        elif self._view_mode == TABLE_VIEW:
-            self._render_table(stream)
+            elif self._view_mode == TABLE_VIEW:
+                self._render_table(stream)
 
-        elif self._view_mode == LIST_VIEW:
-            self._render_list(stream)
+            elif self._view_mode == LIST_VIEW:
+                self._render_list(stream)
 
-        elif self._view_mode == SINGLE_COLUMN_VIEW:
-            self._render_single(stream)
+            elif self._view_mode == SINGLE_COLUMN_VIEW:
+                self._render_single(stream)
+        finally:
+            # Prefetched details aren't updated when the objects change so only keep them until they have been shown
+            self._clear_prefetched()
 
     @property
     def directories(self) -> Iterable['DirectoryNode']:
@@ -304,62 +319,131 @@ class ContainerNode(BaseNode):
         if properties:
             self._show = set(properties)
 
-    def _get_row(self, child) -> Sequence[str]:
-        # pylint: disable=too-many-branches
+    def prefetch(self, *what: str, batch_size=PREFETCH_BATCH_SIZE):
+        """Fetch the given details ('record', 'meta' and/or 'obj') of all the objects in this
+        container using one query per batch of objects rather than one per object.  The prefetched
+        details are kept until this container is next rendered after which they are fetched again
+        when needed."""
+        objects = list(self.objects)
+        for idx in range(0, len(objects), batch_size):
+            _prefetch(objects[idx:idx + batch_size], what, self._hist)
+
+    def _clear_prefetched(self):
+        """Drop any prefetched details of the child objects that have been retrieved so far"""
+        # pylint: disable=protected-access, import-outside-toplevel
+        from pyos import psh_lib
+
+        children = self._children
+        if isinstance(children, psh_lib.results.CachingResults):
+            children = children.cached
+        for child in children:
+            if isinstance(child, ObjectNode):
+                child._clear_prefetched()
+
+    def to_dataframe(self):
+        """Get the currently shown properties of the children as a pandas DataFrame.  This requires
+        pandas to be installed."""
+        import pandas  # pylint: disable=import-outside-toplevel
+
+        shown = [prop for prop in self.VIEW_PROPERTIES if prop in self._show]
+        return pandas.DataFrame(dict(zip(shown, self._get_columns(list(self)))))
+
+    def _get_columns(self, children: Sequence) -> List[List[str]]:
+        """Get the formatted columns of the currently shown properties for the given children"""
+        return [
+            self._get_column(prop, children) for prop in self.VIEW_PROPERTIES if prop in self._show
+        ]
+
+    def _get_column(self, prop: str, children: Sequence) -> List[str]:
+        # pylint: disable=too-many-return-statements
         empty = ''
-        row = []
-
-        if 'loaded' in self._show:
-            try:
-                row.append('*' if child.loaded else '')
-            except AttributeError:
-                row.append(empty)
-
-        if 'type' in self._show:
-            try:
-                row.append(fmt.pretty_type_string(child.type))
-            except AttributeError:
-                row.append('directory')
-            except TypeError:
-                row.append(str(child.type_id))
-
-        if 'creator' in self._show:
-            row.append(getattr(child, 'creator', empty))
-
-        if 'version' in self._show:
-            row.append(str(getattr(child, 'version', empty)))
-
-        if 'ctime' in self._show:
-            try:
-                row.append(fmt.pretty_datetime(child.ctime))
-            except AttributeError:
-                row.append(empty)
-
-        if 'mtime' in self._show:
-            try:
-                row.append(fmt.pretty_datetime(child.stime))
-            except AttributeError:
-                row.append(empty)
-
-        if 'name' in self._show:
-            row.append(getattr(child, 'name', empty))
 
-        if 'str' in self._show:
-            try:
-                row.append(str(getattr(child, 'obj', empty))[:30])
-            except (TypeError, mincepy.ObjectDeleted):
-                row.append(empty)
-
-        if 'abspath' in self._show:
-            row.append(str(getattr(child, 'abspath', empty)))
-
-        if 'relpath' in self._show:
-            try:
-                row.append(os.path.relpath(child.abspath))
-            except AttributeError:
-                row.append(empty)
-
-        return row
+        if prop in ('type', 'version', 'ctime', 'mtime'):
+            # These come straight from the filesystem entries of the objects
+            is_obj = [isinstance(child, ObjectNode) for child in children]
+            if prop == 'type':
+                return self._get_type_column(children, is_obj)
+            if prop == 'version':
+                return [
+                    str(child.version) if obj else empty for child, obj in zip(children, is_obj)
+                ]
+            values = [getattr(child, prop) if obj else None for child, obj in zip(children, is_obj)]
+            return fmt.pretty_datetimes(values)
+
+        if prop == 'name':
+            return [child.name for child in children]
+
+        if prop == 'loaded':
+            return ['*' if getattr(child, 'loaded', False) else empty for child in children]
+
+        if prop == 'creator':
+            return [getattr(child, 'creator', empty) for child in children]
+
+        if prop == 'str':
+            column = []
+            for child in children:
+                try:
+                    column.append(str(getattr(child, 'obj', empty))[:30])
+                except (TypeError, mincepy.ObjectDeleted):
+                    column.append(empty)
+            return column
+
+        if prop == 'abspath':
+            return [str(getattr(child, 'abspath', empty)) for child in children]
+
+        if prop == 'relpath':
+            return [
+                os.path.relpath(child.abspath) if hasattr(child, 'abspath') else empty
+                for child in children
+            ]
+
+        raise ValueError(f"Unknown view property '{prop}'")
+
+    def _get_type_column(self, children: Sequence, is_obj: Sequence[bool]) -> List[str]:
+        """Get the type column, the names of all the distinct types are looked up in one go"""
+        type_ids = [child.type_id if obj else None for child, obj in zip(children, is_obj)]
+        names = _get_type_names(self._hist).get_many(
+            type_id for type_id, obj in zip(type_ids, is_obj) if obj)
+        return [names[type_id] if obj else 'directory' for type_id, obj in zip(type_ids, is_obj)]
+
+    def _get_rows(self, children: Sequence) -> List[Sequence[str]]:
+        return list(zip(*self._get_columns(children))) if children else []
+
+    def _write_table(self, children: Sequence, stream: TextIO):
+        """Write the children as rows of a table with aligned columns"""
+        stream.write('\n'.join(self._get_table_lines(children)))
+
+    def _get_table_lines(self, children: Sequence, widths: Sequence[int] = None) -> List[str]:
+        """Get the lines of the table of the given children.  If the column widths aren't passed the widest value in
+        each column is used."""
+        shown = [prop for prop in self.VIEW_PROPERTIES if prop in self._show]
+        columns = []
+        for idx, (prop, column) in enumerate(zip(shown, self._get_columns(children))):
+            width = max(map(len, column), default=0) if widths is None else widths[idx]
+            if self.JUSTIFICATIONS.get(prop, 'right') == 'left':
+                columns.append([value.ljust(width) for value in column])
+            else:
+                columns.append([value.rjust(width) for value in column])
+
+        return [' '.join(row).rstrip() for row in zip(*columns)]
+
+    def _get_column_widths(self, pages: Iterable[Sequence]) -> List[int]:
+        """Get the width of each of the shown columns over all the passed pages of children"""
+        widths = []
+        for page in pages:
+            page_widths = [max(map(len, column), default=0) for column in self._get_columns(page)]
+            widths = list(map(max, widths, page_widths)) if widths else page_widths
+        return widths
+
+    @staticmethod
+    def _send_lines(children: Sequence, lines: Sequence[str], stream: TextIO):
+        """Write one line for each child.  If the stream can carry items (e.g. a psh pipe) the children are sent along
+        with their lines so that whoever reads them doesn't have to look them up again."""
+        send_many = getattr(stream, 'send_many', None)
+        if send_many is None:
+            stream.write(''.join(f'{line}\n' for line in lines))
+        else:
+            send_many(children, lines)
 
     def _render_tree(self, stream: TextIO):
         """Render this node as a tree"""
@@ -373,41 +457,51 @@ class ContainerNode(BaseNode):
         """Render this node as a table"""
         if self._deeply_nested():
             # Do the objects first, like linux's 'ls'
-            table = self._get_table(self.objects)
-            if table:
-                stream.write(pd.DataFrame(table).to_string(index=False, header=False))
+            objects = list(self.objects)
+            if objects:
+                self._write_table(objects, stream)
                 stream.write('\n')
 
             for directory in self.directories:
                 stream.write(f'{directory.name}:')
-                table = self._get_table(directory)
-                if table:
-                    stream.write(pd.DataFrame(table).to_string(index=False, header=False))
+                if len(directory) > 0:
+                    self._write_table(directory.children, stream)
                 stream.write('\n')
         else:
-            table = self._get_table(self.directories)
-            table.extend(self._get_table(self.objects))
-            if table:
-                stream.write(pd.DataFrame(table).to_string(index=False, header=False))
-                stream.write('\n')
+            # Directories first, then objects.  If there is more than one page the column widths are found over all
+            # of them first so that the columns line up from one page to the next.
+            pages = list(self._iter_pages(itertools.chain(self.directories, self.objects)))
+            widths = self._get_column_widths(pages) if len(pages) > 1 else None
+            for page in pages:
+                self._send_lines(page, self._get_table_lines(page, widths), stream)
+                stream.flush()
 
     def _render_list(self, stream: TextIO):
         if stream.isatty():
-            repr_list = []
-            for child in self:
-                repr_list.append('-'.join(self._get_row(child)))
-
+            # The grid can only be laid out once all the entries are known
+            repr_list = [
+                '-'.join(row) for page in self._iter_pages() for row in self._get_rows(page)
+            ]
             stream.write(columnize.columnize(repr_list, displaywidth=utils.get_terminal_width()))
         else:
-            for child in self:
-                stream.write('-'.join(self._get_row(child)) + '\n')
+            self._render_single(stream)
 
     def _render_single(self, stream: TextIO):
-        for child in self:
-            stream.write('-'.join(self._get_row(child)) + '\n')
-
-    def _get_table(self, entry) -> list:
-        return [self._get_row(child) for child in entry]
+        for page in self._iter_pages():
+            self._send_lines(page, ['-'.join(row) for row in self._get_rows(page)], stream)
+
+    def _iter_pages(self, children: Iterable = None) -> Iterable[list]:
+        """Iterate over the children (or those passed) a page at a time"""
+        children = iter(self if children is None else children)
+        while True:
+            page = list(itertools.islice(children, self.RENDER_PAGE_SIZE))
+            if not page:
+                return
+            yield page
+
+    def close(self):
+        if isinstance(self._children, results.BaseResults):
+            self._children.close()
 
     def _deeply_nested(self) -> bool:
         """Returns True if we have any nodes that themselves have children"""
@@ -433,6 +527,9 @@ class DirectoryNode(ContainerNode, FilesystemNode):
                          historian=historian)
         if not db.fs.Entry.is_dir(self._entry):
             raise exceptions.NotADirectoryError(path)
+        self._expand_depth = 0
+        self._expand_opts = {}  # The sorting and paging options used when last expanded
+        self._stale = False
 
     def __repr__(self):
         with io.StringIO() as stream:
@@ -452,67 +549,115 @@ class DirectoryNode(ContainerNode, FilesystemNode):
             self.expand()
         return super().__contains__(item)
 
-    def expand(self, depth=1, populate_objects=False):  # pylint: disable=unused-argument
-        """Populate the children with what is currently in the database
+    @property
+    def children(self) -> Sequence['BaseNode']:
+        if self._stale:
+            # Our contents have changed since we were expanded so do it again
+            self.expand(self._expand_depth, **self._expand_opts)
+        return self._children
+
+    def _deeply_nested(self) -> bool:
+        if self._expand_depth == 1 and CHILDREN not in self._entry:
+            # Our child directories haven't been expanded so there's no need to go through them all
+            return False
+        return super()._deeply_nested()
+
+    def invalidate_children(self):
+        """Mark the children as being out of date so that they are re-read from the database when next needed.
+        This is called by the filesystem watcher (if running) when another client changes this directory."""
+        self._stale = True
+
+    def close(self):
+        if isinstance(self._children, results.BaseResults):
+            super().close()
+            # We may not have got all of our children
+            self._stale = True
+
+    def expand(self,
+               depth=1,
+               populate_objects=False,
+               sort: str = None,
+               reverse=False,
+               limit: int = None):
+        """Populate the children with what is currently in the database.  The children are fetched
+        lazily as they are iterated over.
 
         :param depth: expand to the given depth, 0 means no expansion, 1 means my child nodes, etc
         :param populate_objects: if True objects will have their records fetched immediately (as
             opposed to lazily when needed).  This gives a large speedup when the client knows that
             the all or most of the details of the child objects will be needed as they can be
-            fetched in one call.
+            fetched in one call.  A sequence of the details to fetch can also be passed (see
+            `prefetch()`).
+        :param sort: sort the children by 'name', 'ctime' or 'mtime' (see db.fs.SORT_KEYS)
+        :param reverse: reverse the sort order
+        :param limit: only get this many children
         """
         self._children = []
+        self._expand_depth = depth
+        self._expand_opts = {'sort': sort, 'reverse': reverse, 'limit': limit}
+        self._stale = False
         if depth == 0:
             return
 
+        watcher = _get_watcher(self._hist)
+        if watcher is not None:
+            watcher.watch_directory(self)
+
         if depth > 0:
             child_expand_depth = depth - 1
         else:
             child_expand_depth = -1
 
+        if populate_objects is True:
+            populate_objects = (PREFETCH_RECORD,)
+
         if CHILDREN in self._entry:
             self._children = self._entry[CHILDREN]
         else:
             from pyos import psh_lib
 
-            def yield_results():
-                for child in db.fs.iter_children(self.entry_id, historian=self._hist):
-                    path = os.path.join(self._abspath, db.fs.Entry.name(child))
-                    if db.fs.Entry.is_dir(child):
-                        dir_node = DirectoryNode(path,
-                                                 parent=self,
-                                                 entry=child,
-                                                 historian=self._hist)
-                        if abs(child_expand_depth) > 0:
-                            dir_node.expand(child_expand_depth)
-
-                        yield dir_node
-                    else:
-                        obj_node = ObjectNode(db.fs.Entry.id(child),
-                                              path=path,
-                                              parent=self,
-                                              entry=child,
-                                              historian=self._hist)
-                        yield obj_node
+            def create_node(child: Dict) -> FilesystemNode:
+                path = os.path.join(self._abspath, db.fs.Entry.name(child))
+                if db.fs.Entry.is_dir(child):
+                    dir_node = DirectoryNode(path, parent=self, entry=child, historian=self._hist)
+                    if abs(child_expand_depth) > 0:
+                        dir_node.expand(child_expand_depth, sort=sort, reverse=reverse)
 
-            self._children = psh_lib.results.CachingResults(yield_results())
+                    return dir_node
 
-    def delete(self):
-        # 1. Find all filesystem entries that need to be deleted
-        descendents = tuple(db.fs.iter_descendents(self.entry_id, historian=self._hist))
+                return ObjectNode(db.fs.Entry.id(child),
+                                  path=path,
+                                  parent=self,
+                                  entry=child,
+                                  historian=self._hist)
 
-        obj_ids = tuple(db.fs.Entry.id(entry) for entry in descendents if db.fs.Entry.is_obj(entry))
+            def yield_results():
+                children = db.fs.iter_children(self.entry_id,
+                                               sort=sort,
+                                               reverse=reverse,
+                                               limit=limit,
+                                               historian=self._hist)
+                if not populate_objects:
+                    yield from map(create_node, children)
+                    return
+
+                while True:
+                    nodes = list(map(create_node, itertools.islice(children, PREFETCH_BATCH_SIZE)))
+                    if not nodes:
+                        return
+                    _prefetch([node for node in nodes if isinstance(node, ObjectNode)],
+                              populate_objects, self._hist)
+                    yield from nodes
 
-        # 2. Delete the objects
-        if obj_ids:
-            with self._hist.transaction():
-                self._hist.delete(*obj_ids)
+            self._children = psh_lib.results.CachingResults(yield_results())
 
-        # 3. Delete the filesystem entries
-        # pylint: disable=protected-access
-        db.fs._delete_entries(*map(db.fs.Entry.id, descendents + (self._entry,)),
-                              historian=self._hist)
+    def delete(self, progress: Callable[[int], Any] = None):
+        """Delete this directory, its contents and the objects within it.  This is done in batches
+        (see db.fs.delete_tree) so it can simply be called again if interrupted.
 
+        :param progress: called with the number of filesystem entries deleted after each batch
+        """
+        db.fs.delete_tree(self.entry_id, progress=progress, historian=self._hist)
         self._invalidate_cache()
 
     def move(self, dest: os.PathSpec, overwrite=False):
@@ -529,7 +674,7 @@ class DirectoryNode(ContainerNode, FilesystemNode):
 class ObjectNode(FilesystemNode):
     """A node that represents an object"""
 
-    __slots__ = '_obj_id', '_record', '_children'
+    __slots__ = '_obj_id', '_record', '_obj', '_meta', '_children'
 
     @classmethod
     def from_path(cls, path: os.PathLike, historian: mincepy.Historian = None):
@@ -568,6 +713,8 @@ class ObjectNode(FilesystemNode):
 
         self._obj_id = obj_id
         self._record = record  # This will be lazily loaded if None
+        self._obj = UNSET  # These are only kept if prefetched
+        self._meta = UNSET
         self._children = tuple()  # Can't have any children
 
     def __contains__(self, item):
@@ -602,6 +749,8 @@ class ObjectNode(FilesystemNode):
 
     @property
     def obj(self) -> object:
+        if self._obj is not UNSET:
+            return self._obj
         return self.record.load()
 
     @property
@@ -634,8 +783,14 @@ class ObjectNode(FilesystemNode):
 
     @property
     def meta(self) -> Optional[Dict]:
+        if self._meta is not UNSET:
+            return self._meta
         return self._hist.meta.get(self._obj_id)
 
+    def _clear_prefetched(self):
+        self._obj = UNSET
+        self._meta = UNSET
+
     def delete(self):
         self._hist.delete(self._obj_id, imperative=False)
 
@@ -716,3 +871,86 @@ def _(path: os.PathLike, historian: mincepy.Historian = None):
 
     # Must be object
     return ObjectNode(db.fs.Entry.id(fs_entry), path=path, entry=fs_entry, historian=historian)
+
+
+def _prefetch(nodes: Sequence[ObjectNode], what: Iterable[str], historian: mincepy.Historian):
+    """Fetch the given details of the object nodes in bulk"""
+    # pylint: disable=protected-access
+    what = set(what)
+    unknown = what - {PREFETCH_RECORD, PREFETCH_META, PREFETCH_OBJ}
+    if unknown:
+        raise ValueError(f'Unknown details to prefetch: {unknown}')
+    if not nodes:
+        return
+
+    if PREFETCH_OBJ in what:
+        _prefetch_live_objs(nodes, historian)
+    if what & {PREFETCH_RECORD, PREFETCH_OBJ}:
+        _prefetch_records(nodes, PREFETCH_RECORD in what, historian)
+    if PREFETCH_OBJ in what:
+        _load_objs(nodes)
+    if PREFETCH_META in what:
+        _prefetch_metas(nodes, historian)
+
+
+def _prefetch_live_objs(nodes: Sequence[ObjectNode], historian: mincepy.Historian):
+    """Set the objects of any nodes that are already live, these don't need their records"""
+    # pylint: disable=protected-access
+    for node in nodes:
+        try:
+            node._obj = historian.get_obj(node.obj_id)
+        except mincepy.NotFound:
+            pass
+
+
+def _prefetch_records(nodes: Sequence[ObjectNode], all_records: bool, historian: mincepy.Historian):
+    """Fetch the records of the nodes that don't have them.  Unless `all_records` is True nodes that already have a
+    live object are skipped."""
+    # pylint: disable=protected-access
+    need_record = {
+        node.obj_id: node
+        for node in nodes
+        if node._record is None and (all_records or node._obj is UNSET)
+    }
+    if need_record:
+        for record in historian.records.find(obj_id=list(need_record.keys())):
+            need_record[record.obj_id]._record = record
+
+
+def _load_objs(nodes: Sequence[ObjectNode]):
+    """Load the objects of the nodes that have a record but no object yet"""
+    # pylint: disable=protected-access
+    for node in nodes:
+        if node._obj is UNSET and node._record is not None:
+            try:
+                node._obj = node._record.load()
+            except Exception:  # pylint: disable=broad-except
+                # Leave it to be loaded (and raise) lazily
+                pass
+
+
+def _prefetch_metas(nodes: Sequence[ObjectNode], historian: mincepy.Historian):
+    """Fetch the metadata of all the nodes in one query"""
+    # pylint: disable=protected-access
+    metas = dict(historian.meta.find({}, obj_id=[node.obj_id for node in nodes]))
+    for node in nodes:
+        node._meta = metas.get(node.obj_id, None)
+
+
+def _get_type_names(historian: mincepy.Historian) -> db.cache.TypeNames:
+    """Get the type names table of the current session, or a new one if the session is not using the
+    passed historian"""
+    session = db.get_session()
+    if session is None or session.historian is not historian:
+        return db.cache.TypeNames(historian)
+
+    return session.type_names
+
+
+def _get_watcher(historian: mincepy.Historian) -> Optional[db.watch.FsWatcher]:
+    """Get the filesystem watcher of the current session if it is watching the passed historian"""
+    session = db.get_session()
+    if session is None or session.historian is not historian:
+        return None
+
+    return session.watcher
@@ -1,4 +1,12 @@
 # -*- coding: utf-8 -*-
+import collections
+import concurrent.futures
+import functools
+import itertools
+import queue
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List
+
 import mincepy
 import mincepy.frontend
 
@@ -7,7 +15,24 @@ from pyos import os
 from pyos import db
 from . import nodes
 
-__all__ = ('find',)
+__all__ = ('find', 'TREE_FIRST', 'FILTER_FIRST')
+
+# Search strategies used by find
+TREE_FIRST = 'tree-first'  # Walk the tree below the starting point and filter the objects found
+FILTER_FIRST = 'filter-first'  # Find the matching objects and then check if they are below the starting point
+
+# The filter-first strategy will only be chosen automatically if there are at most this many matching objects
+FILTER_FIRST_MAX = 10000
+
+# When searching concurrently, directories with at least this many entries below them are split into a part for the
+# objects directly inside and one for each subdirectory (as long as there are at most SPLIT_MAX_SUBDIRS of them) so
+# that these can be searched in parallel
+SPLIT_THRESHOLD = 10000
+SPLIT_MAX_SUBDIRS = 64
+# The number of matching entries passed back from a worker thread at a time
+FIND_BATCH_SIZE = 1024
+
+SearchPart = Callable[[], Iterator[Dict]]
 
 
 # pylint: disable=redefined-builtin
@@ -18,7 +43,10 @@ def find(*starting_point,
          obj_filter: mincepy.Expr = None,
          mindepth=0,
          maxdepth=-1,
-         historian: mincepy.Historian = None) -> nodes.FrozenResultsNode:
+         strategy: str = None,
+         historian: mincepy.Historian = None,
+         workers: int = None,
+         ordered=False) -> nodes.FrozenResultsNode:
     """
     Find objects matching the given criteria
 
@@ -28,9 +56,18 @@ def find(*starting_point,
     :param type: restrict the search to this type (can be a tuple of types)
     :param mindepth: the minimum depth from the starting point(s) to search in
     :param maxdepth: the maximum depth from the starting point(s) to search in
+    :param strategy: the search strategy, either TREE_FIRST or FILTER_FIRST.  If None, the strategy is chosen for
+        each starting point by comparing (capped) counts of the number of entries below it and the number of objects
+        matching the filters
     :param historian: the Historian to use
+    :param workers: if greater than one, the starting points (and any large directories below them) are searched
+        concurrently using this many threads and the results are streamed back as they are found
+    :param ordered: when searching concurrently, yield the results in a deterministic order (by starting point and
+        then by the parts that each was split into) rather than as soon as they are found
     :return: results node
     """
+    if strategy not in (None, TREE_FIRST, FILTER_FIRST):
+        raise ValueError(f'Unknown search strategy: {strategy}')
     if not starting_point:
         starting_point = (os.getcwd(),)
 
@@ -43,46 +80,274 @@ def find(*starting_point,
     if state:
         expr &= mincepy.build_expr(mincepy.frontend.flatten_filter('state', state)[0])
 
+    search = {
+        'obj_filter': expr,
+        'obj_type': type,
+        'meta_filter': meta,
+        'mindepth': mindepth,
+        'maxdepth': maxdepth,
+        'strategy': strategy,
+        'historian': historian,
+    }
+
     def yield_results():
-        for path in starting_point:
-            for matching in _iter_matching(path,
-                                           obj_filter=expr,
-                                           obj_type=type,
-                                           meta_filter=meta,
-                                           mindepth=mindepth,
-                                           maxdepth=maxdepth,
-                                           historian=historian):
-                descendent_path = db.fs.Entry.path(matching)
-                path = os.withdb.from_fs_path(descendent_path)
-                yield nodes.ObjectNode(db.fs.Entry.id(matching), path)
+        if workers is not None and workers > 1:
+            matches = _ConcurrentSearch(workers).iter_matching(starting_point, ordered, **search)
+        else:
+            matches = _iter_all_matching(starting_point, **search)
+
+        try:
+            for matching in matches:
+                path = os.withdb.from_fs_path(db.fs.Entry.path(matching))
+                # Pass the entry along so that the node doesn't have to look it up again
+                yield nodes.ObjectNode(db.fs.Entry.id(matching),
+                                       path,
+                                       entry=matching,
+                                       historian=historian)
+        finally:
+            matches.close()
 
     results = nodes.FrozenResultsNode(pyos.psh_lib.CachingResults(yield_results()))
     results.show('relpath', mode=nodes.SINGLE_COLUMN_VIEW)
     return results
 
 
-def _iter_matching(path, obj_filter, obj_type, meta_filter, mindepth: int, maxdepth: int,
-                   historian: mincepy.Historian):
+def _iter_all_matching(starting_point: Iterable, **search) -> Iterator[Dict]:
+    for path in starting_point:
+        for part in _plan_search(path, **search):
+            yield from part()
+
+
+def _plan_search(path,
+                 obj_filter,
+                 obj_type,
+                 meta_filter,
+                 mindepth: int,
+                 maxdepth: int,
+                 strategy: str,
+                 historian: mincepy.Historian,
+                 split=False) -> List[SearchPart]:
+    """Plan the search from the given starting point.  Returns the parts of the search, each of which is a callable
+    returning an iterator over the matching entries.
+
+    :param split: split the walk of any large directories into parts that can be searched concurrently
+    """
     # Find the filesystem entry we're looking for
     start_fs_path = os.withdb.to_fs_path(path)
     entry = db.fs.find_entry(start_fs_path, historian=historian)
     entry_id = db.fs.Entry.id(entry)
 
     if db.fs.Entry.is_obj(entry):
-        if mindepth == 0:
-            entry[db.fs.Schema.PATH] = path
-            yield entry
-    else:
-        yield from _iter_descendents(
-            entry_id,
-            start_fs_path,
-            obj_filter=obj_filter,
-            obj_type=obj_type,
-            meta_filter=meta_filter,
-            mindepth=mindepth,
-            maxdepth=maxdepth,
-            historian=historian,
-        )
+        if mindepth != 0:
+            return []
+        entry[db.fs.Schema.PATH] = start_fs_path
+        return [functools.partial(iter, (entry,))]
+
+    obj_ids = None
+    if strategy != TREE_FIRST:
+        obj_ids = _find_obj_ids(entry_id,
+                                obj_filter,
+                                obj_type,
+                                meta_filter,
+                                force=strategy == FILTER_FIRST,
+                                historian=historian)
+
+    walk = functools.partial(_iter_descendents,
+                             obj_filter=obj_filter,
+                             obj_type=obj_type,
+                             meta_filter=meta_filter,
+                             mindepth=mindepth,
+                             maxdepth=maxdepth,
+                             historian=historian)
+    if obj_ids is not None or not split:
+        return [functools.partial(walk, entry_id, start_fs_path, obj_ids=obj_ids)]
+
+    return _split_walk(walk, entry_id, start_fs_path, 0, maxdepth, historian)
+
+
+def _split_walk(walk: Callable, dir_fsid, path: db.fs.Path, depth: int, maxdepth: int,
+                historian: mincepy.Historian) -> List[SearchPart]:
+    """Split the walk below the given directory into a part for the objects directly inside it and parts for each of
+    its subdirectories (which are split in turn), if there are enough entries below it to make this worthwhile"""
+    whole = [functools.partial(walk, dir_fsid, path, depth=depth)]
+    if maxdepth != -1 and depth + 1 >= maxdepth:
+        return whole
+    if db.fs.count_descendents(dir_fsid, limit=SPLIT_THRESHOLD,
+                               historian=historian) < SPLIT_THRESHOLD:
+        return whole
+
+    subdirs = list(
+        db.fs.iter_children(dir_fsid,
+                            type=db.fs.Schema.TYPE_DIR,
+                            sort='name',
+                            limit=SPLIT_MAX_SUBDIRS + 1,
+                            fields=(db.fs.Schema.NAME,),
+                            historian=historian))
+    if len(subdirs) > SPLIT_MAX_SUBDIRS:
+        return whole
+
+    parts = [functools.partial(walk, dir_fsid, path, depth=depth, maxdepth=depth + 1)]
+    for subdir in subdirs:
+        parts.extend(
+            _split_walk(walk, db.fs.Entry.id(subdir), path + (db.fs.Entry.name(subdir),), depth + 1,
+                        maxdepth, historian))
+    return parts
+
+
+# Messages passed back from the worker threads of a concurrent search
+_PLAN = 'plan'
+_BATCH = 'batch'
+_DONE = 'done'
+_ERROR = 'error'
+
+
+class _ConcurrentSearch:
+    """Searches from many starting points using a pool of worker threads that share the historian's MongoClient.
+    The search from each starting point is first planned (and split into parts if it is large) on a worker thread and
+    then the parts are searched concurrently with the matching entries being passed back a batch at a time."""
+
+    def __init__(self, workers: int):
+        self._workers = workers
+        self._executor = concurrent.futures.ThreadPoolExecutor(workers,
+                                                               thread_name_prefix='pyos-find')
+        self._futures: List[concurrent.futures.Future] = []
+        self._cancelled = threading.Event()
+
+    def iter_matching(self, starting_point: Iterable, ordered: bool, **search) -> Iterator[Dict]:
+        """Iterate over the entries matching the search from all the starting points"""
+        try:
+            if ordered:
+                yield from self._iter_ordered(starting_point, search)
+            else:
+                yield from self._iter_unordered(starting_point, search)
+        finally:
+            self.cancel()
+
+    def cancel(self):
+        """Stop the search, any parts still running will stop the next time that they pass back a batch"""
+        self._cancelled.set()
+        for future in self._futures:
+            future.cancel()
+        self._executor.shutdown(wait=False)
+
+    def _iter_unordered(self, starting_point: Iterable, search: dict) -> Iterator[Dict]:
+        """Yield the matches as soon as they are found by any of the workers"""
+        results = queue.Queue(maxsize=2 * self._workers)
+        pending = 0  # The number of plans and parts that haven't finished yet
+        for path in starting_point:
+            self._submit(self._plan, path, search, results)
+            pending += 1
+
+        while pending:
+            kind, value = results.get()
+            if kind == _BATCH:
+                yield from value
+            elif kind == _PLAN:
+                pending += len(value) - 1
+                for part in value:
+                    self._submit(self._run, part, results)
+            elif kind == _DONE:
+                pending -= 1
+            else:
+                raise value
+
+    def _iter_ordered(self, starting_point: Iterable, search: dict) -> Iterator[Dict]:
+        """Yield the matches from each part in turn.  Parts are started in this order and at most one more than there
+        are workers are started at a time so that the part being consumed is always running."""
+        plans = [self._submit(_plan_search, path, split=True, **search) for path in starting_point]
+        parts = itertools.chain.from_iterable(plan.result() for plan in plans)
+
+        def start(part: SearchPart) -> queue.Queue:
+            results = queue.Queue(maxsize=2)
+            self._submit(self._run, part, results)
+            return results
+
+        running = collections.deque(map(start, itertools.islice(parts, self._workers)))
+        while running:
+            results = running.popleft()
+            running.extend(map(start, itertools.islice(parts, 1)))
+            while True:
+                kind, value = results.get()
+                if kind == _BATCH:
+                    yield from value
+                elif kind == _DONE:
+                    break
+                else:
+                    raise value
+
+    def _submit(self, func: Callable, *args, **kwargs) -> concurrent.futures.Future:
+        future = self._executor.submit(func, *args, **kwargs)
+        self._futures.append(future)
+        return future
+
+    def _plan(self, path, search: dict, results: queue.Queue):
+        try:
+            self._put(results, (_PLAN, _plan_search(path, split=True, **search)))
+        except Exception as exc:  # pylint: disable=broad-except
+            self._put(results, (_ERROR, exc))
+
+    def _run(self, part: SearchPart, results: queue.Queue):
+        """Search one part passing back batches of matches followed by a done message"""
+        try:
+            entries = part()
+            try:
+                while True:
+                    batch = list(itertools.islice(entries, FIND_BATCH_SIZE))
+                    if batch and not self._put(results, (_BATCH, batch)):
+                        return
+                    if len(batch) < FIND_BATCH_SIZE:
+                        break
+            finally:
+                close = getattr(entries, 'close', None)
+                if close is not None:
+                    close()
+        except Exception as exc:  # pylint: disable=broad-except
+            self._put(results, (_ERROR, exc))
+        else:
+            self._put(results, (_DONE, None))
+
+    def _put(self, results: queue.Queue, message) -> bool:
+        """Put a message in the results queue, returns False if the search was cancelled before it could be"""
+        while not self._cancelled.is_set():
+            try:
+                results.put(message, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+
+        return False
+
+
+def _find_obj_ids(dir_fsid,
+                  obj_filter,
+                  obj_type,
+                  meta_filter,
+                  force=False,
+                  historian: mincepy.Historian = None):
+    """Plan a search below the given directory.  If it is estimated to be cheaper to find the objects matching the
+    filters first (because there are fewer of them than there are entries below the directory) then the ids of the
+    matching objects are returned, otherwise None is returned meaning that the tree should be walked instead.
+
+    :param force: always use the filter-first strategy
+    """
+    historian = historian or pyos.db.get_historian()
+    limit = None
+    if not force:
+        if isinstance(obj_filter, mincepy.Empty) and obj_type is None and not meta_filter:
+            # Everything matches so it can only be cheaper to walk the tree
+            return None
+
+        # Only find up to as many objects as there are entries in the tree as any more will not be the cheapest option
+        limit = min(db.fs.count_descendents(dir_fsid, limit=FILTER_FIRST_MAX, historian=historian),
+                    FILTER_FIRST_MAX) + 1
+
+    # pylint: disable=protected-access
+    records = historian.records.find(obj_filter, obj_type=obj_type, meta=meta_filter, limit=limit)
+    obj_ids = [record[mincepy.OBJ_ID] for record in records._project(mincepy.OBJ_ID)]
+    if limit is not None and len(obj_ids) >= limit:
+        return None
+
+    return obj_ids
 
 
 def _iter_descendents(dir_fsid,
@@ -92,6 +357,8 @@ def _iter_descendents(dir_fsid,
                       meta_filter=None,
                       mindepth=0,
                       maxdepth=-1,
+                      obj_ids=None,
+                      depth=0,
                       historian: mincepy.Historian = None):
     # Find the filesystem entry we're looking for
     historian = historian or pyos.db.get_historian()
@@ -103,7 +370,9 @@ def _iter_descendents(dir_fsid,
         obj_type=obj_type,
         meta_filter=meta_filter,
         max_depth=maxdepth if maxdepth != -1 else None,
+        depth=depth,
         path=start_path,
+        obj_ids=obj_ids,
         historian=historian)
 
     for descendent in objects_iter:
@@ -1,13 +1,17 @@
 # -*- coding: utf-8 -*-
-"""Filename globbing utility."""
+"""Filename globbing utility.
+
+This follows CPython's glob but rather than listing directories one at a time each level of the pattern is resolved
+for all the candidate directories at once: literal names are looked up using the (parent, name) index, wildcards are
+translated into regular expressions on the name that are evaluated by the database and '**' becomes a single scan of
+the descendents of each candidate directory.
+"""
 
-import contextlib
 import re
-import fnmatch
 import itertools
 
+from pyos import db
 from pyos import os
-from pyos import exceptions
 
 __all__ = ['glob', 'iglob', 'escape']
 
@@ -72,54 +76,118 @@ def _iglob(pathname, root_dir, recursive, dironly, include_hidden=False):
         return
     if not dirname:
         if recursive and _isrecursive(basename):
-            yield from _glob2(root_dir, basename, dironly, include_hidden=include_hidden)
+            glob_in_dirs = _glob2_many
         else:
-            yield from _glob1(root_dir, basename, dironly, include_hidden=include_hidden)
+            glob_in_dirs = _glob1_many
+        for _dirname, name in glob_in_dirs(root_dir, [dirname], basename, dironly, include_hidden):
+            yield name
         return
     # `os.path.split()` returns the argument itself as a dirname if it is a
     # drive or UNC path.  Prevent an infinite recursion if a drive or UNC path
     # contains magic characters (i.e. r'\\?\C:').
     if dirname != pathname and has_magic(dirname):
-        dirs = _iglob(dirname, root_dir, recursive, True, include_hidden=include_hidden)
+        # Resolve the whole of the previous level so that this one can be done in one go
+        dirs = list(_iglob(dirname, root_dir, recursive, True, include_hidden=include_hidden))
     else:
         dirs = [dirname]
     if has_magic(basename):
         if recursive and _isrecursive(basename):
-            glob_in_dir = _glob2
+            glob_in_dirs = _glob2_many
         else:
-            glob_in_dir = _glob1
+            glob_in_dirs = _glob1_many
+        found = glob_in_dirs(root_dir, dirs, basename, dironly, include_hidden)
     else:
-        glob_in_dir = _glob0
-    for dirname in dirs:
-        for name in glob_in_dir(_join(root_dir, dirname),
-                                basename,
-                                dironly,
-                                include_hidden=include_hidden):
-            yield os.path.join(dirname, name)
+        found = _glob0_many(root_dir, dirs, basename)
 
+    for dirname, name in found:
+        yield os.path.join(dirname, name)
 
-# These 2 helper functions non-recursively glob inside a literal directory.
-# They return a list of basenames.  _glob1 accepts a pattern while _glob0
-# takes a literal basename (so it only has to check for its existence).
+
+# These helper functions glob inside literal directories.  The _many variants take a sequence of
+# directories and yield (dirname, basename) tuples for all the matches using a single query.
 
 
 def _glob1(dirname, pattern, dironly, include_hidden=False):
-    names = _listdir(dirname, dironly)
-    if include_hidden or not _ishidden(pattern):
-        names = (x for x in names if include_hidden or not _ishidden(x))
-    return fnmatch.filter(names, pattern)
+    return [name for _, name in _glob1_many('', [dirname], pattern, dironly, include_hidden)]
 
 
 def _glob0(dirname, basename, dironly, include_hidden=False):  # pylint: disable=unused-argument
+    return [name for _, name in _glob0_many('', [dirname], basename)]
+
+
+def _glob1_many(root_dir, dirnames, pattern, dironly, include_hidden=False):
+    """Find the names matching the pattern in all the passed directories using a single database query"""
+    regex = translate(pattern)
+    if not include_hidden and not _ishidden(pattern):
+        # Wildcards don't match hidden names
+        regex = '^(?!\\.)' + regex[1:]
+
+    dir_ids = _find_dir_ids(root_dir, dirnames)
+    names = {}  # Directory id -> matching names
+    for entry in db.fs.find_children(set(filter(None, dir_ids)),
+                                     name_regex=regex,
+                                     type=db.fs.Schema.TYPE_DIR if dironly else None,
+                                     fields=()):
+        names.setdefault(db.fs.Entry.parent(entry), []).append(db.fs.Entry.name(entry))
+
+    for dirname, dir_id in zip(dirnames, dir_ids):
+        for name in sorted(names.get(dir_id, ())):
+            yield dirname, name
+
+
+def _glob0_many(root_dir, dirnames, basename):
+    """Batched version of _glob0 that checks for the literal basename in all the passed directories using a single
+    database query.  Yields (dirname, basename) tuples for those directories that contain it."""
+    dirnames = list(dirnames)
     if basename:
-        if _lexists(_join(dirname, basename)):
-            return [basename]
+        entries = _find_entries(_join(_join(root_dir, dirname), basename) for dirname in dirnames)
+        for dirname, entry in zip(dirnames, entries):
+            if entry is not None:
+                yield dirname, basename
     else:
         # `os.path.split()` returns an empty basename for paths ending with a
         # directory separator.  'q*x/' should match only directories.
-        if _isdir(dirname):
-            return [basename]
-    return []
+        entries = _find_entries(_join(root_dir, dirname) for dirname in dirnames)
+        for dirname, entry in zip(dirnames, entries):
+            if entry is not None and db.fs.Entry.is_dir(entry):
+                yield dirname, basename
+
+
+def _glob2_many(root_dir, dirnames, pattern, dironly, include_hidden=False):
+    """Recursively yield the relative paths of everything inside the passed directories.  Each directory is scanned
+    using a single query.  The paths are yielded depth first, each directory being followed by its contents, with the
+    names sorted within each directory."""
+    assert _isrecursive(pattern)
+    for dirname, dir_id in zip(dirnames, _find_dir_ids(root_dir, dirnames)):
+        yield dirname, pattern[:0]
+        if dir_id is None:
+            continue
+
+        relpaths = []
+        for entry in db.fs.iter_descendents(dir_id,
+                                            type=db.fs.Schema.TYPE_DIR if dironly else None,
+                                            fields=()):
+            relpath = tuple(db.fs.Entry.path(entry))
+            if include_hidden or not any(map(_ishidden, relpath)):
+                relpaths.append(relpath)
+
+        # A path sorts straight after its parent directory and before anything that comes after it
+        for relpath in sorted(relpaths):
+            yield dirname, os.path.join(*relpath)
+
+
+def _find_dir_ids(root_dir, dirnames) -> list:
+    """Get the ids of the passed directories (relative to root_dir), None for those that aren't directories"""
+    entries = _find_entries(_join(root_dir, dirname) or os.curdir for dirname in dirnames)
+    return [
+        db.fs.Entry.id(entry) if entry is not None and db.fs.Entry.is_dir(entry) else None
+        for entry in entries
+    ]
+
+
+def _find_entries(paths):
+    return db.fs.find_entries([os.withdb.to_fs_path(path) for path in paths],
+                              fields=(db.fs.Schema.TYPE,))
 
 
 # Following functions are not public but can be used by third-party code.
@@ -133,51 +201,43 @@ def glob1(dirname, pattern):
     return _glob1(dirname, pattern, None, False)
 
 
-# This helper function recursively yields relative pathnames inside a literal
-# directory.
-
-
-def _glob2(dirname, pattern, dironly, include_hidden=False):
-    assert _isrecursive(pattern)
-    yield pattern[:0]
-    yield from _rlistdir(dirname, dironly, include_hidden=include_hidden)
-
-
-# If dironly is false, yields all file names inside a directory.
-# If dironly is true, yields only directory names.
-def _iterdir(dirname, dironly: bool):
-    try:
-        if dirname:
-            arg = dirname
-        elif isinstance(dirname, bytes):
-            arg = bytes(os.curdir, 'ASCII')
+def translate(pattern: str) -> str:
+    """Translate a shell-style pattern into an anchored regular expression that can be evaluated by the database.
+    Unlike fnmatch.translate() only the regular expression syntax common to Python and MongoDB is used."""
+    # pylint: disable=too-many-branches
+    idx, num = 0, len(pattern)
+    res = []
+    while idx < num:
+        char = pattern[idx]
+        idx += 1
+        if char == '*':
+            # Compress consecutive '*' into one
+            if not res or res[-1] != '.*':
+                res.append('.*')
+        elif char == '?':
+            res.append('.')
+        elif char == '[':
+            end = idx
+            if end < num and pattern[end] == '!':
+                end += 1
+            if end < num and pattern[end] == ']':
+                end += 1
+            while end < num and pattern[end] != ']':
+                end += 1
+            if end >= num:
+                res.append('\\[')
+            else:
+                stuff = pattern[idx:end].replace('\\', '\\\\')
+                idx = end + 1
+                if stuff[0] == '!':
+                    stuff = '^' + stuff[1:]
+                elif stuff[0] == '^':
+                    stuff = '\\' + stuff
+                res.append(f'[{stuff}]')
         else:
-            arg = os.curdir
-        with os.scandir(arg) as it:  # pylint: disable=invalid-name
-            for entry in it:
-                try:
-                    if not dironly or entry.is_dir():
-                        yield entry.name
-                except exceptions.PyOSError:
-                    pass
-    except exceptions.PyOSError:
-        return
-
+            res.append(re.escape(char))
 
-def _listdir(dirname, dironly):
-    with contextlib.closing(_iterdir(dirname, dironly)) as it:  # pylint: disable=invalid-name
-        return list(it)
-
-
-# Recursively yields relative pathnames inside a literal directory.
-def _rlistdir(dirname, dironly, include_hidden=False):
-    names = _listdir(dirname, dironly)
-    for name in names:
-        if include_hidden or not _ishidden(name):
-            yield name
-            path = _join(dirname, name) if dirname else name
-            for pname in _rlistdir(path, dironly, include_hidden=include_hidden):
-                yield _join(name, pname)
+    return '^' + ''.join(res) + '$'
 
 
 _lexists = os.path.lexists
@@ -16,14 +16,14 @@ from .nodb import sep, curdir, pardir
 
 def isdir(path: types.PathSpec) -> bool:
     """Return True if path is an existing directory."""
-    entry = fs.find_entry(to_fs_path(path))
+    entry = fs.find_entry(to_fs_path(path), fields=(fs.Schema.TYPE,))
     if not entry:
         return False
     return fs.Entry.is_dir(entry)
 
 
 def isfile(path: types.PathSpec) -> bool:
-    entry = fs.find_entry(to_fs_path(path))
+    entry = fs.find_entry(to_fs_path(path), fields=(fs.Schema.TYPE,))
     if not entry:
         return False
     return fs.Entry.is_obj(entry)
@@ -31,7 +31,7 @@ def isfile(path: types.PathSpec) -> bool:
 
 def exists(path: types.PathSpec) -> bool:
     """Return `True` if the path exists"""
-    return db.fs.find_entry(to_fs_path(path)) is not None
+    return db.fs.find_entry(to_fs_path(path), fields=()) is not None
 
 
 # Don't support links for now, so fall back to exists
@@ -127,14 +127,17 @@ def getcwd() -> str:
 
 
 def listdir(lsdir: types.PathSpec = '.') -> List[str]:
-    entry = db.fs.find_entry(to_fs_path(lsdir))  # DB HIT
+    entry = db.fs.find_entry(to_fs_path(lsdir), fields=(fs.Schema.TYPE,))  # DB HIT
     if not entry:
         raise exceptions.FileNotFoundError(lsdir)
 
     if db.fs.Entry.is_obj(entry):
         raise exceptions.NotADirectoryError(f"Not a directory: '{lsdir}'")
 
-    return [db.fs.Entry.name(child) for child in fs.iter_children(fs.Entry.id(entry))]
+    return [
+        db.fs.Entry.name(child)
+        for child in fs.iter_children(fs.Entry.id(entry), fields=(fs.Schema.NAME,))
+    ]
 
 
 def open(
@@ -151,7 +154,7 @@ def open(
     :return: a file-like object that can be used to interact with the file
     """
     file_path = abspath(file)
-    entry = db.fs.find_entry(file_path)
+    entry = db.fs.find_entry(file_path, fields=(fs.Schema.TYPE,))
 
     if entry is None:
         # Create a new one
@@ -226,29 +229,32 @@ class _ScandirIter:
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        """Nothing to do"""
+        self.close()
 
     def close(self):
-        """Close does nothing here"""
+        """Stop iterating, this releases the database cursor if there is one"""
+        close = getattr(self._iterator, 'close', None)
+        if close is not None:
+            close()
 
 
 def scandir(scan_path='.') -> Iterator[nodb.DirEntry]:
-    entry = db.fs.find_entry(to_fs_path(scan_path))
+    entry = db.fs.find_entry(to_fs_path(scan_path), fields=(fs.Schema.TYPE,))
     if not entry:
         raise exceptions.FileNotFoundError(scan_path)
 
     if db.fs.Entry.is_obj(entry):
         raise exceptions.NotADirectoryError(f"Not a directory: '{scan_path}'")
 
-    contents = []
-    for descendent in db.fs.iter_children(db.fs.Entry.id(entry)):
-        obj_name = db.fs.Entry.name(descendent)
-        contents.append(
-            nodb.DirEntry(obj_name=obj_name,
-                          obj_path=nodb.join(scan_path, obj_name),
-                          is_file=fs.Entry.is_obj(descendent)))
+    def iter_contents():
+        # Entries are created as the children are fetched so nothing is read up front
+        for child in db.fs.iter_children(db.fs.Entry.id(entry), fields=(fs.Schema.NAME,)):
+            obj_name = db.fs.Entry.name(child)
+            yield nodb.DirEntry(obj_name=obj_name,
+                                obj_path=nodb.join(scan_path, obj_name),
+                                is_file=fs.Entry.is_obj(child))
 
-    return _ScandirIter(iter(contents))
+    return _ScandirIter(iter_contents())
 
 
 def unlink(file_path: types.PathSpec):
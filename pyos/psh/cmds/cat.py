@@ -2,7 +2,6 @@
 import argparse
 import logging
 import re
-import sys
 
 import cmd2
 
@@ -10,6 +9,7 @@ import pyos
 from pyos import db
 from pyos import psh
 from pyos.psh import completion
+from pyos.psh import utils
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -27,22 +27,42 @@ def cat(*obj_or_ids, representer=None):
     to_cat = []
 
     for entry in obj_or_ids:
+        if isinstance(entry, utils.PipeItem):
+            # We already know what this is
+            entry = entry.target
+
         if isinstance(entry, (str, pyos.pathlib.Path, pyos.fs.BaseNode)):
             to_cat.extend(psh.ls(-psh.d, entry))
         else:
             to_cat.append(entry)
 
+    # Load the objects in bulk, in the order they are to be printed
+    obj_ids = []  # The object id of each entry, None for those that aren't objects
+    for entry in to_cat:
+        if isinstance(entry, pyos.fs.ObjectNode):
+            obj_ids.append(entry.obj_id)
+        elif not isinstance(entry, pyos.fs.DirectoryNode) and hist.is_obj_id(entry):
+            obj_ids.append(entry)
+        else:
+            obj_ids.append(None)
+    loaded = db.load_many([obj_id for obj_id in obj_ids if obj_id is not None],
+                          background=True,
+                          historian=hist)
+
     representer = representer or pyos.psh_lib.get_default()
 
     def iterator():
-        for entry in to_cat:
+        for entry, obj_id in zip(to_cat, obj_ids):
             try:
                 if isinstance(entry, pyos.fs.DirectoryNode):
                     yield f'cat: {entry.abspath.name}: Is a directory'
-                elif isinstance(entry, pyos.fs.ObjectNode):
-                    yield representer(entry.obj)
-                elif hist.is_obj_id(entry):
-                    yield representer(hist.load(entry))
+                elif obj_id is not None:
+                    obj = next(loaded, None)
+                    if obj is None:
+                        raise RuntimeError(f'cat: no object was loaded for {obj_id}')
+                    if isinstance(obj, Exception):
+                        raise obj
+                    yield representer(obj)
                 else:
                     yield representer(entry)
             except Exception as exc:  # pylint: disable=broad-except
@@ -82,7 +102,7 @@ class Cat(cmd2.CommandSet):
             # Read from standard in
             _LOGGER.debug('cat: getting input from stdin')
             try:
-                args.path = [line.rstrip() for line in sys.stdin.readlines()]
+                args.path = list(utils.read_input())
             except Exception:
                 _LOGGER.exception('Exception trying to readlines')
                 raise
@@ -19,7 +19,8 @@ def find(
         state: dict = None,
         type=None,  # pylint: disable=redefined-builtin
         mindepth=0,
-        maxdepth=-1) -> pyos.fs.ResultsNode:
+        maxdepth=-1,
+        workers: int = None) -> pyos.fs.ResultsNode:
     """Find objects matching the given criteria, optionally starting from one or more paths
 
 
@@ -29,6 +30,7 @@ def find(
     :param type: restrict the match to objects of this type
     :param mindepth: the minimum depth to search at relative to the start point(s)
     :param maxdepth: the maximum depth to search at relative to the start point(s)
+    :param workers: search the start point(s) concurrently using this many threads
     """
     _options, spoints = pyos.psh_lib.opts.separate_opts(*starting_point)
     if not spoints:
@@ -39,7 +41,8 @@ def find(
                         state=state,
                         type=type,
                         mindepth=mindepth,
-                        maxdepth=maxdepth)
+                        maxdepth=maxdepth,
+                        workers=workers)
 
 
 class Find(cmd2.CommandSet):
@@ -71,6 +74,15 @@ class Find(cmd2.CommandSet):
                         type=int,
                         default=0,
                         help='minimum depth to start search at relative to starting point(s)')
+    parser.add_argument('-j',
+                        dest='workers',
+                        type=int,
+                        default=None,
+                        help='search the starting points concurrently using this many threads')
+    parser.add_argument(
+        '--ordered',
+        action='store_true',
+        help='when searching concurrently, output the results in a deterministic order')
     parser.add_argument('state',
                         type=argparse_types.parse_query,
                         nargs='*',
@@ -90,6 +102,12 @@ class Find(cmd2.CommandSet):
                            meta=meta,
                            state=state,
                            mindepth=args.mindepth,
-                           maxdepth=args.maxdepth)
+                           maxdepth=args.maxdepth,
+                           workers=args.workers,
+                           ordered=args.ordered)
 
-        res.__stream_out__(self._cmd.stdout)
+        try:
+            res.__stream_out__(self._cmd.stdout)
+        finally:
+            # Stop the search if we didn't get to the end (e.g. the pipe we were writing to was closed)
+            res.close()
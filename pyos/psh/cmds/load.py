@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import itertools
 from typing import Union, Iterable, Any
 
 import pyos
@@ -14,25 +15,28 @@ def load(*obj_or_ids) -> Union[Iterable[Any], Any]:
         return None
 
     # First load any by object id directly
-    loaded = []
+    obj_ids = []
     rest = []
     hist = db.get_historian()
     for entry in args:
         if hist.is_obj_id(entry):
-            try:
-                loaded.append(hist.load(entry))
-            except Exception as exc:  # pylint: disable=broad-except
-                loaded.append(exc)
+            obj_ids.append(entry)
         else:
             rest.append(entry)
 
     # The remaining arguments are passed to ls which will try to find the corresponding objects
     to_load = psh.ls(*rest)  # pylint: disable=no-value-for-parameter
+    num_direct = len(obj_ids)
+    obj_ids.extend(node.obj_id for node in to_load if isinstance(node, pyos.fs.ObjectNode))
+
+    # Any that can't be loaded will have the exception in their place
+    objects = db.load_many(obj_ids, background=True, historian=hist)
+    loaded = list(itertools.islice(objects, num_direct))
     for node in to_load:
-        try:
-            loaded.append(node.obj)
-        except Exception as exc:  # pylint: disable=broad-except
-            loaded.append(exc)
+        if isinstance(node, pyos.fs.ObjectNode):
+            loaded.append(next(objects))
+        else:
+            loaded.append(pyos.exceptions.IsADirectoryError(node.abspath))
 
     if len(to_load) == 1:
         return loaded[0]
@@ -17,6 +17,9 @@ logger = logging.getLogger(__name__)
 @psh_lib.flag(psh.l, help='use a long listing format')
 @psh_lib.flag(psh.d, help='list directories themselves, not their contents')
 @psh_lib.flag(psh.p, help='print the str() value of each object')
+@psh_lib.flag(psh.t, help='sort by modification time, newest first')
+@psh_lib.flag(psh.r, help='reverse order while sorting')
+@psh_lib.flag(psh.U, help='do not sort; list entries in database order')
 @psh_lib.flag(
     psh_lib.Option(1),
     help=
@@ -42,10 +45,21 @@ def ls(options, *args) -> pyos.fs.ContainerNode:  # pylint: disable=invalid-name
     else:
         results.append(pyos.fs.to_node(pyos.pathlib.Path()))
 
+    # Sorting is done by the database so the listing can be streamed
+    sort = 'name'
+    reverse = bool(options.pop(psh.r))
+    if options.pop(psh.t):
+        sort = 'mtime'
+        reverse = not reverse
+    if options.pop(psh.U):
+        sort = None
+
+    # The long listing only needs the filesystem entries unless we're printing the objects too
+    populate_objects = (pyos.fs.PREFETCH_OBJ,) if psh.l in options and psh.p in options else False
     if not options.pop(psh.d):
         for entry in results:
             if isinstance(entry, pyos.fs.DirectoryNode):
-                entry.expand(populate_objects=psh.l in options)
+                entry.expand(populate_objects=populate_objects, sort=sort, reverse=reverse)
 
         if len(results) == 1 and isinstance(results[0], pyos.fs.DirectoryNode):
             # We just have a single directory
@@ -55,6 +69,9 @@ def ls(options, *args) -> pyos.fs.ContainerNode:  # pylint: disable=invalid-name
         properties = ['loaded', 'type', 'version', 'mtime', 'name']
         if options.pop(psh.p):
             properties.append('str')
+            if isinstance(results, pyos.fs.ResultsNode):
+                # Directories have already been populated, this gets any objects listed directly
+                results.prefetch(pyos.fs.PREFETCH_OBJ)
         results.show(*properties, mode=pyos.fs.TABLE_VIEW)
     elif options.pop(1):
         results.show(mode=pyos.fs.SINGLE_COLUMN_VIEW)
@@ -71,6 +88,11 @@ class Ls(cmd2.CommandSet):
                         action='store_true',
                         help='list directories themselves, not their contents')
     parser.add_argument('-p', action='store_true', help='print the str() value of each object')
+    parser.add_argument('-t', action='store_true', help='sort by modification time, newest first')
+    parser.add_argument('-r', action='store_true', help='reverse order while sorting')
+    parser.add_argument('-U',
+                        action='store_true',
+                        help='do not sort; list entries in database order')
     parser.add_argument(
         '-1',
         action='store_true',
@@ -87,8 +109,17 @@ class Ls(cmd2.CommandSet):
             command = command - psh.d
         if args.p:
             command = command - psh.p
+        if args.t:
+            command = command - psh.t
+        if args.r:
+            command = command - psh.r
+        if args.U:
+            command = command - psh.U
         if vars(args)['1']:
             command = command - psh_lib.Option(1)
 
         res = command(*args.path)
-        res.__stream_out__(self._cmd.stdout)
+        try:
+            res.__stream_out__(self._cmd.stdout)
+        finally:
+            res.close()
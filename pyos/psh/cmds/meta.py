@@ -8,6 +8,7 @@ import cmd2
 
 import pyos
 from pyos.psh import completion
+from pyos.psh import utils
 from pyos import psh
 
 logger = logging.getLogger(__name__)
@@ -23,6 +24,9 @@ def meta(options, *obj_or_ids, **updates):  # pylint: disable=too-many-return-st
         return None
 
     hist = pyos.db.get_historian()
+    obj_or_ids = [
+        entry.target if isinstance(entry, utils.PipeItem) else entry for entry in obj_or_ids
+    ]
     obj_ids, rest = pyos.psh_lib.gather_obj_ids(obj_or_ids, hist)
 
     # Assume that anything left is something like a path or filesystem node
@@ -80,7 +84,7 @@ class Meta(cmd2.CommandSet):
         if not args.path:
             # Read from standard in
             try:
-                args.path = [line.rstrip() for line in sys.stdin.readlines()]
+                args.path = list(utils.read_input())
             except Exception:
                 logger.exception('Exception trying to readlines')
                 raise
@@ -2,13 +2,13 @@
 """The object id command"""
 import argparse
 import logging
-import sys
 
 import cmd2
 
 import pyos
 from pyos import db
 from pyos.psh import completion
+from pyos.psh import utils
 from pyos.psh_lib import CachingResults
 
 _LOGGER = logging.getLogger(__name__)
@@ -20,6 +20,10 @@ def oid(*args):
     if not args:
         return None
 
+    # Nodes and piped entries already know their object ids
+    args = [
+        arg.obj_id if isinstance(arg, (pyos.fs.ObjectNode, utils.PipeItem)) else arg for arg in args
+    ]
     result = CachingResults(db.get_oid(*args), representer=str)
 
     if len(result) == 1:
@@ -43,10 +47,14 @@ class Oid(cmd2.CommandSet):
             # Read from standard in
             _LOGGER.debug('oid: getting input from stdin')
             try:
-                args.path = [line.rstrip() for line in sys.stdin.readlines()]
+                args.path = list(utils.read_input())
             except Exception:
                 _LOGGER.exception('Exception trying to readlines')
                 raise
             _LOGGER.debug("oid: got input' %s' from stdin", args.path)
 
-        print(oid(*args.path))
+        result = oid(*args.path)
+        if isinstance(result, CachingResults):
+            utils.send_many(list(result))
+        else:
+            utils.send(result)
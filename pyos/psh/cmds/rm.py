@@ -45,11 +45,24 @@ def rm(options, *obj_or_ids):  # pylint: disable=invalid-name
         to_delete = _remove_directories(to_delete)
 
     if to_delete:
+        progress = None
         if options.pop(psh.flags.p):
-            to_delete = tqdm.tqdm(to_delete, desc='rm')
+            # Directories are deleted in batches so count all the entries that will go
+            total = sum(
+                pyos.db.fs.count_descendents(node.entry_id, historian=hist) +
+                1 if isinstance(node, pyos.fs.DirectoryNode) else 1 for node in to_delete)
+            progress = tqdm.tqdm(desc='rm', total=total)
 
         for node in to_delete:
-            node.delete()
+            if isinstance(node, pyos.fs.DirectoryNode):
+                node.delete(progress=progress.update if progress is not None else None)
+            else:
+                node.delete()
+                if progress is not None:
+                    progress.update(1)
+
+        if progress is not None:
+            progress.close()
 
 
 class Rm(cmd2.CommandSet):
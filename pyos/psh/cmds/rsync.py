@@ -142,8 +142,7 @@ def _sync_objects(src: mincepy.Historian,
         dirs = set(os.path.dirname(objpath) for objpath in new_paths.values())
 
         # 4. Create the directories
-        for objdir in dirs:
-            db.fs.make_dirs(os.withdb.to_fs_path(objdir), exists_ok=True, historian=dest)
+        db.fs.make_dirs_many(map(os.withdb.to_fs_path, dirs), exists_ok=True, historian=dest)
 
         # 5. Set the paths
         for obj_id, path in new_paths.items():
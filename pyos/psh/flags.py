@@ -3,7 +3,7 @@
 
 from pyos import psh_lib
 
-__all__ = 'f', 'l', 'L', 'n', 'p', 'd', 'u', 'r', 's', 'v'
+__all__ = 'f', 'l', 'L', 'n', 'p', 'd', 'u', 'r', 's', 't', 'U', 'v'
 
 # pylint: disable=invalid-name
 
@@ -16,5 +16,7 @@ n = psh_lib.Option('n')
 p = psh_lib.Option('p')
 r = psh_lib.Option('r')
 s = psh_lib.Option('s')
+t = psh_lib.Option('t')
 u = psh_lib.Option('u')
+U = psh_lib.Option('U')
 v = psh_lib.Option('v')
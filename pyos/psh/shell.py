@@ -5,7 +5,7 @@ import logging
 import os
 import subprocess
 import sys
-from typing import List, Optional
+from typing import List, Optional, Union
 
 import mincepy
 import cmd2.constants
@@ -85,8 +85,21 @@ class PyosShell(cmd2.Cmd):
         app = PyosShell(**init_args)
         app.cmdloop()
 
+    def onecmd(self, statement: Union[cmd2.Statement, str], *, add_to_history: bool = True) -> bool:
+        try:
+            return super().onecmd(statement, add_to_history=add_to_history)
+        except BrokenPipeError:
+            # Whatever we were piping to has stopped reading (e.g. it was cancelled or only wanted the first few lines)
+            if self.broken_pipe_warning:
+                sys.stderr.write(self.broken_pipe_warning)
+            return False
+
     def command_finalise(
             self, data: cmd2.plugin.CommandFinalizationData) -> cmd2.plugin.CommandFinalizationData:
+        from . import completion  # pylint: disable=import-outside-toplevel
+
+        # The command may have changed the filesystem so start a new completion session
+        completion.clear_cache()
         self._update_prompt()
         return data
 
@@ -113,14 +126,17 @@ class PyosShell(cmd2.Cmd):
                           saved.saved_self_stdout)
 
             funcs = []
+            # Commands run by the host shell can only be connected using OS pipes
+            external = [statement.command == 'shell']
             for part in statement.pipe_to.split(cmd2.constants.REDIRECTION_PIPE):
                 # Parse the command
                 # Whitespace (especially at beginning) confuses parsing to statement
                 part = part.strip()
                 part_statement = self._input_line_to_statement(part)
                 funcs.append(functools.partial(self.onecmd, part_statement))
+                external.append(part_statement.command == 'shell')
 
-            thread_proc = utils.Piper(funcs, out_stream=self.stdout)
+            thread_proc = utils.Piper(funcs, out_stream=self.stdout, external=external)
             self.stdout = thread_proc.out_redirector
             self.stdin = thread_proc.in_redirector
             saved.redirecting = True
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import codecs
 import collections
 import concurrent.futures
 import contextlib
@@ -8,46 +9,427 @@ try:
 except ImportError:
     from contextlib2 import nullcontext
 import io
+import itertools
 import logging
+import operator
 import os
+import queue
 import sys
 import threading
 import traceback
-from typing import Optional, Union, TextIO, List, Callable, Tuple
+from typing import Optional, Union, TextIO, List, Callable, Tuple, Iterable, Iterator, Sequence
 
 import click
 import cmd2.utils
 import stevedore
 
+import pyos
+from pyos import db
+
 _LOGGER = logging.getLogger(__name__)
 
+PIPE_BATCH_SIZE = 1024  # The number of items sent through an in-process pipe at a time
+PIPE_CHUNK_SIZE = 64 * 1024  # The number of bytes of text sent through an in-process pipe at a time
+PIPE_ENCODING = 'utf-8'  # How text is encoded while it goes through an in-process pipe
+PIPE_MAX_BATCHES = 16  # The number of batches that can be waiting in an in-process pipe before the writer blocks
+
+SIDE_CHANNEL_MAX_SIZE = 1_000_000  # The maximum number of lines a pipeline's side channel will remember items for
+
+Batch = List[Tuple[object,
+                   str]]  # The (item, line) pairs read from a pipe, the item is None for plain text
+
+# The kinds of batch that go through an in-process pipe
+_TEXT = 'text'  # Chunks of encoded text
+_ITEMS = 'items'  # (item, line) tuples
+_EOF = 'eof'  # The writer has been closed
+
+
+class PipeItem(collections.namedtuple('PipeItem', 'entry_id type abspath obj_id type_id')):
+    """The filesystem entry behind a line of text sent through a pipe.  For directories the obj_id and type_id are
+    None."""
+    __slots__ = ()
+
+    @classmethod
+    def from_node(cls, node: Union['pyos.fs.DirectoryNode', 'pyos.fs.ObjectNode']) -> 'PipeItem':
+        if isinstance(node, pyos.fs.ObjectNode):
+            return cls(node.entry_id, db.fs.Schema.TYPE_OBJ, node.abspath, node.obj_id,
+                       node.type_id)
+        return cls(node.entry_id, db.fs.Schema.TYPE_DIR, node.abspath, None, None)
+
+    @property
+    def target(self):
+        """What a command that takes object ids or paths should be given for this entry i.e. the object id for
+        objects and the path for directories"""
+        return os.fspath(self.abspath) if self.obj_id is None else self.obj_id
+
+
+class SideChannel:
+    """Remembers the items behind the lines of text that have been sent through a pipeline so that they can be
+    recovered from just the text e.g. after going through an external command such as `!sort`.
+
+    Lines that have been sent with different items are ambiguous and nothing is recovered for them.
+    """
+    _AMBIGUOUS = object()
+
+    def __init__(self, max_size=SIDE_CHANNEL_MAX_SIZE):
+        self._items = {}
+        self._max_size = max_size
+
+    def __len__(self):
+        return len(self._items)
+
+    def record(self, items: Sequence, texts: Sequence[str]):
+        recorded = self._items
+        new = dict(zip([text.rstrip() for text in texts], items))
+        if len(new) != len(items):
+            # The same line appears more than once, go through them one by one
+            new = {}
+            for key, item in zip([text.rstrip() for text in texts], items):
+                new[key] = item if new.get(key, item) == item else self._AMBIGUOUS
+
+        for key in recorded.keys() & new.keys():
+            if recorded[key] != new[key]:
+                new[key] = self._AMBIGUOUS
+
+        if len(recorded) + len(new) <= self._max_size:
+            recorded.update(new)
+
+    def lookup(self, text: str):
+        """Get the item that was sent with the given line of text, returns None if there isn't one"""
+        item = self._items.get(text.rstrip())
+        return None if item is self._AMBIGUOUS else item
+
+
+def read_input(stream: TextIO = None) -> Iterator:
+    """Read the input to a command from the given stream (standard in by default).  Anything that was sent down an
+    in-process pipe using `send()` is returned as the item that was sent (e.g. a node or an object id) while everything
+    else is returned as lines of text with the trailing whitespace removed."""
+    stream = stream if stream is not None else sys.stdin
+    try:
+        batches = stream.read_batches()
+    except AttributeError:
+        batches = [[(None, line) for line in stream.readlines()]]
+
+    for batch in batches:
+        for item, line in batch:
+            yield line.rstrip() if item is None else item
+
+
+def send(item, text: str = None, stream: TextIO = None):
+    """Send an item as a line of text to the given output stream (standard out by default).  If the stream can carry
+    items (i.e. it is an in-process pipe) the item will be passed along with the text, otherwise just the text is
+    written.  If no text is given then str(item) is used."""
+    stream = stream if stream is not None else sys.stdout
+    try:
+        send_item = stream.send
+    except AttributeError:
+        stream.write(f'{item if text is None else text}\n')
+    else:
+        send_item(item, text)
+
+
+def send_many(items: Sequence, texts: Sequence[str] = None, stream: TextIO = None):
+    """Send a batch of items, one per line, see `send()`"""
+    stream = stream if stream is not None else sys.stdout
+    try:
+        send_items = stream.send_many
+    except AttributeError:
+        texts = texts if texts is not None else map(str, items)
+        stream.write(''.join(f'{text}\n' for text in texts))
+    else:
+        send_items(items, texts)
+
+
+def make_pipe(max_batches=PIPE_MAX_BATCHES,
+              batch_size=PIPE_BATCH_SIZE,
+              chunk_size=PIPE_CHUNK_SIZE) -> Tuple['PipeReader', 'PipeWriter']:
+    """Create an in-process pipe returning the (reader, writer) pair, analogous to `os.pipe()`.
+
+    Lines of text go through the pipe in batches using a bounded queue and can carry the item (e.g. node or object id)
+    that they represent so that the next command doesn't have to parse them back from the text.
+    """
+    batches = queue.Queue(max_batches)
+    reader_closed = threading.Event()
+    return PipeReader(batches, reader_closed), PipeWriter(batches, reader_closed, batch_size,
+                                                          chunk_size)
+
+
+class _ClosedBatch:
+    """Stands in for the batch of a closed pipe writer"""
+
+    def __len__(self):
+        return 0
+
+    def append(self, _entry):
+        raise ValueError('I/O operation on closed pipe')
+
+    extend = append
+
+
+class _TextChunks(io.RawIOBase):
+    """The raw stream underneath the text wrapper of a pipe writer, each chunk of encoded text that is flushed from
+    the wrapper is passed on to the writer"""
+
+    def __init__(self, consumer: Callable[[bytes], None]):
+        super().__init__()
+        self._consumer = consumer
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._consumer(bytes(data))
+        return len(data)
+
+
+class PipeWriter(io.TextIOBase):
+    """The writing end of an in-process pipe.
+
+    Text is written to a standard text buffer that hands it on in encoded chunks, just like writing to an OS pipe, so
+    that writing text is as cheap as possible.  Items are sent in separate batches.  Whatever was written before is
+    always handed on first so the order is kept.
+    """
+
+    def __init__(self,
+                 batches: queue.Queue,
+                 reader_closed: threading.Event,
+                 batch_size=PIPE_BATCH_SIZE,
+                 chunk_size=PIPE_CHUNK_SIZE):
+        super().__init__()
+        self._batches = batches
+        self._reader_closed = reader_closed
+        self._batch_size = batch_size
+        self._batch = []  # The (item, line) pairs waiting to be sent
+        self._text = io.TextIOWrapper(_TextChunks(self._send_text),
+                                      encoding=PIPE_ENCODING,
+                                      errors='surrogatepass',
+                                      newline='\n')
+        # The wrapper does the buffering itself, an extra BufferedWriter would only slow each write down
+        self._text._CHUNK_SIZE = chunk_size  # pylint: disable=protected-access
+        # Text goes straight to the wrapper, this saves a call into Python for every write
+        self.write = self._text.write
+
+    def writable(self) -> bool:
+        return True
+
+    def send(self, item, text: str = None):
+        """Send an item down the pipe as a line of text.  If no text is given then str(item) is used."""
+        self._text.flush()
+        batch = self._batch
+        batch.append((item, f'{item if text is None else text}\n'))
+        if len(batch) >= self._batch_size:
+            self._send_items()
+
+    def send_many(self, items: Sequence, texts: Sequence[str] = None):
+        """Send a batch of items down the pipe, one per line.  If no texts are given then str(item) is used."""
+        if self._reader_closed.is_set():
+            # Check each time so that we stop as soon as possible if the pipe has been cancelled
+            raise BrokenPipeError('The reading end of the pipe has been closed')
+
+        self._text.flush()
+        texts = texts if texts is not None else map(str, items)
+        self._batch.extend(zip(items, [f'{text}\n' for text in texts]))
+        if len(self._batch) >= self._batch_size:
+            self._send_items()
+
+    def flush(self):
+        if self._text.closed:
+            return
+        # Any items waiting were sent before the buffered text (see send()) so they go first
+        self._send_items()
+        self._text.flush()
+
+    def close(self):
+        if self.closed:
+            return
+
+        try:
+            self.flush()
+            self._put((_EOF, None))
+        except BrokenPipeError:
+            # Nobody is listening anymore so there's nobody to tell
+            pass
+        finally:
+            # This saves checking whether we're closed on every send
+            self._batch = _ClosedBatch()
+            with contextlib.suppress(BrokenPipeError):
+                self._text.close()
+            super().close()
+
+    def _send_text(self, chunk: bytes):
+        self._send_items()
+        self._put((_TEXT, chunk))
+
+    def _send_items(self):
+        if self._batch:
+            batch, self._batch = self._batch, []
+            self._put((_ITEMS, batch))
+
+    def _put(self, batch: Tuple[str, Optional[Union[bytes, list]]]):
+        if self._reader_closed.is_set():
+            raise BrokenPipeError('The reading end of the pipe has been closed')
+        self._batches.put(batch)
+
+
+class PipeReader(io.TextIOBase):
+    """The reading end of an in-process pipe"""
+
+    def __init__(self, batches: queue.Queue, reader_closed: threading.Event):
+        super().__init__()
+        self._batches = batches
+        self._closed_event = reader_closed
+        # The (kind, lines) batches that have been received but not yet read.  Text batches are kept as plain lines
+        # and item batches as (item, line) pairs.
+        self._pending: 'collections.deque[Tuple[str, collections.deque]]' = collections.deque()
+        self._partial = ''  # Any text that has been received that is not yet a full line
+        self._decoder = codecs.getincrementaldecoder(PIPE_ENCODING)(errors='surrogatepass')
+        self._eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def __iter__(self) -> Iterator[str]:
+        # Only go into Python once per batch rather than once per line
+        return itertools.chain.from_iterable(self._iter_lines())
+
+    def _iter_lines(self) -> Iterator[Iterable[str]]:
+        """Iterate over the lines in the pipe a batch at a time"""
+        pending = self._pending
+        while pending or self._receive():
+            kind, lines = pending.popleft()
+            yield lines if kind is _TEXT else map(operator.itemgetter(1), lines)
+
+    def read_batches(self) -> Iterator[Batch]:
+        """Iterate over the (item, line) pairs in the pipe a batch at a time, the item is None for lines that were
+        written as text"""
+        pending = self._pending
+        while pending or self._receive():
+            kind, lines = pending.popleft()
+            yield list(zip(itertools.repeat(None), lines)) if kind is _TEXT else list(lines)
+
+    def readline(self, size=-1) -> str:
+        if not self._pending and not self._receive():
+            return ''
+
+        kind, lines = self._pending[0]
+        entry = lines.popleft()
+        if not lines:
+            self._pending.popleft()
+        line = entry if kind is _TEXT else entry[1]
+        if size is None or size < 0 or len(line) <= size:
+            return line
+
+        # Put back what wasn't read
+        if not lines:
+            self._pending.appendleft((kind, lines))
+        lines.appendleft(line[size:] if kind is _TEXT else (entry[0], line[size:]))
+        return line[:size]
+
+    def readlines(self, hint=-1) -> List[str]:
+        if hint is not None and hint > 0:
+            return super().readlines(hint)
+        return list(self)
+
+    def read(self, size=-1) -> str:
+        if size is None or size < 0:
+            return ''.join(self)
+
+        parts = []
+        while size > 0:
+            line = self.readline(size)
+            if not line:
+                break
+            parts.append(line)
+            size -= len(line)
+        return ''.join(parts)
+
+    def close(self):
+        if self.closed:
+            return
+
+        self.cancel()
+        super().close()
+
+    def cancel(self):
+        """Cancel the pipe, this can be called from any thread.  The writer will get a BrokenPipeError the next time
+        it sends anything and the reader will reach the end of the input."""
+        # Let the writer know and make sure it isn't left waiting on a full queue
+        self._closed_event.set()
+        try:
+            while True:
+                self._batches.get_nowait()
+        except queue.Empty:
+            pass
+        self._pending.clear()
+
+        # Wake the reader if it's waiting
+        try:
+            self._batches.put_nowait((_EOF, None))
+        except queue.Full:
+            pass
+
+    def _receive(self) -> bool:
+        """Wait for more lines from the writer.  Returns False if there are no more."""
+        pending = self._pending
+        while not pending and not self._eof:
+            kind, batch = self._batches.get()
+            if kind is _TEXT:
+                # Splitting in StringIO (rather than in Python) keeps reading text as cheap as reading an OS pipe
+                lines = io.StringIO(self._partial + self._decoder.decode(batch)).readlines()
+                self._partial = lines.pop() if lines and lines[-1][-1] != '\n' else ''
+                if lines:
+                    pending.append((_TEXT, collections.deque(lines)))
+            elif kind is _ITEMS:
+                if self._partial:
+                    # Whatever was written before belongs to the first line
+                    item, line = batch[0]
+                    batch[0] = item, self._partial + line
+                    self._partial = ''
+                pending.append((_ITEMS, collections.deque(batch)))
+            else:
+                self._eof = True
+                if self._partial:
+                    pending.append((_TEXT, collections.deque([self._partial])))
+                    self._partial = ''
+
+        return bool(pending)
+
 
 class ThreadStreamRedirector(io.TextIOBase):
     """Idea for this was found here:
     https://stackoverflow.com/questions/14890997/redirect-stdout-to-a-file-only-for-a-specific-thread
     """
 
-    def __init__(self, *, default: Optional[TextIO] = None, name=''):
+    def __init__(self, *, default: Optional[TextIO] = None, name='', channel: SideChannel = None):
+        """
+        :param default: the stream to use for threads that haven't been redirected
+        :param name: the name used in log messages
+        :param channel: the side channel used to remember the items that are sent, and to recover them for lines
+            of text that are read
+        """
         super().__init__()
         self.default = default
         self._streams = {}
         self._name = name
+        self._channel = channel
 
     def register(self, stream: Optional[TextIO]):
-        identity = threading.current_thread().ident
+        identity = threading.get_ident()
         _LOGGER.debug('(%s): Redirecting thread %s to %s', self._name, identity, stream)
         self._streams[identity] = stream
 
     def unregister(self):
-        identity = threading.current_thread().ident
+        identity = threading.get_ident()
         _LOGGER.debug('(%s): Unregistering thread %s', self._name, identity)
         self._streams.pop(identity)
 
     @contextlib.contextmanager
     def redirect(self, stream: Optional[TextIO]):
         self.register(stream)
-        yield
-        self.unregister()
+        try:
+            yield
+        finally:
+            self.unregister()
 
     def __iter__(self):
         return self._get_stream().__iter__()
@@ -73,10 +455,51 @@ class ThreadStreamRedirector(io.TextIOBase):
         stream.close()
 
     def write(self, message):
+        return self._streams.get(threading.get_ident(), self.default).write(message)
+
+    def send(self, item, text: str = None):
+        self.send_many([item], None if text is None else [text])
+
+    def send_many(self, items: Sequence, texts: Sequence[str] = None):
+        # Filesystem nodes are sent as the entries they represent (checking the types once as nodes are ABCs)
+        node_types = {
+            item_type for item_type in set(map(type, items))
+            if issubclass(item_type, (pyos.fs.DirectoryNode, pyos.fs.ObjectNode))
+        }
+        if node_types:
+            texts = [str(item) for item in items] if texts is None else texts
+            items = [
+                PipeItem.from_node(item) if type(item) in node_types else item for item in items
+            ]
+
+        if self._channel is not None:
+            texts = [str(item) for item in items] if texts is None else texts
+            self._channel.record(items, texts)
+
+        send_many(items, texts, self._get_stream())
+
+    def read_batches(self) -> Iterator[Batch]:
+        """Iterate over batches of (item, line) pairs from the stream, the item is None for lines that were written
+        as text and that the side channel (if there is one) doesn't know about"""
         stream = self._get_stream()
-        logging.debug('Writing %s from thread %s to %s', message,
-                      threading.current_thread().ident, stream)
-        stream.write(message)
+        try:
+            batches = stream.read_batches()
+        except AttributeError:
+            batches = iter([[(None, line) for line in stream.readlines()]])
+
+        if self._channel is None:
+            return batches
+
+        return self._recover_items(batches)
+
+    def _recover_items(self, batches: Iterator[Batch]) -> Iterator[Batch]:
+        channel = self._channel
+        for batch in batches:
+            if len(channel):
+                batch = [
+                    (channel.lookup(line) if item is None else item, line) for item, line in batch
+                ]
+            yield batch
 
     def read(self, size=-1):
         return self._get_stream().read(size=size)
@@ -103,19 +526,38 @@ class ThreadStreamRedirector(io.TextIOBase):
         return self._get_stream().fileno()
 
     def _get_stream(self):
-        identity = threading.current_thread().ident
-        try:
-            return self._streams[identity]
-        except KeyError:
-            return self.default
+        return self._streams.get(threading.get_ident(), self.default)
 
 
 class Piper:
+    """Runs the commands of a pipeline, each one reading from the output of the one before.
+
+    By default, the commands exchange lines through in-process pipes (see `make_pipe()`) which lets psh commands pass
+    the filesystem entries or object ids they output straight to the next command.  OS pipes (and therefore only
+    text) are used where an external command (e.g. one run by the host shell) is at either end of the pipe, in which
+    case the items sent are also remembered in a side channel so they can be recovered from the text that comes out.
+    """
     encoding = 'utf-8'
 
-    def __init__(self, funcs: List[Callable], out_stream: TextIO = sys.stdout):
+    def __init__(self,
+                 funcs: List[Callable],
+                 out_stream: TextIO = sys.stdout,
+                 external: Sequence[bool] = None,
+                 in_process=True):
+        """
+        :param funcs: the commands to run, each reading from the output of the previous one (the first reading from
+            our input stream)
+        :param out_stream: where the output of the final command goes
+        :param external: for the command writing to our input stream followed by each of the funcs, whether it is an
+            external command that needs an OS pipe
+        :param in_process: if False, OS pipes are used everywhere
+        """
         self._funcs = funcs
         self._out_stream = out_stream
+        self._external = list(external) if external is not None else [False] * (len(funcs) + 1)
+        if len(self._external) != len(funcs) + 1:
+            raise ValueError(f'Expected {len(funcs) + 1} external flags, got {len(self._external)}')
+        self._in_process = in_process
 
         self._pipes = {}
         self._in_steam = None
@@ -124,12 +566,17 @@ class Piper:
         self._orig_stdout = sys.stdout
 
         # Open up the 0th pipe and set up our input stream
-        _read, write = self._get_pipe(0)
-        self._in_steam = open(write, 'w', encoding=self.encoding)  # pylint: disable=consider-using-with
-
-        # Input/Output redirectors
-        self._in_redir = ThreadStreamRedirector(name='stdin', default=self._orig_stdin)
-        self._out_redir = ThreadStreamRedirector(name='stdout', default=self._orig_stdout)
+        _read, self._in_steam = self._get_pipe(0)
+
+        # Input/Output redirectors, where any pipe is text only these share a side channel that remembers the items
+        # behind the lines that are sent
+        self._channel = SideChannel() if not in_process or any(self._external) else None
+        self._in_redir = ThreadStreamRedirector(name='stdin',
+                                                default=self._orig_stdin,
+                                                channel=self._channel)
+        self._out_redir = ThreadStreamRedirector(name='stdout',
+                                                 default=self._orig_stdout,
+                                                 channel=self._channel)
 
     @property
     def in_stream(self) -> TextIO:
@@ -144,7 +591,9 @@ class Piper:
         return self._out_redir
 
     def start(self, capture_this_stdout=True, capture_all_stdout=False):
-        self._thread_pool = concurrent.futures.ThreadPoolExecutor(256)
+        # One thread for each command that we run
+        self._thread_pool = concurrent.futures.ThreadPoolExecutor(len(self._funcs),
+                                                                  thread_name_prefix='pyos-pipe')
         try:
             # Start redirecting standard streams
             sys.stdin = self._in_redir
@@ -161,33 +610,23 @@ class Piper:
                 read, _write = self._get_pipe(idx)
 
                 # OUTPUT: Determine what the output stream for this part should be
-                # pylint: disable=consider-using-with
                 if idx == len(self._funcs) - 1:
                     # At the end, so just go to standard out
                     open_out_stream = nullcontext(self._out_stream)
                 else:
                     # Need to output to the next commands input
-                    _next_read, next_write = self._pipes[idx + 1]
-                    open_out_stream = open(next_write, 'w', encoding=self.encoding)
+                    _next_read, open_out_stream = self._pipes[idx + 1]
 
                 done_redirecting = threading.Event()
 
-                future = self._thread_pool.submit(self._run_func, func,
-                                                  open(read, 'r', encoding=self.encoding),
-                                                  open_out_stream, done_redirecting)  # pylint: disable=consider-using-with
-
-                try:
-                    done_redirecting.wait(timeout=0.1)
-                except TimeoutError as timeout:
-                    # Try checking the future first
-                    future.result(timeout=0.)
+                future = self._thread_pool.submit(self._run_func, func, read, open_out_stream,
+                                                  done_redirecting)
 
-                    # Didn't raise, so we need to raise ourselves
-                    raise RuntimeError(
-                        f"Failed to redirect streams for command '{func}' in a timely "
-                        'manner') from timeout
-                else:
-                    del done_redirecting
+                # Wait for the streams to be redirected, unless the command fails first
+                while not done_redirecting.wait(timeout=0.1):
+                    if future.done():
+                        future.result()
+                        raise RuntimeError(f"Failed to redirect streams for command '{func}'")
 
         except Exception:
             self.shutdown(wait=True)
@@ -225,16 +664,26 @@ class Piper:
 
         self._funcs = None
         self._pipes = None
+        self._channel = None
         self._thread_pool = None
 
+    def cancel(self):
+        """Cancel the pipeline.  This can be called from any thread and each command will stop the next time it
+        writes to, or reads from, an in-process pipe.  Commands connected by OS pipes are left to stop when the
+        external command at the other end does."""
+        _LOGGER.debug('Cancelling pipe processor')
+        for reader, _writer in list(self._pipes.values()):
+            if isinstance(reader, PipeReader):
+                reader.cancel()
+
     # region Cmd2 compatibility
     def send_sigint(self):
         """Send a SIGINT to the process similar to if <Ctrl>+C were pressed"""
-        self.shutdown(wait=False)
+        self.cancel()
 
     def terminate(self):
         """Terminate the process"""
-        self.shutdown(wait=False)
+        self.cancel()
 
     def wait(self):
         """Wait for the process to finish"""
@@ -257,11 +706,19 @@ class Piper:
                 done_redirecting.set()
                 return func()
 
-    def _get_pipe(self, idx) -> Tuple:
+    def _get_pipe(self, idx) -> Tuple[TextIO, TextIO]:
+        """Get the (reader, writer) streams of the pipe at the input of the func with the given index"""
         try:
             pipe = self._pipes[idx]
         except KeyError:
-            pipe = os.pipe()
+            if self._in_process and not (self._external[idx] or self._external[idx + 1]):
+                pipe = make_pipe()
+            else:
+                read, write = os.pipe()
+                # pylint: disable=consider-using-with
+                pipe = open(read, 'r', encoding=self.encoding), open(write,
+                                                                     'w',
+                                                                     encoding=self.encoding)
             self._pipes[idx] = pipe
             _LOGGER.debug('Created pipe %s for func %s', pipe, self._funcs[idx])
 
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 """Module that contains classes used to provide results to the user"""
 import collections.abc
-from typing import Callable, Iterator
+from typing import Callable, Iterator, Sequence
 
 import pyos.results
 from pyos.psh_lib import representers
@@ -37,6 +37,11 @@ class CachingResults(collections.abc.Sequence, pyos.results.BaseResults):
     def __iter__(self):
         return self._iter_generator()
 
+    @property
+    def cached(self) -> Sequence:
+        """The results that have been retrieved from the iterator so far"""
+        return self._cache
+
     def __len__(self):
         self._ensure_cache()
         return len(self._cache)
@@ -44,6 +49,14 @@ class CachingResults(collections.abc.Sequence, pyos.results.BaseResults):
     def __repr__(self):
         return '\n'.join([self._representer(item) for item in self])
 
+    def close(self):
+        """Stop iterating, closing the iterator if it supports it.  Only the results retrieved so far will be
+        available afterwards."""
+        iterator, self._iterator = self._iterator, None
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            close()
+
     def _iter_generator(self, at_end=False):
         idx = 0 if not at_end else len(self._cache)
         while True:
@@ -13,3 +13,7 @@ class BaseResults:
     def __stream_out__(self, stream: TextIO):
         """Stream the string representation of this object to the output stream"""
         stream.write(self.__str__())
+
+    def close(self):
+        """Release anything (e.g. database cursors) that is being used to get results that haven't been retrieved
+        yet.  These results will not be available afterwards."""
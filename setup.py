@@ -33,7 +33,6 @@ setup(
         'mincepy>=0.16.1, <0.17',
         'click',
         'ipython',
-        'pandas',
         'pymongo',
         'pyprnt',
         'pytray >= 0.3.0',
@@ -43,6 +42,7 @@ setup(
     ],
     extras_require={
         'gui': ['mincepy[gui]'],
+        'pandas': ['pandas'],
         'dev': [
             'cmd2-ext-test',
             'ipython',
@@ -59,7 +59,10 @@ setup(
             'twine',
         ],
     },
-    packages=['pyos', 'pyos.db', 'pyos.fs', 'pyos.os', 'pyos.psh', 'pyos.psh.cmds', 'pyos.psh_lib'],
+    packages=[
+        'pyos', 'pyos.aio', 'pyos.aio.db', 'pyos.db', 'pyos.fs', 'pyos.os', 'pyos.psh',
+        'pyos.psh.cmds', 'pyos.psh_lib'
+    ],
     project_urls={
         'Documentation': 'https://pyos.readthedocs.org/',
         'Source': 'https://github.com/muhrin/pyos/',
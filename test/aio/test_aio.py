@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+import mincepy
+import pytest
+
+import pyos
+from pyos import aio
+from pyos import db
+from pyos import os as pos
+from pyos.db import fs
+
+
+def test_find_entry(monkeypatch):
+    pos.makedirs('a/b')
+    db.save_one(mincepy.testing.Car(), 'a/my_car')
+
+    queries = []
+    find_entries = fs.find_entries
+
+    def counting_find_entries(paths, **kwargs):
+        queries.append(len(paths))
+        return find_entries(paths, **kwargs)
+
+    monkeypatch.setattr(fs, 'find_entries', counting_find_entries)
+
+    paths = [pos.withdb.to_fs_path(name) for name in ('a', 'a/b', 'a/my_car', 'a/missing')] * 50
+
+    async def find_all():
+        return await asyncio.gather(*[aio.db.fs.find_entry(path) for path in paths])
+
+    entries = asyncio.run(find_all())
+    # All the concurrent lookups should have been made in one go
+    assert queries == [len(paths)]
+    assert [entry is not None for entry in entries[:4]] == [True, True, True, False]
+    assert fs.Entry.is_dir(entries[1])
+    assert fs.Entry.is_obj(entries[2])
+
+    async def check():
+        assert await aio.os.isdir('a/b')
+        assert await aio.os.isfile('a/my_car')
+        assert not await aio.os.exists('a/missing')
+        assert sorted(await aio.os.listdir('a')) == ['b', 'my_car']
+        with pytest.raises(pyos.exceptions.NotADirectoryError):
+            await aio.os.listdir('a/my_car')
+
+    asyncio.run(check())
+
+
+def test_iter_children():
+    pos.makedirs('cars')
+    cars = [mincepy.testing.Car() for _ in range(10)]
+    db.save_many([(car, f'cars/car_{idx}') for idx, car in enumerate(cars)])
+    cars_id = fs.Entry.id(fs.find_entry(pos.withdb.to_fs_path('cars/')))
+
+    async def get_names(**kwargs):
+        return [fs.Entry.name(entry) async for entry in aio.db.fs.iter_children(cars_id, **kwargs)]
+
+    assert sorted(asyncio.run(get_names(batch_size=3))) == sorted(f'car_{idx}' for idx in range(10))
+    assert asyncio.run(get_names(sort='name', limit=2)) == ['car_0', 'car_1']
+
+    async def get_paths():
+        return await aio.db.fs.get_paths(*[car.obj_id for car in cars])
+
+    assert asyncio.run(get_paths())[0] == pos.withdb.to_fs_path('cars/car_0')
+
+
+def test_writes():
+
+    async def write():
+        await aio.os.makedirs('a/b')
+        await aio.db.save_many([(mincepy.testing.Car(), f'a/b/car_{idx}') for idx in range(5)])
+        await aio.os.rename('a/b/car_0', 'a/car_0')
+        with pytest.raises(pyos.exceptions.FileExistsError):
+            await aio.os.makedirs('a/b')
+
+        return await aio.os.listdir('a/b')
+
+    assert sorted(asyncio.run(write())) == [f'car_{idx}' for idx in range(1, 5)]
+    assert pos.path.exists('a/car_0')
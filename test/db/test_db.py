@@ -1,11 +1,13 @@
 # -*- coding: utf-8 -*-
 
+import bson
 import pytest
 
 import mincepy
 from mincepy.testing import Car
 
 import pyos.exceptions
+import pyos.os
 from pyos import db
 
 
@@ -41,3 +43,114 @@ def test_save_meta():
     car = Car()
     car_id = db.save_one(car, 'my_car', meta=dict(license='abcdef'))
     assert db.get_meta(car_id)['license'] == 'abcdef'
+
+
+def test_save_many_overwrite(historian: mincepy.Historian):
+    pyos.os.makedirs('garage')
+    old_ids = db.save_many([(Car(), f'garage/car{idx}') for idx in range(5)])
+    old_ids.append(db.save_one(Car(), 'lonely_car'))
+
+    # Saving into the same places should be refused, reporting all the paths that exist
+    with pytest.raises(pyos.exceptions.FileExistsError):
+        db.save_many([(Car(), f'garage/car{idx}') for idx in range(5)])
+    assert len(pyos.os.listdir('garage')) == 5
+
+    # Now overwrite some of them, and move an existing one into the directory as well
+    cars = [(Car(), f'garage/car{idx}') for idx in range(3)]
+    cars.append((historian.load(old_ids[-1]), 'garage/'))
+    new_ids = db.save_many(cars, overwrite=True)
+
+    assert sorted(
+        pyos.os.listdir('garage')) == ['car0', 'car1', 'car2', 'car3', 'car4', 'lonely_car']
+    for old_id in old_ids[:3]:
+        with pytest.raises(mincepy.NotFound):
+            historian.load(old_id)
+    assert [next(db.get_oid(f'garage/car{idx}')) for idx in range(3)] == new_ids[:3]
+    assert next(db.get_oid('garage/lonely_car')) == old_ids[-1]
+
+    # Saving two objects to the same path in one go isn't allowed
+    with pytest.raises(pyos.exceptions.FileExistsError):
+        db.save_many([(Car(), 'twin'), (Car(), 'twin')])
+    assert not pyos.os.path.exists('twin')
+
+    # ...unless overwriting, in which case the last one wins
+    twin_ids = db.save_many([(Car(), 'twin'), (Car(), 'twin')], overwrite=True)
+    assert next(db.get_oid('twin')) == twin_ids[1]
+    with pytest.raises(mincepy.NotFound):
+        historian.load(twin_ids[0])
+
+
+@pytest.mark.parametrize('background', (False, True))
+def test_save_many_chunked(background):
+    pyos.os.makedirs('garage')
+
+    def cars():
+        for idx in range(25):
+            yield Car(), f'garage/car{idx}'
+
+    obj_ids = db.save_many(cars(), chunk_size=10, background=background)
+    assert len(obj_ids) == 25
+    assert len(pyos.os.listdir('garage')) == 25
+    assert next(db.get_oid('garage/car24')) == obj_ids[-1]
+
+    # A failure part of the way through leaves the chunks that were already committed
+    def bad_cars():
+        for idx in range(15):
+            yield Car(), f'bad/car{idx}'
+        yield Car(), 'bad/car15', 'extra'
+
+    pyos.os.makedirs('bad')
+    with pytest.raises(ValueError):
+        db.save_many(bad_cars(), chunk_size=10, background=background)
+    assert len(pyos.os.listdir('bad')) == 10
+
+    with pytest.raises(ValueError):
+        db.save_many([], chunk_size=0)
+
+
+@pytest.mark.parametrize('background', (False, True))
+def test_load_many(historian: mincepy.Historian, background):
+    obj_ids = db.save_many([Car(colour=colour) for colour in ('red', 'green', 'blue')])
+    historian.delete(obj_ids[1])
+    obj_ids.append(bson.ObjectId())
+
+    loaded = list(db.load_many(obj_ids, batch_size=2, background=background))
+    assert len(loaded) == 4
+    assert [car.colour for car in (loaded[0], loaded[2])] == ['red', 'blue']
+    assert isinstance(loaded[1], mincepy.NotFound)
+    assert isinstance(loaded[3], mincepy.NotFound)
+
+    # Stopping early is fine
+    assert next(db.load_many(obj_ids, batch_size=1, background=background)) is loaded[0]
+
+
+def test_load_many_one_batch(monkeypatch):
+    obj_ids = db.save_many([Car() for _ in range(3)])
+
+    started = []
+    monkeypatch.setattr(db.lib, '_iter_prefetched',
+                        lambda batches, name: started.append(name) or batches)
+
+    # There's nothing to overlap with a single batch so no thread should be started
+    assert len(list(db.load_many(obj_ids, batch_size=3, background=True))) == 3
+    assert not started
+    assert len(list(db.load_many(obj_ids, batch_size=2, background=True))) == 3
+    assert started == ['pyos-load-many']
+
+
+def test_type_names(historian: mincepy.Historian):
+    car_type_id = historian.get_obj_type_id(Car)
+    type_names = db.get_session().type_names
+    type_names.clear()
+
+    names = type_names.get_many([car_type_id, car_type_id, 'unknown-type'])
+    assert names == {car_type_id: 'mincepy:Car', 'unknown-type': 'unknown-type'}
+    assert len(type_names) == 2
+
+    class Unregistered(mincepy.SimpleSavable):
+        TYPE_ID = 'unknown-type'
+
+    # Registering a new type should invalidate the table
+    historian.register_type(Unregistered)
+    assert type_names.get('unknown-type') != 'unknown-type'
+    assert len(type_names) == 1
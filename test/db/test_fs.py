@@ -1,13 +1,16 @@
 # -*- coding: utf-8 -*-
+import datetime
 import math
 
 import bson
 import mincepy
 import pytest
 
+import pyos.exceptions
 from pyos import os as pos
 from pyos import db
 from pyos.db import fs
+from pyos.db import migrations
 
 
 def test_delete_outside_pyos(archive_uri):
@@ -68,6 +71,46 @@ def test_iter_children():
     assert fs.Entry.id(children[0]) == black_car.obj_id
 
 
+def test_iter_children_paging():
+    names = [f'car{idx:02d}' for idx in range(10)]
+    cars = []
+    for name in reversed(names):
+        car = mincepy.testing.Car()
+        db.save_one(car, name)
+        cars.append(car)
+
+    entry_id = fs.Entry.id(fs.find_entry(pos.withdb.to_fs_path(pos.getcwd())))
+
+    def get_names(**kwargs):
+        return [fs.Entry.name(child) for child in fs.iter_children(entry_id, **kwargs)]
+
+    assert get_names(sort='name') == names
+    assert get_names(sort='name', reverse=True) == names[::-1]
+    assert get_names(sort='name', skip=2, limit=3) == names[2:5]
+    assert get_names(sort='name', after='car04', limit=2) == names[5:7]
+    assert get_names(sort='name', reverse=True, after='car04') == names[3::-1]
+
+    # The cars were saved in reverse name order
+    assert get_names(sort='ctime') == names[::-1]
+    assert get_names(sort='mtime', reverse=True, limit=2) == names[:2]
+
+    # Paging should still work when filtering on the records
+    cars[0].colour = 'black'
+    db.save_one(cars[0])
+    assert get_names(sort='mtime', reverse=True, limit=1) == [names[-1]]
+    assert get_names(obj_filter=mincepy.testing.Car.colour != 'black', sort='name', skip=8) == \
+        [names[8]]
+
+    with pytest.raises(ValueError):
+        get_names(sort='size')
+    with pytest.raises(ValueError):
+        get_names(sort='ctime', after='car04')
+
+    # Scanning is lazy and can be stopped early
+    with pos.scandir() as entries:
+        assert next(entries).name in names
+
+
 def test_iter_descendents():
     start_dir = pos.getcwd()
 
@@ -87,6 +130,42 @@ def test_iter_descendents():
         fs.iter_descendents(root_id, obj_filter=mincepy.testing.Car.colour == 'black'))
     assert len(descendents) == 6
 
+    # Check the depths and paths, both with and without a maximum depth
+    for max_depth, num_expected in ((None, 9), (3, 7), (2, 4)):
+        descendents = tuple(fs.iter_descendents(root_id, max_depth=max_depth, path=('start',)))
+        assert len(descendents) == num_expected
+        for entry in descendents:
+            depth = fs.Entry.depth(entry)
+            assert len(fs.Entry.path(entry)) == depth + 1
+            assert fs.Entry.path(entry)[:depth] == ('start', 'a', 'b', 'c')[:depth]
+
+    objects = tuple(fs.iter_descendents(root_id, type=fs.Schema.TYPE_OBJ, max_depth=2))
+    assert len(objects) == 2
+    assert all(map(fs.Entry.is_obj, objects))
+
+
+def test_iter_descendents_type(monkeypatch):
+    """Check that walking the whole subtree only fetches the entries of the requested type"""
+    pos.makedirs('a/b/c')
+    db.save_many([(mincepy.testing.Car(), path) for path in ('a/', 'a/b/', 'a/b/c/')])
+    a_id = fs.Entry.id(fs.find_entry(pos.withdb.to_fs_path('a')))
+
+    fetched = []
+    join_records = fs._join_records  # pylint: disable=protected-access
+
+    def recording_join_records(entries, *args, **kwargs):
+        entries = list(entries)
+        fetched.extend(entries)
+        return join_records(entries, *args, **kwargs)
+
+    monkeypatch.setattr(fs, '_join_records', recording_join_records)
+
+    for entry_type, num_expected in ((fs.Schema.TYPE_OBJ, 3), (fs.Schema.TYPE_DIR, 2)):
+        fetched.clear()
+        found = tuple(fs.iter_descendents(a_id, type=entry_type))
+        assert len(found) == num_expected
+        assert all(fs.Entry.type(entry) == entry_type for entry in fetched)
+
 
 @pytest.mark.skip()
 def test_delete_many_entries():
@@ -101,3 +180,391 @@ def test_delete_many_entries():
         db.fs.insert_obj(obj_id, ('/', str(obj_id)))
 
     db.fs._delete_entries(*fake_objects)  # pylint: disable=protected-access
+
+
+def test_abspaths_kept_in_sync():
+    pos.makedirs('a/b')
+    car = mincepy.testing.Car()
+    db.save_one(car, 'a/b/my_car')
+
+    car_entry = fs.find_entry(pos.withdb.to_fs_path('a/b/my_car'))
+    assert fs.Entry.id(car_entry) == car.obj_id
+    assert fs.Entry.abspath(car_entry) == pos.path.abspath('a/b/my_car')
+
+    # Moving a directory should update the paths of everything below it
+    pos.rename('a/', 'c/')
+    assert fs.find_entry(pos.withdb.to_fs_path('a/b/my_car')) is None
+    car_entry = fs.find_entry(pos.withdb.to_fs_path('c/b/my_car'))
+    assert fs.Entry.id(car_entry) == car.obj_id
+    assert fs.Entry.path(car_entry) == pos.withdb.to_fs_path('c/b/my_car')
+
+    # Renaming the object itself
+    db.rename(car, 'c/your_car')
+    assert fs.Entry.id(fs.find_entry(pos.withdb.to_fs_path('c/your_car'))) == car.obj_id
+
+    with pytest.raises(pyos.exceptions.PyOSError):
+        pos.rename('c/', 'c/b/c/')
+
+
+def test_add_abspaths_migration(historian):
+    pos.makedirs('a/b')
+    car = mincepy.testing.Car()
+    db.save_one(car, 'a/b/my_car')
+
+    # Simulate a database from before materialized paths were introduced
+    coll = fs.get_fs_collection(historian)
+    coll.update_many({}, {'$unset': {fs.Schema.ABSPATH: ''}})
+    db.get_session().entries_cache.clear()
+    assert fs.find_entry(pos.withdb.to_fs_path('a/b/my_car')) is None
+
+    migrations.add_abspaths(historian)
+    assert fs.Entry.id(fs.find_entry(pos.withdb.to_fs_path('a/b/my_car'))) == car.obj_id
+    assert fs.find_entry(fs.ROOT_PATH) is not None
+
+
+def test_find_entries():
+    pos.makedirs('a/b')
+    car = mincepy.testing.Car()
+    db.save_one(car, 'a/my_car')
+
+    paths = tuple(map(pos.withdb.to_fs_path, ('a/my_car', 'a/b', 'a/missing', 'a/my_car')))
+    entries = fs.find_entries(paths)
+    assert len(entries) == 4
+    assert fs.Entry.id(entries[0]) == car.obj_id
+    assert fs.Entry.is_dir(entries[1])
+    assert entries[2] is None
+    assert fs.Entry.id(entries[3]) == car.obj_id
+
+    # Check that the cache can be populated in one go, including with paths that don't exist
+    cache = fs.EntriesCache(db.get_historian())
+    cache.prefetch(paths)
+    assert fs.Entry.id(cache.get_entry_from_path(paths[0])) == car.obj_id
+    assert cache.get_entry_from_path(paths[2]) is None
+    assert cache.get_entry_from_id(car.obj_id) is not None
+
+
+def test_entries_cache():
+    cache = db.get_session().entries_cache
+    assert cache.maxsize == 0  # Disabled by default
+    cache.resize(db.cache.EntriesLru.DEFAULT_MAXSIZE)
+    pos.makedirs('a/b')
+    car = mincepy.testing.Car()
+    db.save_one(car, 'a/b/my_car')
+    path = pos.withdb.to_fs_path('a/b/my_car')
+
+    cache.clear()
+    assert fs.Entry.id(fs.find_entry(path)) == car.obj_id
+    assert cache.misses == 1 and cache.hits == 0
+    entry = fs.find_entry(path)
+    assert cache.hits == 1
+    # Hits should give the same type of entry as misses
+    assert isinstance(entry, fs.FsEntry)
+    assert fs.Entry.id(entry) == car.obj_id
+    assert isinstance(fs.get_entry(car.obj_id), fs.FsEntry)
+    # The parent directories should now be served from the cache
+    assert len(fs.find_path_entries(path)) == len(path)
+    assert cache.cache_info().currsize == len(path)
+
+    # Writes through pyos should invalidate the cache
+    pos.rename('a/', 'c/')
+    assert fs.find_entry(path) is None
+    assert fs.Entry.id(fs.find_entry(pos.withdb.to_fs_path('c/b/my_car'))) == car.obj_id
+
+    db.get_historian().delete(car)
+    assert fs.find_entry(pos.withdb.to_fs_path('c/b/my_car')) is None
+    assert fs.get_entry(car.obj_id) is None
+
+    # Check that the cache is bounded
+    small = db.cache.EntriesLru(maxsize=2)
+    for entry in fs.find_path_entries(pos.withdb.to_fs_path('c/b')):
+        small.put(entry)
+    assert len(small) == 2
+    assert small.find('/') is None
+    small.resize(1)
+    assert len(small) == 1
+
+
+def test_rename_discard_order(monkeypatch):
+    pos.makedirs('a/b')
+    db.save_one(mincepy.testing.Car(), 'a/b/my_car')
+
+    # Record the order of the writes and the cache discards
+    events = []
+    get_fs_collection = fs.get_fs_collection
+
+    class RecordingCollection:
+
+        def __init__(self, coll):
+            self._coll = coll
+
+        def __getattr__(self, item):
+            attr = getattr(self._coll, item)
+            if item.startswith('update'):
+
+                def recording(*args, **kwargs):
+                    events.append(item)
+                    return attr(*args, **kwargs)
+
+                return recording
+            return attr
+
+    def recording_discard(name):
+        discard = getattr(fs.EntriesCache, name)
+
+        def wrapper(self, *args):
+            events.append('discard')
+            return discard(self, *args)
+
+        return wrapper
+
+    monkeypatch.setattr(
+        fs, 'get_fs_collection',
+        lambda *args, **kwargs: RecordingCollection(get_fs_collection(*args, **kwargs)))
+    monkeypatch.setattr(fs.EntriesCache, 'discard', recording_discard('discard'))
+    monkeypatch.setattr(fs.EntriesCache, 'discard_subtree', recording_discard('discard_subtree'))
+    # mongomock doesn't support the update pipeline used to move the subtree
+    monkeypatch.setattr(fs, '_move_subtree_update',
+                        lambda *_: {'$set': {
+                            fs.Schema.UTIME: datetime.datetime.now()
+                        }})
+
+    fs.rename(pos.withdb.to_fs_path('a/b/'), pos.withdb.to_fs_path('a/c/'))
+    assert events[:2] == ['update_one', 'update_many']
+    assert set(events[2:]) == {'discard'}
+
+
+def test_set_parent(historian):
+    pos.makedirs('a/b')
+    car = mincepy.testing.Car()
+    db.save_one(car, 'a/my_car')
+    b_id = fs.Entry.id(fs.find_entry(pos.withdb.to_fs_path('a/b/')))
+
+    assert fs.Entry.set_parent(car.obj_id, b_id, historian)
+    entry = fs.get_entry(car.obj_id)
+    assert fs.Entry.parent(entry) == b_id
+    assert fs.Entry.abspath(entry) == fs.to_abspath(pos.withdb.to_fs_path('a/b/my_car'))
+    assert pos.path.exists('a/b/my_car')
+    assert not pos.path.exists('a/my_car')
+
+    with pytest.raises(pyos.exceptions.NotADirectoryError):
+        fs.Entry.set_parent(b_id, car.obj_id, historian)
+
+
+def test_entries_cache_stale(historian):
+    """Check that entries changed by another client are not served stale from the cache"""
+    session = db.get_session()
+    pos.makedirs('a/')
+    car = mincepy.testing.Car()
+    db.save_one(car, 'a/my_car')
+    path = pos.withdb.to_fs_path('a/my_car')
+
+    # Another client using the same database
+    other_historian = mincepy.Historian(historian.archive)
+    other = db.database.Session(other_historian)
+    try:
+        assert fs.find_entry(path) is not None
+        fs.rename(path, pos.withdb.to_fs_path('a/your_car'), historian=other_historian)
+        assert fs.find_entry(path) is None
+
+        # Watching enables the cache, and keeps it up to date
+        watcher = session.start_watching(use_change_streams=False,
+                                         poll_interval=3600,
+                                         clock_skew=datetime.timedelta(0))
+        try:
+            assert session.entries_cache.maxsize > 0
+            new_path = pos.withdb.to_fs_path('a/your_car')
+            assert fs.find_entry(new_path) is not None
+            assert session.entries_cache.peek(car.obj_id) is not None
+
+            fs.rename(new_path, path, historian=other_historian)
+            watcher.poll()
+            assert fs.find_entry(new_path) is None
+            assert fs.Entry.id(fs.find_entry(path)) == car.obj_id
+        finally:
+            session.stop_watching()
+        assert session.entries_cache.maxsize == 0
+        assert len(session.entries_cache) == 0
+    finally:
+        other.close()
+
+
+def test_get_paths(historian):
+    pos.makedirs('a/b')
+    cars = [mincepy.testing.Car() for _ in range(4)]
+    db.save_one(cars[0], 'a/car0')
+    db.save_one(cars[1], 'a/b/car1')
+    db.save_one(cars[2], 'a/b/car2')
+    db.save_one(cars[3], 'car3')
+
+    obj_ids = [car.obj_id for car in cars]
+    expected = [pos.withdb.to_fs_path(path) for path in ('a/car0', 'a/b/car1', 'a/b/car2', 'car3')]
+    missing = bson.ObjectId()
+
+    assert fs.get_paths(obj_ids[2], missing, *obj_ids) == (expected[2], None, *expected)
+    assert tuple(fs.iter_paths(reversed(obj_ids), batch_size=3)) == tuple(reversed(expected))
+
+    # Check that paths can still be resolved through the parent directories without materialized paths
+    fs.get_fs_collection(historian).update_many({fs.Schema.ID: {
+        '$ne': fs.ROOT_ID
+    }}, {'$unset': {
+        fs.Schema.ABSPATH: ''
+    }})
+    db.get_session().entries_cache.clear()
+    assert fs.get_paths(*obj_ids, missing) == (*expected, None)
+
+
+def test_fs_entry():
+    source = fs.Schema.dir_dict('a', fs.ROOT_ID, abspath='/a')
+    entry = fs.FsEntry(source)
+    assert entry == source
+    assert dict(entry) == source
+    assert fs.Entry.name(entry) == 'a'
+    assert fs.Schema.DEPTH not in entry
+    assert entry.get(fs.Schema.DEPTH) is None
+    with pytest.raises(KeyError):
+        _ = entry[fs.Schema.DEPTH]
+
+    # Non-standard fields are supported too
+    entry[fs.Schema.DEPTH] = 2
+    entry['custom'] = 'value'
+    assert entry[fs.Schema.DEPTH] == 2
+    assert dict(entry)['custom'] == 'value'
+    del entry['custom']
+    assert 'custom' not in entry
+    assert len(entry.copy()) == len(entry)
+
+    # Entries coming out of the database are compact ones
+    pos.makedirs('a/b')
+    assert isinstance(fs.find_entry(pos.withdb.to_fs_path('a')), fs.FsEntry)
+    assert all(isinstance(child, fs.FsEntry) for child in fs.iter_descendents(fs.ROOT_ID))
+
+
+def test_fields_projection():
+    pos.makedirs('a/b')
+    car = mincepy.testing.Car()
+    db.save_one(car, 'a/my_car')
+    a_id = fs.Entry.id(fs.find_entry(pos.withdb.to_fs_path('a')))
+
+    children = list(fs.iter_children(a_id, fields=(fs.Schema.NAME,)))
+    assert sorted(map(fs.Entry.name, children)) == ['b', 'my_car']
+    for child in children:
+        assert set(child.keys()) == {fs.Schema.ID, fs.Schema.TYPE, fs.Schema.NAME}
+
+    # Sorting on a record field needs that field
+    children = list(fs.iter_children(a_id, sort='mtime', fields=(fs.Schema.NAME,)))
+    assert all(fs.Schema.STIME in child for child in children)
+
+    # Record fields are only copied over when asked for
+    obj_entry = fs.get_entries([car.obj_id], fields=(fs.Schema.VER,))[0]
+    assert fs.Entry.ver(obj_entry) == 0
+    assert fs.Schema.TYPE_ID not in obj_entry
+
+    descendents = list(fs.iter_descendents(fs.ROOT_ID, fields=()))
+    assert len(descendents) == 3
+    assert fs.Entry.path(descendents[-1]) == ('a', 'my_car')
+    assert not any(fs.Schema.TYPE_ID in entry for entry in descendents)
+
+    # Objects without a record still don't exist
+    db.get_historian().delete(car)
+    assert not pos.path.exists('a/my_car')
+    assert pos.listdir('a') == ['b']
+
+
+def test_execute_instruction_errors():
+    for name in ('a', 'b'):
+        db.save_one(mincepy.testing.Car(), name)
+
+    cwd = pos.withdb.to_fs_path(pos.getcwd())
+    instructions = [fs.SetObjPath(bson.ObjectId(), cwd + (name,)) for name in ('a', 'new', 'b')]
+    with pytest.raises(pyos.exceptions.FileExistsError) as excinfo:
+        fs.execute_instructions(instructions, ordered=False)
+
+    # Both failures should be mapped back to their paths while the rest went ahead
+    assert excinfo.value.args == (cwd + ('a',), cwd + ('b',))
+    assert fs.get_fs_collection().count_documents({fs.Schema.NAME: 'new'}) == 1
+
+
+def test_make_dirs_many(historian, monkeypatch):
+    pos.makedirs('a/b')
+    cwd = pos.withdb.to_fs_path(pos.getcwd())
+    paths = [cwd + ('a', 'b', 'c'), cwd + ('a', 'd'), cwd + ('a', 'd', 'e', 'f'), cwd + ('g',)]
+    assert fs.make_dirs_many(paths) == 5
+    for path in paths:
+        assert fs.Entry.is_dir(fs.find_entry(path))
+    assert fs.make_dirs_many(paths) == 0
+
+    with pytest.raises(pyos.exceptions.FileExistsError):
+        fs.make_dirs_many([cwd + ('h',), cwd + ('g',)], exists_ok=False)
+    assert fs.find_entry(cwd + ('h',)) is None
+
+    db.save_one(mincepy.testing.Car(), 'car')
+    with pytest.raises(pyos.exceptions.NotADirectoryError):
+        fs.make_dirs_many([cwd + ('car', 'sub')])
+
+    # Simulate another client creating one of the directories just after we looked
+    coll = fs.get_fs_collection(historian)
+    g_id = fs.Entry.id(fs.find_entry(cwd + ('g',)))
+    racing = fs.Schema.dir_dict('j', g_id, abspath=fs.to_abspath(cwd + ('g', 'j')))
+    find_raw_entries = fs._find_raw_entries  # pylint: disable=protected-access
+
+    def find_then_race(*args, **kwargs):
+        found = find_raw_entries(*args, **kwargs)
+        if coll.count_documents({fs.Schema.NAME: 'j'}) == 0:
+            coll.insert_one(racing)
+        return found
+
+    monkeypatch.setattr(fs, '_find_raw_entries', find_then_race)
+    assert fs.make_dirs_many([cwd + ('g', 'i'), cwd + ('g', 'j', 'k')]) == 2
+    assert fs.Entry.parent(fs.find_entry(cwd + ('g', 'j', 'k'))) == racing[fs.Schema.ID]
+
+
+def test_delete_tree(historian):
+    pos.makedirs('a/b/c')
+    cars = [mincepy.testing.Car() for _ in range(6)]
+    db.save_many(list(zip(cars, ['a/', 'a/', 'a/b/', 'a/b/', 'a/b/c/', 'x'])))
+    a_id = fs.Entry.id(fs.find_entry(pos.withdb.to_fs_path('a')))
+
+    class Interrupt(Exception):
+        pass
+
+    def interrupt(_num):
+        raise Interrupt
+
+    # Get interrupted after the first batch, the deepest entries should have gone first
+    with pytest.raises(Interrupt):
+        fs.delete_tree(a_id, batch_size=2, progress=interrupt)
+    assert not pos.path.exists('a/b/c')
+    assert pos.path.exists('a/b')
+
+    # Now carry on
+    progress = []
+    assert fs.delete_tree(a_id, batch_size=2, progress=progress.append) == 6
+    assert sum(progress) == 6
+    assert not pos.path.exists('a')
+    for car in cars[:-1]:
+        with pytest.raises(mincepy.NotFound):
+            historian.load(car.obj_id)
+    assert pos.path.exists('x')
+
+    with pytest.raises(pyos.exceptions.FileNotFoundError):
+        fs.delete_tree(a_id)
+
+
+def test_find_children():
+    pos.makedirs('a/sub')
+    pos.makedirs('b')
+    db.save_many([(mincepy.testing.Car(), path) for path in ('a/car1', 'a/car2', 'b/car1', 'b/bus')
+                 ])
+    dir_ids = [fs.Entry.id(fs.find_entry(pos.withdb.to_fs_path(path))) for path in ('a', 'b')]
+
+    def names(**kwargs):
+        return sorted(fs.Entry.name(entry) for entry in fs.find_children(dir_ids, **kwargs))
+
+    assert names() == ['bus', 'car1', 'car1', 'car2', 'sub']
+    assert names(batch_size=1, fields=()) == ['bus', 'car1', 'car1', 'car2', 'sub']
+    assert names(name='car1') == ['car1', 'car1']
+    assert names(name_regex='^car') == ['car1', 'car1', 'car2']
+    assert names(type=fs.Schema.TYPE_DIR) == ['sub']
+
+    with pytest.raises(ValueError):
+        names(name='car1', name_regex='^car')
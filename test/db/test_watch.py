@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+import datetime
+
+import bson
+import mincepy
+
+import pyos
+from pyos import db
+from pyos import os as pos
+from pyos.db import fs
+
+
+def test_polling_watcher(historian: mincepy.Historian):
+    pos.makedirs('a/b')
+    car = mincepy.testing.Car()
+    db.save_one(car, 'a/my_car')
+
+    # Polling should be able to use the indexes on the times
+    indexes = fs.get_fs_collection(historian).index_information().values()
+    indexed = {key[0][0] for key in (index['key'] for index in indexes)}
+    assert {fs.Schema.CTIME, fs.Schema.UTIME} <= indexed
+
+    session = db.get_session()
+    # Poll explicitly, this also means that the test works with mongomock which doesn't support change streams
+    watcher = session.start_watching(use_change_streams=False,
+                                     poll_interval=3600,
+                                     clock_skew=datetime.timedelta(0))
+    try:
+        assert watcher.mode == db.watch.POLLING
+
+        a_dir = pyos.fs.DirectoryNode('a')
+        a_dir.expand()
+        assert len(a_dir) == 2
+        b_entry = fs.find_entry(pos.withdb.to_fs_path('a/b'))
+        assert session.entries_cache.peek(fs.Entry.id(b_entry)) is not None
+
+        # Simulate another client adding and removing entries behind our back
+        coll = fs.get_fs_collection(historian)
+        coll.insert_one(fs.Schema.dir_dict('c', a_dir.entry_id, abspath=pos.path.abspath('a/c')))
+        watcher.poll()
+        assert len(a_dir) == 3
+        assert 'c' in [child.name for child in a_dir]
+
+        coll.delete_one({fs.Schema.ID: fs.Entry.id(b_entry)})
+        watcher.poll()
+        assert session.entries_cache.peek(fs.Entry.id(b_entry)) is None
+        assert fs.find_entry(pos.withdb.to_fs_path('a/b')) is None
+        assert len(a_dir) == 2
+
+        # Changes to directories nobody is watching shouldn't affect us
+        a_dir.expand()
+        coll.insert_one(fs.Schema.obj_dict(bson.ObjectId(), fs.ROOT_ID, 'other', abspath='/other'))
+        watcher.poll()
+        assert not a_dir._stale  # pylint: disable=protected-access
+    finally:
+        session.stop_watching()
+
+    assert session.watcher is None
+    assert not watcher.is_running
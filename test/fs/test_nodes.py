@@ -105,3 +105,74 @@ def test_container_show():
 
     res.show('abspath')
     assert str(pyos.pathlib.Path() / name) in str(res)
+
+
+def test_table_rendering():
+    pyos.os.makedirs('a_dir')
+    pyos.db.save_many([(Person('bart', 10), 'bart'), (Person('homer', 39), 'homer')])
+
+    res: pyos.fs.ContainerNode = pyos.psh.ls()  # pylint: disable=no-value-for-parameter
+    res.show('type', 'version', 'mtime', 'name', mode=pyos.fs.TABLE_VIEW)
+    lines = str(res).splitlines()
+    assert len(lines) == 3
+
+    # Types are left justified while names are right justified
+    assert lines[0].startswith('directory ')
+    assert all(line.startswith('mincepy:Person') for line in lines[1:])
+    assert len(set(len(line) for line in lines)) == 1
+    assert [line.split()[-1] for line in lines] == ['a_dir', 'bart', 'homer']
+    # Objects have a modification time, directories don't
+    assert pyos.fmt.pretty_datetime(res[1].mtime) in lines[1]
+
+    pandas = pytest.importorskip('pandas')
+    frame = res.to_dataframe()
+    assert isinstance(frame, pandas.DataFrame)
+    assert list(frame.columns) == ['type', 'version', 'mtime', 'name']
+    assert list(frame['name']) == ['a_dir', 'bart', 'homer']
+
+
+def test_prefetch():
+    # pylint: disable=protected-access
+    pyos.os.makedirs('people')
+    with pyos.pathlib.working_path('people'):
+        ids = pyos.db.save_many([(Person(name, 30), name) for name in ('bart', 'lisa', 'maggie')])
+    pyos.db.lib.set_meta(ids[0], meta={'family': 'simpson'})
+
+    people = pyos.fs.DirectoryNode('people')
+    people.expand(populate_objects=True)
+    assert all(node._record is not None for node in people)
+    assert all(node._obj is pyos.fs.nodes.UNSET for node in people)
+
+    people = pyos.fs.DirectoryNode('people')
+    people.expand()
+    people.prefetch(pyos.fs.PREFETCH_OBJ, pyos.fs.PREFETCH_META, batch_size=2)
+    assert [node.obj.name for node in people] == ['bart', 'lisa', 'maggie']
+    assert people['bart'].meta == {'family': 'simpson'}
+    assert people['lisa'].meta is None
+
+    with pytest.raises(ValueError):
+        people.prefetch('colour')
+
+
+def test_prefetch_cleared_on_render():
+    # pylint: disable=protected-access
+    pyos.os.makedirs('people')
+    with pyos.pathlib.working_path('people'):
+        ids = pyos.db.save_many([(Person(name, 30), name) for name in ('bart', 'lisa')])
+
+    people = pyos.fs.DirectoryNode('people')
+    people.expand()
+    people.prefetch(pyos.fs.PREFETCH_META)
+    pyos.db.lib.set_meta(ids[0], meta={'family': 'simpson'})
+    # The prefetched value is used until the container is rendered
+    assert people['bart'].meta is None
+
+    repr(people)
+    assert all(node._meta is pyos.fs.nodes.UNSET for node in people)
+    assert people['bart'].meta == {'family': 'simpson'}
+
+    # The same goes for objects prefetched while expanding
+    people = pyos.fs.DirectoryNode('people')
+    people.expand(populate_objects=[pyos.fs.PREFETCH_META])
+    repr(people)
+    assert all(node._meta is pyos.fs.nodes.UNSET for node in people)
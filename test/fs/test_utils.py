@@ -46,3 +46,75 @@ def test_find_from_attribute():
     res = fs.find(obj_filter=testing.Car.make == 'skoda')
     assert len(res) == 1
     assert res[0].obj is skoda
+
+
+def test_find_strategies():
+    """Check that the tree-first and filter-first strategies find the same objects"""
+    pyos.os.makedirs('a/b/c')
+    psh.save(testing.Car(make='skoda'), 'a/skoda')
+    psh.save(testing.Car(make='skoda'), 'a/b/c/skoda')
+    psh.save(testing.Car(make='ferrari'), 'a/b/ferrari')
+    psh.save(testing.Car(make='skoda'), 'outside')
+
+    for kwargs in (dict(), dict(obj_filter=testing.Car.make == 'skoda'), dict(maxdepth=2),
+                   dict(mindepth=2, obj_filter=testing.Car.make == 'skoda')):
+        found = {
+            strategy:
+            sorted(str(node.abspath) for node in fs.find('a/', strategy=strategy, **kwargs))
+            for strategy in (None, fs.TREE_FIRST, fs.FILTER_FIRST)
+        }
+        assert found[None] == found[fs.TREE_FIRST] == found[fs.FILTER_FIRST]
+        assert not any(path.endswith('outside') for path in found[None])
+
+    assert len(fs.find('a/', obj_filter=testing.Car.make == 'skoda', strategy=fs.FILTER_FIRST)) == 2
+    assert len(fs.find('a/', obj_filter=testing.Car.make == 'skoda', maxdepth=1)) == 1
+
+
+def test_find_concurrent(monkeypatch):
+    """Check that searching concurrently finds the same objects as searching sequentially"""
+    for root in ('p1', 'p2', 'p3'):
+        for subdir in ('a', 'b', 'b/c'):
+            pyos.os.makedirs(f'{root}/{subdir}')
+            for idx in range(3):
+                psh.save(testing.Car(make='skoda' if idx else 'ferrari'),
+                         f'{root}/{subdir}/car{idx}')
+        psh.save(testing.Car(make='skoda'), f'{root}/car')
+
+    # Make sure the big directories get split up
+    monkeypatch.setattr(fs.utils, 'SPLIT_THRESHOLD', 4)
+    monkeypatch.setattr(fs.utils, 'FIND_BATCH_SIZE', 2)
+
+    starting_points = ('p1/', 'p2/', 'p3/', 'p1/a/car0')
+    for kwargs in (dict(), dict(obj_filter=testing.Car.make == 'skoda'), dict(maxdepth=2),
+                   dict(mindepth=2)):
+        expected = sorted(str(node.abspath) for node in fs.find(*starting_points, **kwargs))
+        assert expected
+        for workers in (2, 4):
+            found = [
+                str(node.abspath)
+                for node in fs.find(*starting_points, workers=workers, ordered=True, **kwargs)
+            ]
+            assert sorted(found) == expected
+            # The ordered results should always come back the same way
+            assert found == [
+                str(node.abspath)
+                for node in fs.find(*starting_points, workers=workers, ordered=True, **kwargs)
+            ]
+            assert sorted(
+                str(node.abspath)
+                for node in fs.find(*starting_points, workers=workers, **kwargs)) == expected
+
+    # An object starting point
+    assert [str(node.abspath) for node in fs.find('p1/a/car0', workers=2)
+           ] == [str(pyos.os.path.abspath('p1/a/car0'))]
+
+
+def test_find_concurrent_stop_early():
+    for root in ('p1', 'p2'):
+        pyos.os.makedirs(root)
+        db_objs = [(testing.Car(), f'{root}/car{idx}') for idx in range(20)]
+        pyos.db.save_many(db_objs)
+
+    res = fs.find('p1/', 'p2/', workers=2)
+    assert res[0] is not None
+    res.close()
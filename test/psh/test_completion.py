@@ -1,4 +1,7 @@
 # -*- coding: utf-8 -*-
+import functools
+import types
+
 from mincepy.testing import Car
 
 import pyos.os
@@ -29,3 +32,28 @@ def test_completion_simple():
 
     # Check for non-existent paths
     assert not list(dir(psh.completion.PathCompletion('/does_not_exist/')))
+
+
+def test_path_complete(monkeypatch):
+    pyos.os.makedirs('garage/cars')
+    for name in ('car1', 'car2', 'bus', '.hidden_car'):
+        psh.save(Car(), f'garage/{name}')
+
+    app = types.SimpleNamespace(default_sort_key=str.lower)
+    complete = functools.partial(psh.completion.path_complete, app, _line='', _begidx=0, _endidx=0)
+
+    assert complete('garage/car') == ['garage/car1', 'garage/car2', 'garage/cars']
+    assert complete('garage/.') == ['garage/.hidden_car']
+    assert complete('garage/c*') == []
+    assert psh.completion.file_completer(app, 'garage/ca', '', 0,
+                                         0) == ['garage/car1', 'garage/car2']
+
+    # A single directory shouldn't get a space appended
+    assert psh.completion.dir_completer(app, 'gar', '', 0, 0) == ['garage']
+    assert not app.allow_appended_space
+
+    # Results are capped and a capped listing isn't used for longer prefixes
+    monkeypatch.setattr(psh.completion, 'MAX_COMPLETIONS', 2)
+    psh.completion.clear_cache()
+    assert len(complete('garage/')) == 2
+    assert complete('garage/bu') == ['garage/bus']
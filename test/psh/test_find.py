@@ -155,6 +155,19 @@ def test_shell_find_starting_point(pyos_shell):
             assert check_dir in dirs
 
 
+def test_shell_find_concurrent(pyos_shell):
+    subdirs = ['a/', 'b/', 'c/', 'd/']
+    for subdir in subdirs:
+        pyos.os.makedirs(subdir)
+        psh.save(Car(), f'{subdir}car')
+
+    res = pyos_shell.app_cmd(
+        f'find -j 2 --ordered {" ".join(f"-s {subdir}" for subdir in subdirs)}')
+    assert not res.stderr
+    paths = tuple(map(str.strip, res.stdout.split('\n')[:-1]))
+    assert paths == tuple(f'{subdir}car' for subdir in subdirs)
+
+
 def test_shell_find_by_type_simple(pyos_shell):
     car = Car()
     car.save()
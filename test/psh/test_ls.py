@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+import io
+
 from mincepy.testing import Car, Person
 
 import pyos
@@ -148,6 +150,64 @@ def test_ls_minus_l():
     assert str(car4_id) in res_repr
 
 
+def test_ls_sorting(monkeypatch):
+    for name in ('b', 'c', 'a'):
+        psh.save(Car(), name)
+
+    assert [node.name for node in psh.ls()] == ['a', 'b', 'c']
+    assert [node.name for node in psh.ls(-psh.r)] == ['c', 'b', 'a']
+    assert [node.name for node in psh.ls(-psh.t)] == ['a', 'c', 'b']
+    assert [node.name for node in psh.ls(-psh.t, -psh.r)] == ['b', 'c', 'a']
+
+    monkeypatch.setattr(pyos.fs.ContainerNode, 'RENDER_PAGE_SIZE', 2)
+    res = psh.ls(-psh.l)
+    assert [line.split()[-1] for line in repr(res).splitlines()] == ['a', 'b', 'c']
+
+
+def test_ls_table_pages(monkeypatch):
+    monkeypatch.setattr(pyos.fs.ContainerNode, 'RENDER_PAGE_SIZE', 3)
+    names = ['a', 'bb', 'ccc', 'dddd', 'eeeee', 'ffffff', 'ggggggg']
+    cars = [Car() for _ in names]
+    for car, name in zip(cars, names):
+        psh.save(car, name)
+    for _ in range(12):
+        # Bump the version of the first car to widen its column on the first page only
+        cars[0].colour = 'blue' if cars[0].colour != 'blue' else 'red'
+        cars[0].save()
+    pyos.os.makedirs('m_dir')
+
+    res = psh.ls(-psh.l)
+    lines = repr(res).splitlines()
+    assert len(lines) == len(names) + 1
+    # Directories come first
+    assert lines[0].split()[-1] == 'm_dir'
+    assert [line.split()[-1] for line in lines[1:]] == names
+    # The columns should line up across pages i.e. every right justified name ends in the same place
+    assert len(set(map(len, lines))) == 1
+
+    # Directories come first whatever the order of the children
+    res = pyos.fs.ResultsNode()
+    for node in sorted(psh.ls(), key=lambda node: isinstance(node, pyos.fs.DirectoryNode)):
+        res.append(node)
+    res.show('name', mode=pyos.fs.TABLE_VIEW)
+    assert repr(res).split()[0] == 'm_dir'
+
+    # On a terminal the list view is laid out as one grid rather than one per page
+    grids = []
+    columnize = nodes.columnize.columnize
+    monkeypatch.setattr(
+        nodes.columnize, 'columnize',
+        lambda entries, **kwargs: grids.append(entries) or columnize(entries, **kwargs))
+
+    class Terminal(io.StringIO):
+
+        def isatty(self):
+            return True
+
+    psh.ls().__stream_out__(Terminal())
+    assert len(grids) == 1 and len(grids[0]) == len(names) + 1
+
+
 def test_inexistent():
     """This used to raise but shouldn't do make sure it's possible"""
     assert len(psh.ls('not_there')) == 0
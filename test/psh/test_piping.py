@@ -1,10 +1,17 @@
 # -*- coding: utf-8 -*-
 """Module that tests the pyOS shell piping functionality"""
 import argparse
+import io
 import sys
 import tempfile
+import threading
 
 import cmd2
+from mincepy.testing import Car
+import pytest
+
+from pyos import db
+from pyos.psh import utils
 
 
 class Echo(cmd2.CommandSet):
@@ -45,3 +52,136 @@ def test_host_shell_piping(pyos_shell, monkeypatch):
         res = pyos_shell.app_cmd('echo -t 1 hello_from_1 | !cat | echo -t 3')
         assert not res.stderr
         assert res.stdout == '3: 1: hello_from_1\n'
+
+
+def test_piper_items():
+    received = []
+
+    def consume():
+        received.extend(utils.read_input())
+
+    # Items sent between psh commands come out as they went in
+    piper = utils.Piper([consume], out_stream=io.StringIO())
+    piper.start()
+    try:
+        utils.send_many([1, 2], ['one', 'two'])
+        print('three')
+    finally:
+        piper.wait()
+    assert received == [1, 2, 'three']
+
+    # ...while external commands only get the text, the items can still be recovered from the side channel
+    received.clear()
+    piper = utils.Piper([consume], out_stream=io.StringIO(), external=[False, True])
+    piper.start()
+    try:
+        utils.send_many([1, 2], ['one', 'two'])
+        print('three')
+    finally:
+        piper.wait()
+    assert received == [1, 2, 'three']
+
+
+def test_pipe_text():
+    reader, writer = utils.make_pipe(batch_size=2)
+    writer.write('first ')
+    writer.send(1, 'line')
+    writer.write('second\nthird')
+    writer.close()
+    assert reader.readline() == 'first line\n'
+    assert reader.read() == 'second\nthird'
+
+    reader.close()
+    with pytest.raises(ValueError):
+        writer.write('closed')
+
+
+def test_pipe_text_chunks():
+    # Text is handed over in chunks that can end part way through a line, or a character
+    reader, writer = utils.make_pipe(max_batches=100, batch_size=2, chunk_size=8)
+    lines = [f'line {idx} \u00e9\u4e2d\n' for idx in range(20)]
+    for idx, line in enumerate(lines):
+        writer.write(line)
+        if idx % 5 == 0:
+            writer.send(idx, 'item')
+    writer.close()
+
+    expected = []
+    for idx, line in enumerate(lines):
+        expected.append((None, line))
+        if idx % 5 == 0:
+            expected.append((idx, 'item\n'))
+    assert [pair for batch in reader.read_batches() for pair in batch] == expected
+
+
+def test_piping_entries(pyos_shell, monkeypatch):
+    cars = [Car() for _ in range(3)]
+    db.save_many(zip(cars, [f'car_{idx}' for idx in range(3)]))
+    expected = {f'{car.obj_id}' for car in cars}
+
+    def get_obj_id_from_path(*_args, **_kwargs):
+        raise AssertionError('Piped entries should not need their paths looking up')
+
+    monkeypatch.setattr(db.lib, 'get_obj_id_from_path', get_obj_id_from_path)
+
+    res = pyos_shell.app_cmd('ls | oid')
+    assert not res.stderr
+    assert set(res.stdout.split()) == expected
+
+    # The entries should survive going through an external command
+    with tempfile.TemporaryFile() as temp_buffer:
+        monkeypatch.setattr('sys.stdin', temp_buffer)
+        res = pyos_shell.app_cmd('ls | !cat | oid')
+        assert not res.stderr
+        assert set(res.stdout.split()) == expected
+
+
+def test_side_channel():
+    channel = utils.SideChannel()
+    channel.record(['a', 'b', 'c'], ['first', 'second', 'third'])
+    assert channel.lookup('first\n') == 'a'
+    assert channel.lookup('fourth') is None
+
+    # The same line with a different item is ambiguous
+    channel.record(['d', 'b'], ['first', 'second'])
+    assert channel.lookup('first') is None
+    assert channel.lookup('second') == 'b'
+
+
+def _wait(piper: utils.Piper, timeout=10.):
+    """Wait for the piper to finish, returning False if it doesn't in time"""
+    waiter = threading.Thread(target=piper.wait, daemon=True)
+    waiter.start()
+    waiter.join(timeout)
+    return not waiter.is_alive()
+
+
+def _produce_forever():
+    while True:
+        utils.send_many(range(100))
+
+
+def test_piper_early_exit():
+    received = []
+
+    def take_two():
+        received.append(sys.stdin.readline())
+        received.append(sys.stdin.readline())
+
+    # The producer should be stopped as soon as the consumer stops reading
+    piper = utils.Piper([_produce_forever, take_two], out_stream=io.StringIO())
+    piper.start()
+    assert _wait(piper)
+    assert received == ['0\n', '1\n']
+
+
+def test_piper_cancel():
+
+    def consume():
+        for _line in sys.stdin:
+            pass
+
+    piper = utils.Piper([_produce_forever, consume], out_stream=io.StringIO())
+    piper.start()
+    piper.send_sigint()
+    assert _wait(piper)
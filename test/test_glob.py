@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
+import fnmatch
 import functools
+import re
 from typing import List
 
 import pytest
@@ -209,3 +211,27 @@ def test_recursive_glob(test_dir):
         eq(glob.glob('**zz*F', recursive=True), [])
         expect = [join('a', 'bcd', 'EF'), 'EF']
         eq(glob.glob(join('**', 'EF'), recursive=True), expect)
+
+
+def test_recursive_glob_order(test_dir):
+    # Each directory is followed by its contents (depth first) with the names sorted within each directory
+    full = [('EF',), ('ZZZ',), ('a',), ('a', 'D'), ('a', 'bcd'), ('a', 'bcd', 'EF'),
+            ('a', 'bcd', 'efg'), ('a', 'bcd', 'efg', 'ha'), ('aaa',), ('aaa', 'zzzF'), ('aab',),
+            ('aab', 'F')]
+    assert rglob(test_dir, '**') == joins(test_dir, ('',), *full)
+    dirs = [('a', ''), ('a', 'bcd', ''), ('a', 'bcd', 'efg', ''), ('aaa', ''), ('aab', '')]
+    assert rglob(test_dir, '**', '') == joins(test_dir, ('',), *dirs)
+    assert rglob(test_dir, '**', '*F') == joins(test_dir, ('EF',), ('a', 'bcd', 'EF'),
+                                                ('aaa', 'zzzF'), ('aab', 'F'))
+
+
+def test_translate():
+    names = ['a', 'abc', 'a.b', '.hidden', 'x[y', 'a^b', 'a\\b', 'b]', 'ZZZ', '']
+    patterns = [
+        '*', 'a*', '*b', 'a?c', '[ab]*', '[!a]*', '[]]', '[^]*', 'x[y', 'a\\b', '*.*', '**',
+        '[a-c]bc', 'a[\\]b', 'Z*Z'
+    ]
+    for pattern in patterns:
+        regex = re.compile(glob.translate(pattern))
+        for name in names:
+            assert bool(regex.match(name)) == fnmatch.fnmatchcase(name, pattern), (pattern, name)